@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+import random
+import mailbox
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from email.message import EmailMessage
+from src.hyperion.mime_parsing import parse_messages
+
+ORIGINAL_PITCH = (
+    "Hi {name},\n\nI noticed {company} recently expanded its operations team. "
+    "We build autonomous AI agents that take repetitive research and outreach work off a team's plate. "
+) * 12
+
+REPLIES = [
+    "Thanks for reaching out. Can we set up a call next Tuesday?",
+    "Not interested at the moment, please check back next quarter.",
+    "How does your pricing work for a team of 20?",
+    "Please unsubscribe me from this list.",
+]
+
+
+def _synthetic_message(i: int, rng: random.Random) -> EmailMessage:
+    name, company = f"Person{i}", f"Company{i % 500}"
+    reply = rng.choice(REPLIES)
+    quoted = "\n".join(f"> {line}" for line in ORIGINAL_PITCH.format(name=name, company=company).splitlines())
+    plain = (f"{reply}\n\nBest,\n{name}\n--\n{name} | Head of Ops | {company}\n"
+             f"CONFIDENTIALITY NOTICE: This email is intended for the addressee only.\n\n"
+             f"On Mon, Oct 5, 2026 at 9:00 AM Sales <sales@example.com> wrote:\n{quoted}\n")
+    html = (f"<html><body><div dir='ltr'>{reply}<br>Best,<br>{name}</div>"
+            f"<div class='gmail_quote'><blockquote>{ORIGINAL_PITCH.format(name=name, company=company)}</blockquote></div>"
+            "</body></html>")
+
+    message = EmailMessage()
+    message["From"] = f"=?utf-8?q?{name}?= <{name.lower()}@{company.lower()}.com>"
+    message["To"] = "sales@example.com"
+    message["Subject"] = "Re: Quick question about your operations team"
+    kind = i % 3
+    if kind == 0:
+        message.set_content(plain)
+    elif kind == 1:
+        message.set_content(html, subtype="html")
+    else:
+        message.set_content(plain, cte="base64")
+        message.add_alternative(html, subtype="html")
+    return message
+
+
+def write_mbox(path: str, count: int, seed: int = 7):
+    rng = random.Random(seed)
+    box = mailbox.mbox(path)
+    box.lock()
+    try:
+        for i in range(count):
+            box.add(_synthetic_message(i, rng))
+        box.flush()
+    finally:
+        box.unlock()
+        box.close()
+
+
+def read_raw_messages(path: str):
+    box = mailbox.mbox(path)
+    try:
+        return [(key, box.get_bytes(key)) for key in box.keys()]
+    finally:
+        box.close()
+
+
+def _time_parse(raw_messages, pool=None) -> float:
+    started = time.perf_counter()
+    parsed = sum(1 for _ in parse_messages(iter(raw_messages), expected=len(raw_messages), pool=pool))
+    assert parsed == len(raw_messages)
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    # Usage: python benchmark_mime_parsing.py [message_count] [workers]
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 2)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "replies.mbox")
+        print(f"-> Writing a synthetic mbox of {count} replies...")
+        write_mbox(path, count)
+        raw_messages = read_raw_messages(path)
+        total_mb = sum(len(raw) for _, raw in raw_messages) / 1024 / 1024
+        print(f"-> Loaded {len(raw_messages)} messages ({total_mb:.1f} MB).")
+
+    inline_seconds = _time_parse(raw_messages)
+    print(f"  - Inline:              {inline_seconds:6.2f}s ({len(raw_messages) / inline_seconds:,.0f} msg/s)")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pool.submit(int).result()  # start the workers before timing
+        pool_seconds = _time_parse(raw_messages, pool)
+    print(f"  - Process pool ({workers:>2}):  {pool_seconds:6.2f}s ({len(raw_messages) / pool_seconds:,.0f} msg/s)")
+    print(f"  - Speedup: {inline_seconds / pool_seconds:.1f}x")
@@ -0,0 +1,21 @@
+import sys
+from src.hyperion.database.operations import (
+    initialize_database, get_campaign_budget, get_campaign_spend, set_campaign_budget
+)
+
+if __name__ == "__main__":
+    # Usage: python campaign_budget.py <sequence_id> [budget_usd | none]
+    if len(sys.argv) < 2:
+        print("Usage: python campaign_budget.py <sequence_id> [budget_usd | none]")
+        sys.exit(1)
+
+    initialize_database()
+    sequence_id = sys.argv[1]
+    if len(sys.argv) > 2:
+        budget = None if sys.argv[2].lower() == 'none' else float(sys.argv[2])
+        set_campaign_budget(sequence_id, budget)
+
+    budget = get_campaign_budget(sequence_id)
+    spent = get_campaign_spend(sequence_id)
+    limit = f"${budget:.2f}" if budget is not None else "CAMPAIGN_BUDGET_USD or unlimited"
+    print(f"Campaign {sequence_id}: spent ${spent:.4f} of {limit}.")
@@ -0,0 +1,36 @@
+import sys
+from datetime import datetime, timezone, timedelta
+from src.hyperion.database.operations import initialize_database, get_campaign_counters, get_usage_summary
+
+FUNNEL = ["enrolled", "researched", "sent", "replied", "replied:POSITIVE_INTEREST", "failed"]
+
+def print_report(days: int = 7, sequence_id: str = None):
+    """Prints the campaign funnel for the last `days` days from the daily counters."""
+    since_day = (datetime.now(timezone.utc) - timedelta(days=days - 1)).date().isoformat()
+    counters = get_campaign_counters(since_day, sequence_id)
+    print(f"--- Campaign funnel since {since_day} ({sequence_id or 'all campaigns'}) ---")
+    for metric in FUNNEL:
+        print(f"  {metric:<28} {counters.get(metric, 0)}")
+    for metric in sorted(set(counters) - set(FUNNEL)):
+        print(f"  {metric:<28} {counters[metric]}")
+    print_cost_report(since_day, sequence_id, counters.get("sent", 0))
+
+def print_cost_report(since_day: str, sequence_id: str, sent: int):
+    """Prints estimated spend by provider and node, and the cost per sent email."""
+    usage = get_usage_summary(since_day, sequence_id)
+    total = sum(row['cost_usd'] for row in usage)
+    print(f"\n--- Estimated cost since {since_day} ---")
+    for row in usage:
+        label = f"{row['provider']}/{row['model']}" if row['model'] else row['provider']
+        print(f"  {label:<34} {row['node']:<28} {row['requests']:>6} call(s) "
+              f"{row['input_tokens']:>10} in {row['output_tokens']:>9} out  ${row['cost_usd']:.4f}")
+    print(f"  {'Total':<28} ${total:.4f}")
+    if sent:
+        print(f"  {'Cost per sent email':<28} ${total / sent:.4f}")
+    else:
+        print(f"  {'Cost per sent email':<28} n/a (nothing sent)")
+
+if __name__ == "__main__":
+    initialize_database()
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    print_report(days, sys.argv[2] if len(sys.argv) > 2 else None)
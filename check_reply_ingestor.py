@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+import tempfile
+import threading
+from email.message import EmailMessage
+from src.hyperion.database import operations
+from src.hyperion.local_imap import LocalImapServer
+from src.hyperion.models import Prospect
+from src.hyperion.reply_ingestor import ReplyIngestionService
+from src.hyperion.resilience import ProviderUnavailableError
+
+SENT_MESSAGE_ID = "<outreach-1@hyperion.local>"
+PROSPECT = Prospect("p-1", "Ada Lovelace", "ada@example.com", "", "CTO", "Example", "example.com", "Europe/London")
+
+
+def _message(subject: str, sender: str, in_reply_to: str = "") -> bytes:
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = "sales@hyperion.local"
+    message["Subject"] = subject
+    if in_reply_to:
+        message["In-Reply-To"] = in_reply_to
+    message.set_content(f"{subject}\n\nBest,\nAda")
+    return message.as_bytes().replace(b"\n", b"\r\n")
+
+
+def _check(label: str, condition: bool, failures: list):
+    print(f"  - {'ok  ' if condition else 'FAIL'} {label}")
+    if not condition:
+        failures.append(label)
+
+
+if __name__ == "__main__":
+    # Usage: python check_reply_ingestor.py
+    # Runs ReplyIngestionService against an in-memory IMAP server and a scratch
+    # database, checking which replies are handled and which stay unread.
+    operations.DATABASE_FILE = os.path.join(tempfile.mkdtemp(), "hyperion.db")
+    operations.initialize_database()
+    operations.add_prospect(PROSPECT)
+    operations.record_sent_email(SENT_MESSAGE_ID, PROSPECT.prospect_id, None, None, 1)
+
+    handled, failures = [], []
+
+    def handler(reply):
+        if "unavailable" in reply["subject"]:
+            raise ProviderUnavailableError("gemini", 30)
+        if "broken" in reply["subject"]:
+            raise ValueError("classifier crashed")
+        handled.append(reply["subject"])
+
+    with LocalImapServer() as server:
+        reply_uid = server.deliver(_message("Re: Quick question", "Ada <ada@example.com>", SENT_MESSAGE_ID))
+        newsletter_uid = server.deliver(_message("Weekly digest", "news@elsewhere.com"))
+        broken_uid = server.deliver(_message("Re: broken", "ada@example.com"))
+        deferred_uid = server.deliver(_message("Re: unavailable", "ada@example.com"))
+
+        service = ReplyIngestionService(
+            host=server.host, port=server.port, use_ssl=False, user="user", password="password", handler=handler
+        )
+        service.connect()
+        print("Backlog:")
+        count = service.process_unseen()
+        _check("one reply handled", count == 1 and handled == ["Re: Quick question"], failures)
+        _check("handled reply marked read", "\\Seen" in server.flags(reply_uid), failures)
+        _check("unrelated mail left unread", "\\Seen" not in server.flags(newsletter_uid), failures)
+        _check("reply the handler failed on left unread", "\\Seen" not in server.flags(broken_uid), failures)
+        _check("reply deferred on an unavailable provider left unread", "\\Seen" not in server.flags(deferred_uid), failures)
+        _check("deferred reply scheduled for retry", service.retry_at is not None, failures)
+
+        print("IDLE:")
+        threading.Timer(0.2, server.deliver, [_message("Re: Follow-up", "ada@example.com")]).start()
+        started = time.monotonic()
+        new_mail = service.idle(5)
+        _check("IDLE returns on new mail", new_mail and time.monotonic() - started < 2, failures)
+        _check("IDLE times out without new mail", not service.idle(0.2), failures)
+        service.process_unseen()
+        _check("new reply handled after IDLE", handled[-1] == "Re: Follow-up", failures)
+        service.disconnect()
+
+    print("All checks passed." if not failures else f"{len(failures)} check(s) failed.")
+    sys.exit(1 if failures else 0)
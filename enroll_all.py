@@ -1,6 +1,6 @@
 import sqlite3
 from src.hyperion.config import DATABASE_FILE
-from src.hyperion.database.operations import initialize_database, enroll_prospect_in_sequence
+from src.hyperion.database.operations import initialize_database, enroll_prospects_in_sequence
 
 def enroll_all_prospects(sequence_id='seq_standard_01'):
     """Finds all prospects in the DB and enrolls them in a sequence."""
@@ -22,10 +22,8 @@ def enroll_all_prospects(sequence_id='seq_standard_01'):
 
     print(f"Found {len(prospects_to_enroll)} new prospects. Enrolling them in {sequence_id}...")
     
-    for prospect_tuple in prospects_to_enroll:
-        prospect_id = prospect_tuple[0]
-        enroll_prospect_in_sequence(prospect_id, sequence_id)
-        
+    enroll_prospects_in_sequence([prospect_tuple[0] for prospect_tuple in prospects_to_enroll], sequence_id)
+
     print("Enrollment complete.")
 
 if __name__ == '__main__':
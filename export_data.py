@@ -0,0 +1,10 @@
+import sys
+from src.hyperion.database.operations import initialize_database
+from src.hyperion.exporter import export_database
+
+if __name__ == "__main__":
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else "exports"
+    print(f"--- Exporting Hyperion data to {output_dir}/ ---")
+    initialize_database()
+    counts = export_database(output_dir, sys.argv[2:] or None)
+    print(f"--- Export complete: {sum(counts.values())} row(s) across {len(counts)} table(s). ---")
@@ -2,8 +2,13 @@ from src.hyperion.database.operations import initialize_database, add_prospect,
 from src.hyperion.agents.research_agent import build_agent_graph, generate_email
 from src.hyperion.config import DATABASE_FILE
 import os
+import sys
+from src.hyperion.profiling import profile_block, enable_profiling
 
 if __name__ == "__main__":
+    if "--profile" in sys.argv[1:]:
+        enable_profiling()
+
     print("--- Starting Hyperion Test: Upgraded 'Website-First' Agent ---")
     
     # Step 1: Initialize the database to ensure it's ready.
@@ -35,7 +40,8 @@ if __name__ == "__main__":
     agent_input = { "prospect": mock_prospect }
     
     # Run the agent from start to finish
-    final_state = research_agent.invoke(agent_input)
+    with profile_block(f"research_{mock_prospect['id']}"):
+        final_state = research_agent.invoke(agent_input)
 
     print("\n\n--- RESEARCH PHASE COMPLETE ---")
     
@@ -48,7 +54,8 @@ if __name__ == "__main__":
         print(f"  - Generated Hook: '{hook}'")
         
         # Step 5: If research was successful, generate the final email.
-        final_email = generate_email(mock_prospect, hook)
+        with profile_block(f"generate_{mock_prospect['id']}"):
+            final_email = generate_email(mock_prospect, hook)
         
         if final_email:
             print("\n✅ --- GENERATION COMPLETE ---")
@@ -1,8 +1,14 @@
 import csv
-from src.hyperion.database.operations import initialize_database, add_prospect
+import sys
+from src.hyperion.database.operations import initialize_database, add_prospects
+from src.hyperion.prospect_import import dedupe_prospects, format_import_report
 
-def populate_from_csv(csv_filepath='prospects.csv'):
-    """Reads a CSV and populates the prospects table."""
+def populate_from_csv(csv_filepath='prospects.csv', one_per_company=False):
+    """
+    Reads a CSV, normalizes and deduplicates it against itself and the
+    database, and adds the new prospects in one batch. With `one_per_company`
+    only the first contact per company domain is kept.
+    """
     initialize_database()
     
     try:
@@ -15,8 +21,6 @@ def populate_from_csv(csv_filepath='prospects.csv'):
                 last_name = row.get('Last Name', '')
                 
                 prospect = {
-                    'id': f"prospect_{row.get('Email')}",
-                    
                     'name': f"{first_name} {last_name}".strip(),
                     
                     'email': row.get('Email'),
@@ -33,11 +37,12 @@ def populate_from_csv(csv_filepath='prospects.csv'):
                 prospects_to_add.append(prospect)
             
             print(f"Found {len(prospects_to_add)} prospects in {csv_filepath}.")
-            
-            for p in prospects_to_add:
-                add_prospect(p)
-            
-            print(f"Successfully added/updated {len(prospects_to_add)} prospects in the database.")
+
+            unique_prospects, stats = dedupe_prospects(prospects_to_add, one_per_company=one_per_company)
+            print(format_import_report(stats))
+
+            inserted = add_prospects(unique_prospects)
+            print(f"Successfully added {inserted} prospects to the database.")
 
     except FileNotFoundError:
         print(f"Error: The file {csv_filepath} was not found. Please ensure it is in the root directory.")
@@ -47,4 +52,6 @@ def populate_from_csv(csv_filepath='prospects.csv'):
         print(f"An unexpected error occurred: {e}")
 
 if __name__ == "__main__":
-    populate_from_csv()
\ No newline at end of file
+    # Usage: python populate_db.py [csv_file] [--one-per-company]
+    args = [arg for arg in sys.argv[1:] if arg != '--one-per-company']
+    populate_from_csv(args[0] if args else 'prospects.csv', one_per_company='--one-per-company' in sys.argv)
\ No newline at end of file
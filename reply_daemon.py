@@ -0,0 +1,7 @@
+from src.hyperion.database.operations import initialize_database
+from src.hyperion.reply_ingestor import ReplyIngestionService
+
+if __name__ == "__main__":
+    print("--- Hyperion Reply Ingestion Service is starting up... ---")
+    initialize_database()
+    ReplyIngestionService().run_forever()
@@ -1,19 +1,46 @@
+import sys
 import time
 from datetime import datetime, timezone
 
 from src.hyperion.database.operations import (
-    initialize_database, get_due_actions,
-    update_sequence_after_send, get_prospect_by_id,
-    update_prospect_status
+    initialize_database, get_due_actions, get_prospect_by_id,
+    defer_sequence_action, get_next_action_time
 )
-from src.hyperion.email_sender import send_email
-from src.hyperion.agents.research_agent import build_agent_graph, generate_email
+from src.hyperion.agents.research_agent import build_agent_graph
+from src.hyperion.pipeline import (
+    compose_step_email, send_step_email, complete_send, fail_action, defer_failed_send, SKIP, FAILED
+)
+from src.hyperion.sequences import advance_sequence, load_sequences
+from src.hyperion.resilience import ProviderUnavailableError
+from src.hyperion.usage import BudgetExhaustedError
+from src.hyperion.model_router import routing_stats
+from src.hyperion.notifications import SchedulerWakeup
+from src.hyperion.send_windows import in_send_window, infer_timezone
+from src.hyperion.profiling import profile_block, enable_profiling, profiling_enabled
+
+# Upper bound on an idle sleep, as a safety net for changes made without a notification
+# (e.g. rows edited by hand).
+MAX_IDLE_SLEEP_SECONDS = 3600
+# Lower bound, so an action that stays due can't make the loop spin.
+MIN_IDLE_SLEEP_SECONDS = 30
+
+def seconds_until_next_action() -> float:
+    """Seconds until the earliest active action is due, clamped to [MIN_IDLE_SLEEP_SECONDS, MAX_IDLE_SLEEP_SECONDS]."""
+    next_action_time = get_next_action_time()
+    if next_action_time is None:
+        return MAX_IDLE_SLEEP_SECONDS
+    delay = (next_action_time - datetime.now(timezone.utc)).total_seconds()
+    return min(max(delay, MIN_IDLE_SLEEP_SECONDS), MAX_IDLE_SLEEP_SECONDS)
 
 def run_scheduler():
     """The final, production-ready scheduler."""
     print("--- Hyperion Scheduler [v5.0 FINAL] is starting up... ---")
     initialize_database()
+    load_sequences()
+    if profiling_enabled():
+        print("-> Profiling enabled: each prospect's step is profiled with cProfile and tracemalloc.")
     research_agent = build_agent_graph()
+    wakeup = SchedulerWakeup()
     
     while True:
         try:
@@ -27,56 +54,69 @@ def run_scheduler():
                 
                 for i, action in enumerate(due_actions):
                     print(f"\n--- Processing action {i+1} of {len(due_actions)} ---")
-                    prospect_id = action['prospect_id']
+                    prospect_id = action.prospect_id
                     prospect = get_prospect_by_id(prospect_id)
                     
                     if not prospect:
                         print(f"  - Skipping: Prospect data not found for id {prospect_id}")
-                        update_prospect_status(prospect_id, 'failed')
+                        fail_action(action, "prospect not found")
+                        continue
+
+                    # A long batch (5 minutes per send) can run past a prospect's window close.
+                    zone = prospect.timezone or infer_timezone(domain=prospect.company_domain)
+                    if not in_send_window(datetime.now(timezone.utc), zone):
+                        print(f"    -> Outside {prospect.full_name}'s send window now. Rescheduling.")
+                        defer_sequence_action(action.prospect_sequence_id, 0)
                         continue
 
-                    print(f"    -> Processing Step {action['current_step']} for {prospect['name']}...")
+                    print(f"    -> Processing Step {action.current_step} for {prospect.full_name}...")
                     
-                    if action['current_step'] == 1:
-                        print("    -> Running AI Research for Step 1...")
-                        agent_input = {"prospect": prospect}
-                        final_state = research_agent.invoke(agent_input)
-                        hook = final_state.get('hook')
+                    try:
+                        with profile_block(f"step{action.current_step}_{prospect_id}"):
+                            outcome, email_parts, reason = compose_step_email(research_agent, action, prospect)
+                    except (ProviderUnavailableError, BudgetExhaustedError) as e:
+                        print(f"    -> {e}. Deferring prospect.")
+                        defer_sequence_action(action.prospect_sequence_id, e.retry_after)
+                        continue
 
-                        if hook and "No compelling hook found." not in hook:
-                            print(f"    -> AI Research successful. Hook: '{hook}'")
-                            email_content = generate_email(prospect, hook, final_state)
-                            
-                            if email_content:
-                                try:
-                                    subject = email_content.split('Subject: ')[1].split('\n')[0]
-                                    body = email_content.split('\n\n', 1)[1]
-                                    email_sent = send_email(prospect['email'], subject, body)
-                                    
-                                    if email_sent:
-                                        update_sequence_after_send(action['prospect_sequence_id'], action['current_step'], 3)
-                                        print(f"    -> Action complete. Email sent and prospect rescheduled.")
-                                        if i < len(due_actions) - 1:
-                                            print(f"    -> Pacing delay: Waiting 5 minutes...")
-                                            time.sleep(300)
-                                except Exception as e:
-                                    print(f"    - Error parsing or sending email: {e}")
-                                    update_prospect_status(prospect_id, 'failed')
-                        else:
-                            print(f"    -> AI could not find a compelling hook. Skipping prospect.")
-                            update_prospect_status(prospect_id, 'failed')
-                            continue
+                    if outcome == SKIP:
+                        advance_sequence(action)
+                    elif outcome == FAILED:
+                        fail_action(action, reason)
                     else:
-                        print("    -> Follow-up steps not yet implemented. Finishing sequence.")
-                        update_prospect_status(prospect_id, 'finished')
+                        if not in_send_window(datetime.now(timezone.utc), zone):
+                            print("    -> Research ran past the send window's close. Rescheduling.")
+                            defer_sequence_action(action.prospect_sequence_id, 0)
+                            continue
+                        try:
+                            subject, body = email_parts
+                            message_id = send_step_email(action, prospect, subject, body)
+
+                            if message_id:
+                                complete_send(action, message_id)
+                                print(f"    -> Action complete. Email sent and prospect rescheduled.")
+                                if i < len(due_actions) - 1:
+                                    print(f"    -> Pacing delay: Waiting 5 minutes...")
+                                    time.sleep(300)
+                            else:
+                                print("    - Email was not sent. Deferring with backoff.")
+                                defer_failed_send(action)
+                        except Exception as e:
+                            print(f"    - Error sending email: {e}")
+                            fail_action(action, f"send error: {e}")
+
+                print(routing_stats.report())
 
-            sleep_interval = 60
-            print(f"\n--- Scheduler sleeping for {sleep_interval} seconds. ---")
-            time.sleep(sleep_interval)
+            sleep_interval = seconds_until_next_action()
+            print(f"\n--- Scheduler sleeping for up to {sleep_interval:.0f} seconds (or until notified). ---")
+            if wakeup.wait(sleep_interval):
+                print("  - Woken early by a queue notification.")
 
         except Exception as e:
             print(f"!! An error occurred in the scheduler loop: {e} !!")
             time.sleep(60)
 
 if __name__ == "__main__":
+    if "--profile" in sys.argv[1:]:
+        enable_profiling()
     run_scheduler()
\ No newline at end of file
@@ -0,0 +1,18 @@
+import sys
+import time
+from src.hyperion.simulator import SimulationConfig, simulate_campaign, format_simulation_report
+
+if __name__ == "__main__":
+    # Usage: python simulate_campaign.py [prospects] [research_workers] [reply_rate]
+    # research_workers 0 (the default) models scheduler.py; N > 0 models supervisor.py.
+    config = SimulationConfig(
+        prospects=int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+        research_workers=int(sys.argv[2]) if len(sys.argv) > 2 else 0,
+    )
+    if len(sys.argv) > 3:
+        config.reply_rate = float(sys.argv[3])
+
+    started = time.perf_counter()
+    result = simulate_campaign(config)
+    print(format_simulation_report(config, result))
+    print(f"\n(Simulated in {time.perf_counter() - started:.1f}s of wall time.)")
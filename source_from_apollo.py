@@ -0,0 +1,15 @@
+from src.hyperion.database.operations import initialize_database
+from src.hyperion.clients.apollo_client import ApolloClient
+from src.hyperion.sourcing import source_prospects_from_apollo
+
+# Edit these to define the campaign's ideal customer profile.
+TITLES = ['Founder', 'Co-Founder', 'CEO']
+LOCATIONS = ['United States']
+COMPANY_EMPLOYEE_COUNTS = ['1,10', '11,50']
+
+if __name__ == "__main__":
+    print("--- Hyperion Apollo Sourcing ---")
+    initialize_database()
+    client = ApolloClient()
+    source_prospects_from_apollo(client, TITLES, LOCATIONS, COMPANY_EMPLOYEE_COUNTS)
+    print("--- Sourcing complete. ---")
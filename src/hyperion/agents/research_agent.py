@@ -1,77 +1,75 @@
-import os
 import json
-import requests
-from dotenv import load_dotenv
-from typing import List, Dict, Optional, TypedDict
-import google.generativeai as genai
+import time
+import re
+from typing import List, Dict, Optional, Tuple, TypedDict
 from newspaper import Article
 from langchain_core.messages import BaseMessage
 from langgraph.graph import StateGraph, END
-from firecrawl import FirecrawlApp
-import io
-from pypdf import PdfReader
-from src.hyperion.config import PROJECT_ROOT
-from tavily import TavilyClient
+from src.hyperion.config import PROJECT_ROOT, get_settings
 from google.generativeai import types
-
-def safe_gemini_generate(model, prompt, context_name="Unknown"):
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from src.hyperion.clients.registry import get_clients
+from src.hyperion.pdf_extractor import fetch_pdf_text
+from src.hyperion.resilience import call_provider, provider_timeout, ProviderUnavailableError
+from src.hyperion.clients.gemini import generate_text, JSON_RESPONSE_CONFIG
+from src.hyperion.model_router import route_generation, parse_hook_and_email, NO_HOOK_FOUND
+from src.hyperion.usage import tracked_node, track_usage
+
+MAX_URLS_TO_SCRAPE = 3
+SUMMARY_CHARS_PER_DOCUMENT = 15000
+# Research result pages added to the company website's content for hook synthesis.
+EXTRA_SOURCE_CHARS = 5000
+
+# Per-prospect latency budget. Nodes shrink their timeouts to fit what is left
+# and take cheaper paths once the remaining time drops below these thresholds.
+PROSPECT_TIME_BUDGET_SECONDS = 180
+MIN_CALL_TIMEOUT_SECONDS = 5
+ADVANCED_SEARCH_MIN_SECONDS = 90
+WEBSITE_FALLBACK_MIN_SECONDS = 45
+# Email generation gets its own allowance after research, however much of the
+# research budget was used, so a slow prospect's research isn't thrown away.
+EMAIL_TIME_BUDGET_SECONDS = 60
+
+def safe_gemini_generate(model, prompt, context_name="Unknown", state=None):
     """
     Safely calls Gemini with comprehensive error handling.
+    The request timeout is capped by the prospect's remaining budget when `state` is given.
     Returns: (success: bool, text: str, error_msg: str)
+    Raises ProviderUnavailableError while Gemini's circuit is open.
     """
-    try:
-        response = model.generate_content(prompt)
-        
-        # Check if response exists
-        if not response:
-            return False, "", f"{context_name}: No response object returned"
-        
-        # Check for prompt feedback (blocked before generation)
-        if hasattr(response, 'prompt_feedback') and response.prompt_feedback:
-            if hasattr(response.prompt_feedback, 'block_reason'):
-                return False, "", f"{context_name}: Prompt blocked - {response.prompt_feedback.block_reason}"
-        
-        # Check if candidates exist
-        if not response.candidates or len(response.candidates) == 0:
-            return False, "", f"{context_name}: No candidates returned"
-        
-        candidate = response.candidates[0]
-        
-        # Check finish reason
-        finish_reasons = {
-            0: "UNSPECIFIED",
-            1: "STOP",  # This is actually success
-            2: "MAX_TOKENS",
-            3: "SAFETY",
-            4: "RECITATION",
-            5: "OTHER"
-        }
-        
-        finish_reason_name = finish_reasons.get(candidate.finish_reason, "UNKNOWN")
-        
-        # If not STOP, something went wrong
-        if candidate.finish_reason != 1:
-            error_details = f"Finish reason: {finish_reason_name}"
-            if hasattr(candidate, 'safety_ratings'):
-                error_details += f", Safety: {candidate.safety_ratings}"
-            return False, "", f"{context_name}: {error_details}"
-        
-        # Check if content parts exist
-        if not candidate.content or not candidate.content.parts:
-            return False, "", f"{context_name}: No content parts (finish_reason was STOP but no content)"
-        
-        # Extract text
-        text = response.text.strip()
-        
-        if not text:
-            return False, "", f"{context_name}: Empty text returned"
-        
-        return True, text, ""
-        
-    except AttributeError as e:
-        return False, "", f"{context_name}: Attribute error - {str(e)}"
-    except Exception as e:
-        return False, "", f"{context_name}: Exception - {str(e)}"
+    return generate_text(
+        model, prompt, context_name,
+        request_options=gemini_request_options(state), deadline=state_deadline(state)
+    )
+
+def prospect_deadline(budget_seconds: float = PROSPECT_TIME_BUDGET_SECONDS) -> float:
+    """Returns the deadline (epoch seconds) for a prospect whose research starts now."""
+    return time.time() + budget_seconds
+
+def state_deadline(state: Optional[Dict]) -> Optional[float]:
+    return state.get('deadline') if state else None
+
+def time_remaining(state: Optional[Dict]) -> Optional[float]:
+    """Seconds left in the prospect's budget, or None if it has no deadline."""
+    deadline = state_deadline(state)
+    if deadline is None:
+        return None
+    return deadline - time.time()
+
+def call_timeout(state: Optional[Dict], provider: str) -> float:
+    """The provider's timeout, shrunk to fit the prospect's remaining budget."""
+    timeout = provider_timeout(provider)
+    remaining = time_remaining(state)
+    if remaining is not None:
+        timeout = min(timeout, max(remaining, MIN_CALL_TIMEOUT_SECONDS))
+    return timeout
+
+def gemini_request_options(state: Optional[Dict] = None) -> Dict:
+    return {"timeout": call_timeout(state, "gemini")}
+
+def firecrawl_timeout_ms(state: Optional[Dict] = None) -> int:
+    return int(call_timeout(state, "firecrawl") * 1000)
 
 def load_prompt(file_name: str) -> str:
     """Loads a prompt template from the prompts directory."""
@@ -89,10 +87,13 @@ class AgentState(TypedDict):
     max_retries: int
     retries: int
     source_url: Optional[str]
+    deadline: Optional[float]
     research_question: Optional[str]
     research_summary: Optional[str]
     company_research: Optional[str]
     person_research: Optional[str]
+    email_subject: Optional[str]
+    email_body: Optional[str]
 
 def scrape_website_for_context(state: AgentState) -> Dict:
     """
@@ -110,23 +111,27 @@ def scrape_website_for_context(state: AgentState) -> Dict:
         if not website_url.startswith(('http://', 'https://')):
             website_url = 'https://' + website_url
 
-        firecrawl_api_key = os.getenv("FIRECRAWL_API_KEY")
-        app = FirecrawlApp(api_key=firecrawl_api_key)
-        scraped_data = app.scrape(website_url)
+        app = get_clients().firecrawl()
+        scraped_data = call_provider("firecrawl", app.scrape, website_url, timeout=firecrawl_timeout_ms(state), deadline=state_deadline(state))
 
         if not scraped_data or not scraped_data.markdown:
             print("  - FireCrawl failed to extract content. Returning empty context.")
             return {"website_context": "Failed to retrieve website data."}
         
         content = scraped_data.markdown
-        model = genai.GenerativeModel('gemini-3-flash-preview')
+        model = get_clients().gemini('gemini-3-flash-preview')
         prompt = f"Summarize what this company does in one single, concise sentence based on their website content:\n\n{content[:10000]}"
-        response = model.generate_content(prompt)
+        response = call_provider(
+            "gemini", model.generate_content, prompt,
+            request_options=gemini_request_options(state), deadline=state_deadline(state)
+        )
         summary = response.text.strip()
         
         print(f"  - Website Context Found: {summary}")
         return {"website_context": summary}
 
+    except ProviderUnavailableError:
+        raise
     except Exception as e:
         print(f"  - An error occurred during context scraping: {e}")
         return {"website_context": f"An error occurred: {e}"}
@@ -142,7 +147,7 @@ def generate_search_queries(state: AgentState) -> Dict:
     company_name = prospect.get('organization', {}).get('name', '')
 
     print(f"\n--- Node: Generating Search Queries (with context) ---")
-    model = genai.GenerativeModel('gemini-3-flash-preview')
+    model = get_clients().gemini('gemini-3-flash-preview')
     
     prompt = (
         f"You are a research analyst. You are researching a person named '{prospect_name}' at a company called '{company_name}'.\n"
@@ -152,7 +157,10 @@ def generate_search_queries(state: AgentState) -> Dict:
         "Return your response as a JSON-formatted list of strings."
     )
     
-    response = model.generate_content(prompt)
+    response = call_provider(
+        "gemini", model.generate_content, prompt,
+        request_options=gemini_request_options(state), deadline=state_deadline(state)
+    )
     json_response = response.text.strip().replace("```json\n", "").replace("\n```", "")
     queries = json.loads(json_response)
     
@@ -170,65 +178,124 @@ def execute_web_search(state: AgentState) -> Dict:
     top_query = queries[0]
     print(f"Searching for: '{top_query}'")
 
-    api_key = os.getenv("SERPER_API_KEY")
+    api_key = get_settings().serper_api_key
     url = "https://google.serper.dev/search"
 
     payload = json.dumps({"q": top_query})
     headers = {'X-API-KEY': api_key, 'Content-Type': 'application/json'}
 
-    response = requests.post(url, headers=headers, data=payload)
+    response = get_clients().http().post(url, headers=headers, data=payload)
     response.raise_for_status()
+    track_usage("serper")
     data = response.json()
     
     return {"search_results": data.get('organic', [])}
 
+def _fetch_url_content(url: str, session, firecrawl_app, state: AgentState) -> str:
+    """
+    Fetches the readable text of a single URL (PDF, FireCrawl, then newspaper3k).
+    """
+
+    print(f"Scraping: {url}")
+    try:
+        if url.lower().endswith('.pdf'):
+            return fetch_pdf_text(url, session, max_chars=SUMMARY_CHARS_PER_DOCUMENT)
+
+        try:
+            scraped_data = call_provider(
+                "firecrawl", firecrawl_app.scrape, url,
+                timeout=firecrawl_timeout_ms(state), deadline=state_deadline(state)
+            )
+        except ProviderUnavailableError as e:
+            print(f"  - {e}")
+            scraped_data = None
+        if scraped_data and scraped_data.markdown:
+            return scraped_data.markdown
+
+        print(f"  - FireCrawl failed for {url}. Falling back to newspaper3k...")
+        response = session.get(url)
+        response.raise_for_status()
+        article = Article(url)
+        article.html = response.text
+        article.parse()
+        return article.text
+
+    except Exception as e:
+        print(f"  - An error occurred while scraping {url}: {e}")
+        return ""
+
+def _fetch_urls_concurrently(urls: List[str], state: AgentState) -> List[str]:
+    """
+    Fetches several URLs at once over the shared connection pool. Returns their
+    text in the order given ('' where every method failed).
+    """
+
+    session = get_clients().http()
+    firecrawl_app = get_clients().firecrawl()
+    with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        # map() keeps the input order; each task runs in a copy of this context
+        # so its calls are attributed to the same prospect and node.
+        contexts = [copy_context() for _ in urls]
+        return list(executor.map(
+            lambda context, url: context.run(_fetch_url_content, url, session, firecrawl_app, state), contexts, urls
+        ))
+
+def _summarize_contents_batch(contents: List[str], state: AgentState) -> List[str]:
+    """
+    Summarizes several documents with a single Gemini call.
+    Falls back to one call per document if the batched response can't be parsed.
+    """
+
+    model = get_clients().gemini('gemini-3-flash-preview')
+    documents = "\n\n".join(
+        f"--- DOCUMENT {i + 1} ---\n{content[:SUMMARY_CHARS_PER_DOCUMENT]}"
+        for i, content in enumerate(contents)
+    )
+    prompt = (
+        f"Summarize each of the following {len(contents)} documents in 2-3 sentences.\n"
+        "Return your response as a JSON-formatted list of strings, one summary per document, in the same order.\n\n"
+        f"{documents}"
+    )
+
+    success, text, error = safe_gemini_generate(model, prompt, "summarize_contents_batch", state)
+    if success:
+        try:
+            summaries = json.loads(text.replace("```json", "").replace("```", "").strip())
+            if isinstance(summaries, list) and len(summaries) == len(contents):
+                return [str(summary) for summary in summaries]
+            error = f"expected {len(contents)} summaries, got {len(summaries) if isinstance(summaries, list) else 'non-list'}"
+        except json.JSONDecodeError as e:
+            error = f"invalid JSON - {e}"
+
+    print(f"  - Batched summary failed ({error}). Summarizing documents individually...")
+    summaries = []
+    for content in contents:
+        prompt = f"Summarize the following text in 2-3 sentences:\n\n{content[:SUMMARY_CHARS_PER_DOCUMENT]}"
+        success, summary, error = safe_gemini_generate(model, prompt, "summarize_content", state)
+        if success:
+            summaries.append(summary)
+        else:
+            print(f"  - {error}")
+    return summaries
+
 def scrape_and_summarize_content(state: AgentState) -> Dict:
     """
-    Node: A tiered scraper with the FINAL FireCrawl logic.
+    Node: A tiered scraper that fetches the top results concurrently over a
+    shared connection pool and summarizes them in one batched call.
     """
     search_results = state['search_results']
     print("\n--- Node: Scraping and Summarizing (Tiered Method) ---")
-    summaries = []
-    urls = [result.get('link') for result in search_results[:3]]
-    firecrawl_app = FirecrawlApp(api_key=os.getenv("FIRECRAWL_API_KEY"))
-    
-    for url in urls:
-        if not url: continue
-        print(f"Scraping: {url}")
-        content = ""
-        try:
-            if url.lower().endswith('.pdf'):
-                headers = {'User-Agent': 'Mozilla/5.0...'}
-                response = requests.get(url, headers=headers, timeout=10)
-                response.raise_for_status()
-                reader = PdfReader(io.BytesIO(response.content))
-                content = " ".join(page.extract_text() for page in reader.pages)
-            else:
-                scraped_data = firecrawl_app.scrape(url)
-                if scraped_data and scraped_data.markdown:
-                    content = scraped_data.markdown
-                else:
-                    print("  - FireCrawl failed. Falling back to newspaper3k...")
-                    headers = {'User-Agent': 'Mozilla/5.0...'}
-                    response = requests.get(url, headers=headers, timeout=10)
-                    response.raise_for_status()
-                    article = Article(url)
-                    article.html = response.text
-                    article.parse()
-                    content = article.text
-            
-            if content:
-                print("  - Successfully extracted content.")
-                model = genai.GenerativeModel('gemini-3-flash-preview')
-                prompt = f"Summarize the following text in 2-3 sentences:\n\n{content[:15000]}"
-                summaries.append(model.generate_content(prompt).text)
-            else:
-                print("  - All scraping methods failed.")
+    urls = [result.get('link') for result in search_results[:MAX_URLS_TO_SCRAPE] if result.get('link')]
+    if not urls:
+        return {"summaries": []}
 
-        except Exception as e:
-            print(f"  - An error occurred: {e}")
-    
-    return {"summaries": summaries}
+    contents = [content for content in _fetch_urls_concurrently(urls, state) if content]
+    print(f"  - Extracted content from {len(contents)} of {len(urls)} URLs.")
+    if not contents:
+        print("  - All scraping methods failed.")
+        return {"summaries": []}
+
+    return {"summaries": _summarize_contents_batch(contents, state)}
 
 def synthesize_final_hook(state: AgentState) -> Dict:
     """
@@ -241,15 +308,7 @@ def synthesize_final_hook(state: AgentState) -> Dict:
     prospect = state.get('prospect', {})
     
     try:
-        model = genai.GenerativeModel(
-            'gemini-3-flash-preview',
-            safety_settings={
-                genai.types.HarmCategory.HARM_CATEGORY_HATE_SPEECH: genai.types.HarmBlockThreshold.BLOCK_NONE,
-                genai.types.HarmCategory.HARM_CATEGORY_HARASSMENT: genai.types.HarmBlockThreshold.BLOCK_NONE,
-                genai.types.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: genai.types.HarmBlockThreshold.BLOCK_NONE,
-                genai.types.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: genai.types.HarmBlockThreshold.BLOCK_NONE,
-            }
-        )
+        model = get_clients().gemini('gemini-3-flash-preview')
         
         prompt_template = load_prompt("synthesize_hook_from_website.md")
         prompt = prompt_template.format(
@@ -259,7 +318,7 @@ def synthesize_final_hook(state: AgentState) -> Dict:
         )
         
         # Use the safe wrapper
-        success, hook, error = safe_gemini_generate(model, prompt, "synthesize_final_hook")
+        success, hook, error = safe_gemini_generate(model, prompt, "synthesize_final_hook", state)
         
         if not success:
             print(f"  - ❌ Failed to generate hook: {error}")
@@ -272,6 +331,8 @@ def synthesize_final_hook(state: AgentState) -> Dict:
         
         return {"hook": hook}
         
+    except ProviderUnavailableError:
+        raise
     except Exception as e:
         print(f"  - ❌ Exception in synthesize_final_hook: {e}")
         company_name = prospect.get('organization', {}).get('name', 'your company')
@@ -410,27 +471,35 @@ def prepare_for_retry(state:AgentState) -> Dict:
 def scrape_company_website(state: AgentState) -> Dict:
     """
     Node: The reliable fallback scraper for company-centric hooks.
+    Fetches the company website together with the top research result pages
+    (PDFs are streamed) concurrently over the shared connection pool.
     """
 
     print("\n--- Node: Fallback - Scraping Company Website ---")
-    content, url = "No data available.", "N/A"
-    try:
-        website_url = state['prospect']['organization']['primary_domain']
-        if not website_url.startswith(('http://', 'https://')):
-            website_url = 'https://' + website_url
-        url = website_url
-        app = FirecrawlApp(api_key=os.getenv("FIRECRAWL_API_KEY"))
-        scraped_data = app.scrape(url)
-        if scraped_data and scraped_data.markdown:
-            content = scraped_data.markdown
-            print("  - Successfully scraped website markdown.")
-        else:
-            raise ValueError("FireCrawl failed on website scrape.")
-    except Exception as e:
-        print(f"  - An error occurred during website scrape: {e}")
-        content = f"Error: {e}"
-
-    return {"company_research": content, "source_url": url}
+    website_url = (state['prospect'].get('organization') or {}).get('primary_domain') or ''
+    if not website_url:
+        print("  - No company website to scrape.")
+        return {"company_research": "Error: no company website.", "source_url": "N/A"}
+    if not website_url.startswith(('http://', 'https://')):
+        website_url = 'https://' + website_url
+
+    result_urls = [result.get('link') for result in state.get('search_results') or [] if result.get('link')]
+    urls = [website_url] + [url for url in dict.fromkeys(result_urls) if url != website_url][:MAX_URLS_TO_SCRAPE - 1]
+    contents = _fetch_urls_concurrently(urls, state)
+    print(f"  - Extracted content from {sum(1 for content in contents if content)} of {len(urls)} URLs.")
+
+    website_content, extra_contents = contents[0], contents[1:]
+    if not website_content and not any(extra_contents):
+        print("  - An error occurred during website scrape: every source failed.")
+        return {"company_research": "Error: FireCrawl failed on website scrape.", "source_url": website_url}
+
+    sections = [website_content] if website_content else []
+    sections += [
+        f"--- Source: {url} ---\n{content[:EXTRA_SOURCE_CHARS]}"
+        for url, content in zip(urls[1:], extra_contents) if content
+    ]
+    source_url = website_url if website_content else next(url for url, content in zip(urls[1:], extra_contents) if content)
+    return {"company_research": "\n\n".join(sections), "source_url": source_url}
 
 def synthesize_hook_from_website(state: AgentState) -> Dict:
     """
@@ -445,7 +514,7 @@ def synthesize_hook_from_website(state: AgentState) -> Dict:
         return {"hook": None}
 
     try:
-        model = genai.GenerativeModel('gemini-3-flash-preview')
+        model = get_clients().gemini('gemini-3-flash-preview')
         prompt_template = load_prompt("synthesize_hook_from_website.md")
         prospect_first_name = prospect.get('name', '').split(' ')[0]
         prospect_title = prospect.get('title', 'a key leader')
@@ -457,23 +526,26 @@ def synthesize_hook_from_website(state: AgentState) -> Dict:
             raw_website_content=raw_website_content[:12000]
         )
         
-        response = model.generate_content(prompt)
+        response = call_provider(
+            "gemini", model.generate_content, prompt,
+            request_options=gemini_request_options(state), deadline=state_deadline(state)
+        )
         # we take the last line of the response, as the model might do some chain-of-thought first
         hook = response.text.strip().split('\n')[-1].replace("Generated Hook:", "").strip()
         
         print(f"  - Synthesized Hook: {hook}")
         return {"hook": hook}
+    except ProviderUnavailableError:
+        raise
     except Exception as e:
         print(f"  - An error occurred during hook synthesis: {e}")
         return {"hook": None}
 
 def generate_email(prospect: Dict, hook: str, state: AgentState) -> Optional[str]:
-    """Uses Gemini 2.5 Pro and an external template to generate the final email."""
+    """Uses the routed email model and an external template to generate the final email."""
     print("\n--- Node: Generating Final Email (from template) ---")
     try:
-        load_dotenv()
-        genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-
+        settings = get_settings()
         website_content = state.get('company_research', '')
         
         # Load the template
@@ -483,8 +555,8 @@ def generate_email(prospect: Dict, hook: str, state: AgentState) -> Optional[str
         prospect_first_name = prospect.get('name', '').split(' ')[0]
         prospect_title = prospect.get('title', 'a key leader')
         company_name = prospect.get('organization', {}).get('name', '')
-        agency_name = os.getenv("AGENCY_NAME", "Get AI Simplified")
-        agency_value_prop = os.getenv("AGENCY_VALUE_PROP", "We build autonomous AI agents")
+        agency_name = settings.agency_name
+        agency_value_prop = settings.agency_value_prop
         
         # Replace variables safely
         prompt = prompt_template
@@ -496,58 +568,23 @@ def generate_email(prospect: Dict, hook: str, state: AgentState) -> Optional[str
         prompt = prompt.replace('{your_agency_name}', agency_name)
         prompt = prompt.replace('{your_agency_value_prop}', agency_value_prop)
         
-        # Configure model with ALL safety settings off
-        model = genai.GenerativeModel(
-            'gemini-3-flash-preview',
-            safety_settings={
-                genai.types.HarmCategory.HARM_CATEGORY_HATE_SPEECH: genai.types.HarmBlockThreshold.BLOCK_NONE,
-                genai.types.HarmCategory.HARM_CATEGORY_HARASSMENT: genai.types.HarmBlockThreshold.BLOCK_NONE,
-                genai.types.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: genai.types.HarmBlockThreshold.BLOCK_NONE,
-                genai.types.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: genai.types.HarmBlockThreshold.BLOCK_NONE,
-            }
+        success, email_text, error = route_generation(
+            "email", lambda model_name: safe_gemini_generate(get_clients().gemini(model_name), prompt, "generate_email", state)
         )
-        
-        response = model.generate_content(prompt)
-        
-        # Detailed error checking
-        if not response.candidates:
-            print(f"  - ❌ No candidates returned")
-            print(f"  - Prompt feedback: {response.prompt_feedback}")
-            return None
-        
-        candidate = response.candidates[0]
-        
-        if candidate.finish_reason != 1:  # 1 = STOP (success)
-            finish_reasons = {
-                0: "FINISH_REASON_UNSPECIFIED",
-                1: "STOP",
-                2: "MAX_TOKENS",
-                3: "SAFETY",
-                4: "RECITATION",
-                5: "OTHER"
-            }
-            reason = finish_reasons.get(candidate.finish_reason, "UNKNOWN")
-            print(f"  - ❌ Generation blocked: {reason}")
-            print(f"  - Safety ratings: {candidate.safety_ratings}")
-            
-            # If blocked by safety, try with a simpler prompt
-            if candidate.finish_reason == 3:
-                print(f"  - Attempting fallback email generation...")
-                return generate_fallback_email(prospect, hook)
-            
-            return None
-        
-        if not candidate.content.parts:
-            print(f"  - ❌ No content parts in response")
-            return None
-        
-        email_text = response.text.strip()
+
+        if not success:
+            print(f"  - ❌ Email generation failed: {error}")
+            print("  - Attempting fallback email generation...")
+            return generate_fallback_email(prospect, hook)
+
         print("  - ✅ Successfully generated email")
         return email_text
         
+    except ProviderUnavailableError:
+        raise
     except Exception as e:
         print(f"  - ❌ Exception during email generation: {e}")
-        print(f"  - Attempting fallback email generation...")
+        print("  - Attempting fallback email generation...")
         return generate_fallback_email(prospect, hook)
 
 
@@ -578,6 +615,21 @@ def generate_fallback_email(prospect: Dict, hook: str) -> str:
     return f"Subject: {subject}\n\n{body}"
     
 
+def parse_email_content(email_content: str) -> Optional[Tuple[str, str]]:
+    """
+    Splits generated 'Subject: ...' + body text into (subject, body).
+    Tolerates leading chatter, markdown bold and missing blank lines; returns None
+    if no subject line or body can be found.
+    """
+    match = re.search(r'^\W*Subject:\**\s*(.+)$', email_content, re.MULTILINE | re.IGNORECASE)
+    if not match:
+        return None
+    subject = match.group(1).strip().strip('*').strip()
+    body = email_content[match.end():].strip()
+    if not subject or not body:
+        return None
+    return subject, body
+
 def generate_research_question(state: AgentState) -> Dict:
     """
     Generates a CONCISE research question for Tavily.
@@ -593,19 +645,18 @@ def generate_research_question(state: AgentState) -> Dict:
         "Focus on recent news, achievements, or public statements.\n"
         "Output: Single question or search phrase only. No explanation."
     )
+
+    remaining = time_remaining(state)
+    if remaining is not None and remaining < ADVANCED_SEARCH_MIN_SECONDS:
+        question = f"recent news about {prospect_name} at {company_name}"
+        print(f"  - Only {remaining:.0f}s left in budget. Using template query: {question}")
+        return {"research_question": question}
     
-    model = genai.GenerativeModel(
-        'gemini-3-flash-preview',
-        safety_settings={
-            genai.types.HarmCategory.HARM_CATEGORY_HATE_SPEECH: genai.types.HarmBlockThreshold.BLOCK_NONE,
-            genai.types.HarmCategory.HARM_CATEGORY_HARASSMENT: genai.types.HarmBlockThreshold.BLOCK_NONE,
-            genai.types.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: genai.types.HarmBlockThreshold.BLOCK_NONE,
-            genai.types.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: genai.types.HarmBlockThreshold.BLOCK_NONE,
-        }
+    success, question, error = route_generation(
+        "research_question",
+        lambda model_name: safe_gemini_generate(get_clients().gemini(model_name), prompt, "generate_research_question", state)
     )
     
-    success, question, error = safe_gemini_generate(model, prompt, "generate_research_question")
-    
     if not success:
         print(f"  - ❌ Failed: {error}")
         question = f"recent news about {prospect_name} at {company_name}"
@@ -624,18 +675,29 @@ def execute_tavily_research(state: AgentState) -> Dict:
     
     summary = f"Failed to execute Tavily search for query: {query}"
     source_url = "N/A"
+    search_results: List[Dict] = []
 
+    remaining = time_remaining(state)
     if not query or "Error:" in query:
         summary = "Failed to generate a valid research question."
+    elif remaining is not None and remaining < MIN_CALL_TIMEOUT_SECONDS:
+        summary = "Failed to run Tavily search: time budget exhausted."
+        print(f"  - {summary}")
     else:
         try:
-            api_key = os.getenv("TAVILY_API_KEY")
-            if not api_key:
-                raise ValueError("TAVILY_API_KEY not found in environment. Please check your .env file.")
-            
-            tavily_client = TavilyClient(api_key=api_key)
+            tavily_client = get_clients().tavily()
+
+            # 'advanced' depth is noticeably slower; drop to 'basic' when time is short.
+            search_depth = "advanced"
+            if remaining is not None and remaining < ADVANCED_SEARCH_MIN_SECONDS:
+                search_depth = "basic"
+                print(f"  - Only {remaining:.0f}s left in budget. Using basic search depth.")
             
-            response = tavily_client.search(query=query, search_depth="advanced")
+            response = call_provider(
+                "tavily", tavily_client.search,
+                query=query, search_depth=search_depth, timeout=int(call_timeout(state, "tavily")),
+                deadline=state_deadline(state)
+            )
 
             if response and response.get('answer'):
                 summary = response.get('answer')
@@ -643,15 +705,19 @@ def execute_tavily_research(state: AgentState) -> Dict:
                 results = response.get('results')
                 if results and isinstance(results, list) and len(results) > 0:
                     source_url = results[0].get('url', 'N/A')
+                    # In the shape scrape_company_website reads, so it can fetch these pages too.
+                    search_results = [{"link": result.get('url'), "title": result.get('title')} for result in results]
             else:
                 summary = "Tavily search returned no answer."
                 print("  - Tavily search completed but returned no direct answer.")
 
+        except ProviderUnavailableError:
+            raise
         except Exception as e:
             print(f"  - An error occurred during Tavily search: {e}")
             summary = f"An error occurred during Tavily search: {e}"
             
-    return {"research_summary": summary, "source_url": source_url}
+    return {"research_summary": summary, "source_url": source_url, "search_results": search_results}
     
 def synthesize_hook_from_tavily(state: AgentState) -> Dict:
     """
@@ -666,23 +732,15 @@ def synthesize_hook_from_tavily(state: AgentState) -> Dict:
         return {"hook": "No compelling hook found."}
     
     try:
-        model = genai.GenerativeModel(
-            'gemini-3-flash-preview',
-            safety_settings={
-                genai.types.HarmCategory.HARM_CATEGORY_HATE_SPEECH: genai.types.HarmBlockThreshold.BLOCK_NONE,
-                genai.types.HarmCategory.HARM_CATEGORY_HARASSMENT: genai.types.HarmBlockThreshold.BLOCK_NONE,
-                genai.types.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: genai.types.HarmBlockThreshold.BLOCK_NONE,
-                genai.types.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: genai.types.HarmBlockThreshold.BLOCK_NONE,
-            }
-        )
-
         prompt_template = load_prompt("synthesize_hook_from_tavily.md")
         prompt = prompt_template.format(
             prospect_first_name=prospect.get('name', '').split(' ')[0],
             research_summary=research_summary
         )
         
-        success, hook, error = safe_gemini_generate(model, prompt, "synthesize_hook_from_tavily")
+        success, hook, error = route_generation(
+            "hook", lambda model_name: safe_gemini_generate(get_clients().gemini(model_name), prompt, "synthesize_hook_from_tavily", state)
+        )
         
         if not success:
             print(f"  - ❌ Failed: {error}")
@@ -692,6 +750,8 @@ def synthesize_hook_from_tavily(state: AgentState) -> Dict:
         
         return {"hook": hook}
         
+    except ProviderUnavailableError:
+        raise
     except Exception as e:
         print(f"  - ❌ Exception: {e}")
         return {"hook": "No compelling hook found."}
@@ -705,6 +765,10 @@ def should_fallback_to_website(state: AgentState) -> str:
     person_research = state.get('person_research', '')
     
     if "Error" in person_research or "Failed" in person_research or "No direct answer" in person_research or not person_research:
+        remaining = time_remaining(state)
+        if remaining is not None and remaining < WEBSITE_FALLBACK_MIN_SECONDS:
+            print(f"  - Tavily failed or empty, but only {remaining:.0f}s left in budget. Skipping website fallback.")
+            return "continue_to_synthesis"
         print("  - Tavily failed or empty. Falling back to company website scrape.")
         return "fallback_to_website"
     else:
@@ -722,35 +786,87 @@ def synthesize_final_hook(state: AgentState) -> Dict:
     person_research = state.get('person_research', '')
     company_research = state.get('company_research', '') 
     prospect = state.get('prospect', {})
-    hook = "No compelling hook found."
+    hook = NO_HOOK_FOUND
     try:
-        model = genai.GenerativeModel('gemini-3-flash-preview')
         prompt_template = load_prompt("synthesize_hook_from_website.md")
         prompt = prompt_template.format(
             person_research=person_research,
             company_research=company_research,
             prospect_first_name=prospect.get('name', '').split(' ')[0]
         )
-        safety_settings = {'HARM_CATEGORY_HARASSMENT': 'BLOCK_NONE', 'HARM_CATEGORY_HATE_SPEECH': 'BLOCK_NONE', 'HARM_CATEGORY_SEXUALLY_EXPLICIT': 'BLOCK_NONE', 'HARM_CATEGORY_DANGEROUS_CONTENT': 'BLOCK_NONE'}
-        response = model.generate_content(prompt, safety_settings=safety_settings)
-        hook = response.text.strip()
-        print(f"  - Final Synthesized Hook: {hook}")
+        success, text, error = route_generation(
+            "hook", lambda model_name: safe_gemini_generate(get_clients().gemini(model_name), prompt, "synthesize_final_hook", state)
+        )
+        if success:
+            hook = text
+            print(f"  - Final Synthesized Hook: {hook}")
+        else:
+            print(f"  - An error occurred during final synthesis: {error}")
+    except ProviderUnavailableError:
+        raise
     except Exception as e:
         print(f"  - An error occurred during final synthesis: {e}")
     return {"hook": hook}
     
-def build_agent_graph():
+def generate_hook_and_email(state: AgentState) -> Dict:
+    """
+    FINAL Node (fused mode): selects the hook and writes the email in a single
+    structured-JSON call, replacing synthesize_final_hook + generate_email.
+    """
+
+    print("\n--- Node: 4. Generating Hook and Email (fused) ---")
+    prospect = state.get('prospect', {})
+    try:
+        prompt_template = load_prompt("generate_hook_and_email.md")
+        prompt = prompt_template.format(
+            person_research=state.get('person_research', ''),
+            company_research=(state.get('company_research') or '')[:10000],
+            prospect_first_name=prospect.get('name', '').split(' ')[0],
+            prospect_title=prospect.get('title', 'a key leader'),
+            company_name=prospect.get('organization', {}).get('name', ''),
+            your_agency_name=get_settings().agency_name,
+            your_agency_value_prop=get_settings().agency_value_prop
+        )
+        success, text, error = route_generation(
+            "hook_and_email",
+            lambda model_name: safe_gemini_generate(
+                get_clients().gemini(model_name, generation_config=JSON_RESPONSE_CONFIG), prompt, "generate_hook_and_email", state
+            )
+        )
+        parsed = parse_hook_and_email(text) if success else None
+        if not parsed or not parsed['hook']:
+            print(f"  - An error occurred during fused generation: {error or 'unparseable response'}")
+            return {"hook": NO_HOOK_FOUND}
+
+        print(f"  - Final Synthesized Hook: {parsed['hook']}")
+        return {"hook": parsed['hook'], "email_subject": parsed['subject'], "email_body": parsed['body']}
+
+    except ProviderUnavailableError:
+        raise
+    except Exception as e:
+        print(f"  - An error occurred during fused generation: {e}")
+        return {"hook": NO_HOOK_FOUND}
+
+def build_agent_graph(fused: Optional[bool] = None):
     """
     Builds the final, Dual-Pronged agent graph.
+    In fused mode (HYPERION_FUSED_GENERATION) the last node also writes the
+    email, leaving 'email_subject' and 'email_body' in the final state.
     """
 
-    load_dotenv(); genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+    get_clients()  # configures Gemini and warms the provider clients once
+    if fused is None:
+        fused = get_settings().fused_generation
+    final_node = "generate_hook_and_email" if fused else "synthesize_final_hook"
     graph = StateGraph(AgentState)
 
-    graph.add_node("generate_research_question", generate_research_question)
-    graph.add_node("execute_tavily_research", execute_tavily_research)
-    graph.add_node("scrape_company_website", scrape_company_website)
-    graph.add_node("synthesize_final_hook", synthesize_final_hook)
+    graph.add_node("generate_research_question", tracked_node("generate_research_question", generate_research_question))
+    graph.add_node("execute_tavily_research", tracked_node("execute_tavily_research", execute_tavily_research))
+    graph.add_node("scrape_company_website", tracked_node("scrape_company_website", scrape_company_website))
+    if fused:
+        graph.add_node("generate_hook_and_email", tracked_node("generate_hook_and_email", generate_hook_and_email))
+    else:
+        graph.add_node("synthesize_final_hook", tracked_node("synthesize_final_hook", synthesize_final_hook))
 
     graph.set_entry_point("generate_research_question")
     graph.add_edge("generate_research_question", "execute_tavily_research")
@@ -760,11 +876,11 @@ def build_agent_graph():
         should_fallback_to_website,
         {
             "fallback_to_website": "scrape_company_website",
-            "continue_to_synthesis": "synthesize_final_hook"
+            "continue_to_synthesis": final_node
         }
     )
 
-    graph.add_edge("scrape_company_website", "synthesize_final_hook")
-    graph.add_edge("synthesize_final_hook", END)
+    graph.add_edge("scrape_company_website", final_node)
+    graph.add_edge(final_node, END)
 
     return graph.compile()
\ No newline at end of file
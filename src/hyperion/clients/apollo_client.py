@@ -1,18 +1,52 @@
-import os
+import time
+import threading
 import requests
-from dotenv import load_dotenv
-from typing import List, Dict, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from src.hyperion.config import get_settings
+from typing import List, Dict, Optional, Iterator, Tuple
+from src.hyperion.clients.http_session import build_http_session
+
+# Apollo returns at most 100 records per page and 500 pages per search.
+APOLLO_PER_PAGE = 100
+APOLLO_MAX_PAGES = 500
+APOLLO_REQUESTS_PER_MINUTE = 50
+
+class _RateLimiter:
+    """
+    Spaces out calls so no more than `per_minute` start in any minute.
+    """
+
+    def __init__(self, per_minute: int):
+        self.interval = 60.0 / per_minute
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
 
 class ApolloClient:
     """
     A client for interacting with the Apollo.io API.
     """
 
-    def __init__(self):
-        load_dotenv()
-        self.api_key = os.getenv("APOLLO_API_KEY")
+    def __init__(self, requests_per_minute: int = APOLLO_REQUESTS_PER_MINUTE):
+        self.api_key = get_settings().apollo_api_key
         if not self.api_key:
             raise ValueError("ERROR: APOLLO_API_KEY not found in environment variables.")
+
+        self.session = build_http_session()
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "Cache-Control": "no-cache",
+            "X-Api-Key": self.api_key
+        })
+        self.rate_limiter = _RateLimiter(requests_per_minute)
         
     base_url = "https://api.apollo.io/v1/"
 
@@ -26,29 +60,43 @@ class ApolloClient:
         """
         Stage 1 & 2: Sources and retrieves detailed prospect data.
         This function now uses the 'mixed_people/search' endpoint.
+        Only the first page is returned; use iter_people_pages for the full result set.
         """
 
-        url = self.base_url + "mixed_people/search" 
+        data = self.search_people_page(titles, locations, company_employee_counts, page=1)
+        if data is None:
+            return None
+        return data.get('contacts', [])
 
-        headers = {
-            "Content-Type": "application/json",
-            "Cache-Control": "no-cache",
-            "X-Api-Key": self.api_key
-        }
+    def search_people_page(
+        self,
+        titles: List[str],
+        locations: List[str],
+        company_employee_counts: List[str],
+        page: int = 1,
+        per_page: int = APOLLO_PER_PAGE
+    ) -> Optional[Dict]:
+        """
+        Fetches a single page of 'mixed_people/search' results, including the
+        'pagination' block. Returns None on error.
+        """
+
+        url = self.base_url + "mixed_people/search" 
 
         payload = {
             "q_organization_domains": "",
             "person_titles": titles,
             "person_locations": locations,
-            "organization_num_employees_ranges": company_employee_counts
+            "organization_num_employees_ranges": company_employee_counts,
+            "page": page,
+            "per_page": per_page
         }
 
+        self.rate_limiter.wait()
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = self.session.post(url, json=payload)
             response.raise_for_status()
-            data = response.json()
-            
-            return data.get('contacts', [])
+            return response.json()
 
         except requests.exceptions.HTTPError as http_err:
             print(f"HTTP error occurred: {http_err} - Status Code: {response.status_code} - Response: {response.text}")
@@ -56,6 +104,73 @@ class ApolloClient:
             print(f"An error occurred: {err}")
         
         return None
+
+    def enrich_person(self, contact: Dict) -> Optional[Dict]:
+        """
+        Reveals a contact's full details (including email) via 'people/match'.
+        This consumes Apollo credits, so callers should skip contacts they already have.
+        """
+
+        url = self.base_url + "people/match"
+        payload = {"id": contact.get('id'), "reveal_personal_emails": False}
+
+        self.rate_limiter.wait()
+        try:
+            response = self.session.post(url, json=payload)
+            response.raise_for_status()
+            return response.json().get('person')
+
+        except requests.exceptions.HTTPError as http_err:
+            print(f"HTTP error occurred: {http_err} - Status Code: {response.status_code} - Response: {response.text}")
+        except requests.exceptions.RequestException as err:
+            print(f"An error occurred: {err}")
+
+        return None
+
+    def iter_people_pages(
+        self,
+        titles: List[str],
+        locations: List[str],
+        company_employee_counts: List[str],
+        start_page: int = 1,
+        per_page: int = APOLLO_PER_PAGE,
+        prefetch: int = 2
+    ) -> Iterator[Tuple[int, int, List[Dict]]]:
+        """
+        Yields (page, total_pages, contacts) for every page from start_page on,
+        in order. Up to `prefetch` later pages are requested in the background,
+        still subject to the client's rate limit. Iteration stops at the first
+        failed page so the caller can resume from it later.
+        """
+
+        first = self.search_people_page(titles, locations, company_employee_counts, start_page, per_page)
+        if first is None:
+            return
+
+        total_pages = min(first.get('pagination', {}).get('total_pages') or start_page, APOLLO_MAX_PAGES)
+        yield start_page, total_pages, first.get('contacts', [])
+
+        pending = deque()
+        next_page = start_page + 1
+        with ThreadPoolExecutor(max_workers=max(prefetch, 1)) as executor:
+            try:
+                while next_page <= total_pages or pending:
+                    while next_page <= total_pages and len(pending) < max(prefetch, 1):
+                        future = executor.submit(
+                            self.search_people_page, titles, locations, company_employee_counts, next_page, per_page
+                        )
+                        pending.append((next_page, future))
+                        next_page += 1
+
+                    page, future = pending.popleft()
+                    data = future.result()
+                    if data is None:
+                        print(f"  - Stopping at page {page} of {total_pages}; resume from here later.")
+                        return
+                    yield page, total_pages, data.get('contacts', [])
+            finally:
+                for _, future in pending:
+                    future.cancel()
     
     def search_people_mock(
         self,
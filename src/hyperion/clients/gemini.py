@@ -0,0 +1,83 @@
+import google.generativeai as genai
+from typing import Dict, Optional
+from src.hyperion.resilience import call_provider, ProviderUnavailableError
+
+# Outreach copy regularly trips the default filters, so every model runs with them off.
+SAFETY_SETTINGS_OFF = {
+    genai.types.HarmCategory.HARM_CATEGORY_HATE_SPEECH: genai.types.HarmBlockThreshold.BLOCK_NONE,
+    genai.types.HarmCategory.HARM_CATEGORY_HARASSMENT: genai.types.HarmBlockThreshold.BLOCK_NONE,
+    genai.types.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: genai.types.HarmBlockThreshold.BLOCK_NONE,
+    genai.types.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: genai.types.HarmBlockThreshold.BLOCK_NONE,
+}
+
+def gemini_model(model_name: str, generation_config: Optional[Dict] = None) -> genai.GenerativeModel:
+    """Builds a Gemini model with safety filters disabled."""
+    return genai.GenerativeModel(model_name, safety_settings=SAFETY_SETTINGS_OFF, generation_config=generation_config)
+
+# Asks Gemini for a bare JSON response instead of free text.
+JSON_RESPONSE_CONFIG = {"response_mime_type": "application/json"}
+
+def generate_text(model, prompt, context_name="Unknown", request_options: Optional[Dict] = None, deadline: Optional[float] = None):
+    """
+    Calls Gemini through the resilience layer and validates the response.
+    Returns: (success: bool, text: str, error_msg: str)
+    Raises ProviderUnavailableError while Gemini's circuit is open.
+    """
+    try:
+        response = call_provider(
+            "gemini", model.generate_content, prompt,
+            request_options=request_options, deadline=deadline
+        )
+        
+        # Check if response exists
+        if not response:
+            return False, "", f"{context_name}: No response object returned"
+        
+        # Check for prompt feedback (blocked before generation)
+        if hasattr(response, 'prompt_feedback') and response.prompt_feedback:
+            if hasattr(response.prompt_feedback, 'block_reason'):
+                return False, "", f"{context_name}: Prompt blocked - {response.prompt_feedback.block_reason}"
+        
+        # Check if candidates exist
+        if not response.candidates or len(response.candidates) == 0:
+            return False, "", f"{context_name}: No candidates returned"
+        
+        candidate = response.candidates[0]
+        
+        # Check finish reason
+        finish_reasons = {
+            0: "UNSPECIFIED",
+            1: "STOP",  # This is actually success
+            2: "MAX_TOKENS",
+            3: "SAFETY",
+            4: "RECITATION",
+            5: "OTHER"
+        }
+        
+        finish_reason_name = finish_reasons.get(candidate.finish_reason, "UNKNOWN")
+        
+        # If not STOP, something went wrong
+        if candidate.finish_reason != 1:
+            error_details = f"Finish reason: {finish_reason_name}"
+            if hasattr(candidate, 'safety_ratings'):
+                error_details += f", Safety: {candidate.safety_ratings}"
+            return False, "", f"{context_name}: {error_details}"
+        
+        # Check if content parts exist
+        if not candidate.content or not candidate.content.parts:
+            return False, "", f"{context_name}: No content parts (finish_reason was STOP but no content)"
+        
+        # Extract text
+        text = response.text.strip()
+        
+        if not text:
+            return False, "", f"{context_name}: Empty text returned"
+        
+        return True, text, ""
+        
+    except AttributeError as e:
+        return False, "", f"{context_name}: Attribute error - {str(e)}"
+    except ProviderUnavailableError:
+        raise
+    except Exception as e:
+        return False, "", f"{context_name}: Exception - {str(e)}"
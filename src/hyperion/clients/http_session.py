@@ -0,0 +1,57 @@
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Optional
+
+# (connect, read) timeout applied to every request that doesn't set its own.
+DEFAULT_TIMEOUT = (5, 15)
+
+# Connections kept open per host, and the number of distinct hosts cached.
+MAX_CONNECTIONS_PER_HOST = 4
+MAX_POOLED_HOSTS = 32
+
+DEFAULT_HEADERS = {'User-Agent': 'Mozilla/5.0 (compatible; HyperionResearchBot/1.0)'}
+
+_session: Optional[requests.Session] = None
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    An HTTPAdapter that applies a default timeout and blocks when a host's
+    connection pool is exhausted instead of opening extra connections.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        kwargs.setdefault('pool_connections', MAX_POOLED_HOSTS)
+        kwargs.setdefault('pool_maxsize', MAX_CONNECTIONS_PER_HOST)
+        kwargs.setdefault('pool_block', True)
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def build_http_session(timeout=DEFAULT_TIMEOUT) -> requests.Session:
+    """
+    Builds a requests.Session with pooled, per-host limited connections.
+    """
+
+    session = requests.Session()
+    adapter = TimeoutHTTPAdapter(timeout=timeout)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+def get_http_session() -> requests.Session:
+    """
+    Returns the process-wide shared session, creating it on first use.
+    """
+
+    global _session
+    if _session is None:
+        _session = build_http_session()
+    return _session
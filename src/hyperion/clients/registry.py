@@ -0,0 +1,65 @@
+import json
+import threading
+from typing import Dict, Optional
+import google.generativeai as genai
+from firecrawl import FirecrawlApp
+from tavily import TavilyClient
+from src.hyperion.config import Settings, get_settings
+from src.hyperion.clients.gemini import gemini_model
+from src.hyperion.clients.http_session import get_http_session
+
+
+class ClientRegistry:
+    """
+    Holds one long-lived instance of each provider client so nodes reuse the
+    same objects (and their connection pools) instead of rebuilding them on
+    every call. Clients are created lazily on first use.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.lock = threading.Lock()
+        self._models: Dict[str, genai.GenerativeModel] = {}
+        self._firecrawl: Optional[FirecrawlApp] = None
+        self._tavily: Optional[TavilyClient] = None
+        genai.configure(api_key=settings.google_api_key)
+
+    def gemini(self, model_name: str, generation_config: Optional[Dict] = None) -> genai.GenerativeModel:
+        key = model_name + json.dumps(generation_config, sort_keys=True)
+        with self.lock:
+            if key not in self._models:
+                self._models[key] = gemini_model(model_name, generation_config=generation_config)
+            return self._models[key]
+
+    def firecrawl(self) -> FirecrawlApp:
+        with self.lock:
+            if self._firecrawl is None:
+                self._firecrawl = FirecrawlApp(api_key=self.settings.firecrawl_api_key)
+            return self._firecrawl
+
+    def tavily(self) -> TavilyClient:
+        if not self.settings.tavily_api_key:
+            raise ValueError("TAVILY_API_KEY not found in environment. Please check your .env file.")
+        with self.lock:
+            if self._tavily is None:
+                self._tavily = TavilyClient(api_key=self.settings.tavily_api_key)
+            return self._tavily
+
+    def http(self):
+        return get_http_session()
+
+
+_registry: Optional[ClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_clients() -> ClientRegistry:
+    """
+    Returns the process-wide client registry, creating it on first use.
+    """
+
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ClientRegistry(get_settings())
+        return _registry
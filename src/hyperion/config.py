@@ -1,6 +1,89 @@
 from pathlib import Path
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from dotenv import load_dotenv
 import os
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 
-DATABASE_FILE = os.path.join(PROJECT_ROOT, 'hyperion.db')
\ No newline at end of file
+DATABASE_FILE = os.path.join(PROJECT_ROOT, 'hyperion.db')
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").lower() in ("1", "true", "yes")
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    All environment-driven configuration, read once at process start.
+    """
+
+    google_api_key: Optional[str]
+    firecrawl_api_key: Optional[str]
+    tavily_api_key: Optional[str]
+    serper_api_key: Optional[str]
+    apollo_api_key: Optional[str]
+    sender_email: Optional[str]
+    sender_app_password: Optional[str]
+    agency_name: str
+    agency_value_prop: str
+    fused_generation: bool
+    pdf_extraction_workers: int
+    mime_parsing_workers: int
+    scheduler_notify_port: int
+    imap_host: str
+    imap_port: int
+    imap_ssl: bool
+    default_timezone: str
+    send_window_start_hour: int
+    send_window_end_hour: int
+    profile: bool
+    profile_dir: str
+    campaign_budget_usd: Optional[float]
+
+    def __post_init__(self):
+        # Every prospect without an inferable zone is scheduled in this one, so fail at startup, not mid-campaign.
+        try:
+            ZoneInfo(self.default_timezone)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(
+                f"DEFAULT_TIMEZONE '{self.default_timezone}' could not be loaded. "
+                "Use an IANA name such as America/New_York, and install tzdata where the OS has no zone database."
+            ) from None
+
+    @classmethod
+    def from_env(cls) -> 'Settings':
+        return cls(
+            google_api_key=os.getenv("GOOGLE_API_KEY"),
+            firecrawl_api_key=os.getenv("FIRECRAWL_API_KEY"),
+            tavily_api_key=os.getenv("TAVILY_API_KEY"),
+            serper_api_key=os.getenv("SERPER_API_KEY"),
+            apollo_api_key=os.getenv("APOLLO_API_KEY"),
+            sender_email=os.getenv("SENDER_EMAIL"),
+            sender_app_password=os.getenv("SENDER_APP_PASSWORD"),
+            agency_name=os.getenv("AGENCY_NAME", "Get AI Simplified"),
+            agency_value_prop=os.getenv("AGENCY_VALUE_PROP", "We build autonomous AI agents"),
+            fused_generation=_env_flag("HYPERION_FUSED_GENERATION"),
+            pdf_extraction_workers=int(os.getenv("PDF_EXTRACTION_WORKERS", "0")),
+            mime_parsing_workers=int(os.getenv("MIME_PARSING_WORKERS", "0")),
+            scheduler_notify_port=int(os.getenv("SCHEDULER_NOTIFY_PORT", "47813")),
+            imap_host=os.getenv("IMAP_HOST", "imap.gmail.com"),
+            imap_port=int(os.getenv("IMAP_PORT", "993")),
+            imap_ssl=os.getenv("IMAP_SSL", "true").lower() in ("1", "true", "yes"),
+            default_timezone=os.getenv("DEFAULT_TIMEZONE", "America/New_York"),
+            send_window_start_hour=int(os.getenv("SEND_WINDOW_START_HOUR", "9")),
+            send_window_end_hour=int(os.getenv("SEND_WINDOW_END_HOUR", "17")),
+            profile=_env_flag("HYPERION_PROFILE"),
+            profile_dir=os.getenv("HYPERION_PROFILE_DIR", os.path.join(PROJECT_ROOT, 'profiles')),
+            campaign_budget_usd=float(os.environ["CAMPAIGN_BUDGET_USD"]) if os.getenv("CAMPAIGN_BUDGET_USD") else None,
+        )
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Loads `.env` and the environment on first call; later calls reuse the result.
+    """
+
+    load_dotenv(os.path.join(PROJECT_ROOT, '.env'))
+    return Settings.from_env()
@@ -1,8 +1,328 @@
 import sqlite3
-from typing import Dict, Optional
+import atexit
+import itertools
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
 from src.hyperion.config import DATABASE_FILE
+from src.hyperion.notifications import notify_scheduler
+from src.hyperion.send_windows import infer_timezone, schedule_send_times, in_send_window
+from src.hyperion.normalization import normalize_email, normalize_domain
+from src.hyperion.models import Prospect, SequenceAction, PROSPECT_COLUMNS, SEQUENCE_ACTION_COLUMNS
+
+WRITE_BEHIND_MAX_PENDING = 100
+WRITE_BEHIND_MAX_DELAY_SECONDS = 2.0
+
+class WriteBehindQueue:
+    """
+    Buffers state UPDATEs and writes them in a single transaction once
+    `max_pending` writes are waiting or the oldest is `max_delay` seconds old.
+
+    Writes to the same row coalesce (the latest wins) and keep their relative
+    order. An entry may hold several statements that must land together; it
+    is always flushed whole. Readers of sequence state call flush() first so they never see stale
+    rows, and the queue is flushed at interpreter exit.
+    """
+
+    def __init__(self, max_pending: int = WRITE_BEHIND_MAX_PENDING, max_delay: float = WRITE_BEHIND_MAX_DELAY_SECONDS):
+        self.max_pending = max_pending
+        self.max_delay = max_delay
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.pending: Dict[Tuple, List[Tuple[str, tuple]]] = {}
+        self.timer: Optional[threading.Timer] = None
+        self.stats = {"queued": 0, "coalesced": 0, "flushes": 0, "rows_written": 0}
+
+    def enqueue(self, key: Tuple, sql: str, params: tuple):
+        self.enqueue_statements(key, [(sql, params)])
+
+    def enqueue_statements(self, key: Tuple, statements: List[Tuple[str, tuple]]):
+        with self.lock:
+            if self.pending.pop(key, None) is not None:
+                self.stats["coalesced"] += 1
+            self.pending[key] = statements
+            self.stats["queued"] += 1
+            full = len(self.pending) >= self.max_pending
+            if not full and self.timer is None:
+                self.timer = threading.Timer(self.max_delay, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+        if full:
+            self.flush()
+
+    def flush(self, extra: Optional[List[Tuple[str, tuple]]] = None):
+        """
+        Writes everything pending, plus any `extra` statements, in one transaction.
+        Returns once the transaction is committed.
+        """
+
+        with self.flush_lock:
+            with self.lock:
+                batch = list(self.pending.items())
+                self.pending.clear()
+                if self.timer is not None:
+                    self.timer.cancel()
+                    self.timer = None
+            statements = [statement for _, entry in batch for statement in entry] + (extra or [])
+            if not statements:
+                return
+
+            conn = sqlite3.connect(DATABASE_FILE)
+            try:
+                with conn:
+                    for sql, params in statements:
+                        conn.execute(sql, params)
+            except sqlite3.Error:
+                # Put the buffered writes back (ahead of anything queued since) so they aren't lost.
+                with self.lock:
+                    self.pending = {**dict(batch), **self.pending}
+                raise
+            finally:
+                conn.close()
+            self.stats["flushes"] += 1
+            self.stats["rows_written"] += len(statements)
+
+write_behind = WriteBehindQueue()
+
+def flush_pending_writes():
+    """
+    Synchronously commits all buffered state updates.
+    """
+
+    write_behind.flush()
+
+atexit.register(flush_pending_writes)
+
+EVENT_TYPES = {"enrolled", "researched", "sent", "replied", "failed"}
+
+# Resolves a prospect's most recent campaign when the caller doesn't know it (e.g. replies).
+_SEQUENCE_FOR_PROSPECT_SQL = (
+    "COALESCE(?, (SELECT sequence_id FROM prospect_sequences WHERE prospect_id = ? "
+    "ORDER BY prospect_sequence_id DESC LIMIT 1), '')"
+)
+INSERT_EVENT_SQL = f'''
+    INSERT INTO campaign_events (occurred_at, sequence_id, prospect_id, event_type, step, detail)
+    VALUES (?, {_SEQUENCE_FOR_PROSPECT_SQL}, ?, ?, ?, ?)
+'''
+BUMP_COUNTER_SQL = f'''
+    INSERT INTO campaign_counters (sequence_id, day, metric, count)
+    VALUES ({_SEQUENCE_FOR_PROSPECT_SQL}, ?, ?, 1)
+    ON CONFLICT (sequence_id, day, metric) DO UPDATE SET count = count + 1
+'''
+
+_event_keys = itertools.count()
+
+def _event_statements(event_type: str, prospect_id: Optional[str], sequence_id: Optional[str],
+                      step: Optional[int], detail: Optional[str]) -> List[Tuple[str, tuple]]:
+    if event_type not in EVENT_TYPES:
+        raise ValueError(f"Unknown campaign event type '{event_type}'")
+    now_utc = datetime.now(timezone.utc)
+    day = now_utc.date().isoformat()
+    statements = [
+        (INSERT_EVENT_SQL, (now_utc, sequence_id, prospect_id, prospect_id, event_type, step, detail)),
+        (BUMP_COUNTER_SQL, (sequence_id, prospect_id, day, event_type)),
+    ]
+    if event_type == "replied" and detail:
+        # Per-intent reply counts, e.g. 'replied:POSITIVE_INTEREST'.
+        statements.append((BUMP_COUNTER_SQL, (sequence_id, prospect_id, day, f"replied:{detail}")))
+    return statements
+
+def record_event(event_type: str, prospect_id: Optional[str], sequence_id: Optional[str] = None,
+                 step: Optional[int] = None, detail: Optional[str] = None):
+    """
+    Appends a campaign event and bumps its daily counters. Goes through the
+    write-behind queue, so a 'sent' event recorded just before
+    update_sequence_after_send commits in the same transaction as the send.
+    When sequence_id is None the prospect's latest enrollment is used.
+    The event and its counters are one queue entry, so they always commit together.
+    """
+
+    write_behind.enqueue_statements(
+        ('event', next(_event_keys)), _event_statements(event_type, prospect_id, sequence_id, step, detail)
+    )
+
+def get_campaign_counters(since_day: Optional[str] = None, sequence_id: Optional[str] = None) -> Dict[str, int]:
+    """
+    Sums the daily counters per metric from `since_day` (YYYY-MM-DD, UTC) onwards,
+    optionally for one campaign. Reads O(days x metrics) rows.
+    """
+
+    flush_pending_writes()
+    conn = sqlite3.connect(DATABASE_FILE)
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT metric, SUM(count) FROM campaign_counters
+        WHERE day >= ? AND (? IS NULL OR sequence_id = ?)
+        GROUP BY metric
+        """,
+        (since_day or '', sequence_id, sequence_id)
+    )
+    counters = {metric: total for metric, total in cursor.fetchall()}
+    conn.close()
+    return counters
+
+INSERT_USAGE_SQL = f'''
+    INSERT INTO usage_records (recorded_at, sequence_id, prospect_id, node, provider, model,
+                               requests, input_tokens, output_tokens, cost_usd)
+    VALUES (?, {_SEQUENCE_FOR_PROSPECT_SQL}, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+BUMP_SPEND_SQL = f'''
+    INSERT INTO campaign_spend (sequence_id, cost_usd)
+    VALUES ({_SEQUENCE_FOR_PROSPECT_SQL}, ?)
+    ON CONFLICT (sequence_id) DO UPDATE SET cost_usd = cost_usd + excluded.cost_usd
+'''
+
+def record_usage(provider: str, model: Optional[str], node: str, prospect_id: Optional[str],
+                 sequence_id: Optional[str], requests: int, input_tokens: int, output_tokens: int, cost_usd: float):
+    """
+    Appends one external call's usage through the write-behind queue, together
+    with the bump to its campaign's running spend.
+    When sequence_id is None the prospect's latest enrollment is used.
+    """
+
+    params = (datetime.now(timezone.utc), sequence_id, prospect_id, prospect_id, node, provider, model or '',
+              requests, input_tokens, output_tokens, cost_usd)
+    write_behind.enqueue_statements(('usage', next(_event_keys)), [
+        (INSERT_USAGE_SQL, params),
+        (BUMP_SPEND_SQL, (sequence_id, prospect_id, cost_usd)),
+    ])
+
+def get_campaign_spend(sequence_id: str) -> float:
+    """
+    Total estimated cost (USD) recorded against a campaign, from its running
+    counter. Doesn't flush: usage still in the write-behind queue (at most
+    WRITE_BEHIND_MAX_DELAY_SECONDS old) isn't counted yet.
+    """
+
+    conn = sqlite3.connect(DATABASE_FILE)
+    cursor = conn.cursor()
+    cursor.execute("SELECT cost_usd FROM campaign_spend WHERE sequence_id = ?", (sequence_id,))
+    row = cursor.fetchone()
+    conn.close()
+    return row[0] if row else 0.0
+
+def get_campaign_budget(sequence_id: str) -> Optional[float]:
+    """
+    The campaign's budget from campaign_budgets, or None if it has none.
+    """
+
+    conn = sqlite3.connect(DATABASE_FILE)
+    cursor = conn.cursor()
+    cursor.execute("SELECT budget_usd FROM campaign_budgets WHERE sequence_id = ?", (sequence_id,))
+    row = cursor.fetchone()
+    conn.close()
+    return row[0] if row else None
+
+def set_campaign_budget(sequence_id: str, budget_usd: Optional[float]):
+    """
+    Sets a campaign's budget in USD; None removes it.
+    """
+
+    conn = sqlite3.connect(DATABASE_FILE)
+    with conn:
+        if budget_usd is None:
+            conn.execute("DELETE FROM campaign_budgets WHERE sequence_id = ?", (sequence_id,))
+        else:
+            conn.execute(
+                """
+                INSERT INTO campaign_budgets (sequence_id, budget_usd) VALUES (?, ?)
+                ON CONFLICT (sequence_id) DO UPDATE SET budget_usd = excluded.budget_usd
+                """,
+                (sequence_id, budget_usd)
+            )
+    conn.close()
+
+def get_usage_summary(since_day: Optional[str] = None, sequence_id: Optional[str] = None) -> List[Dict]:
+    """
+    Usage totals per campaign, provider, model and graph node from `since_day`
+    (YYYY-MM-DD, UTC) onwards, most expensive first.
+    """
+
+    flush_pending_writes()
+    conn = sqlite3.connect(DATABASE_FILE)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT sequence_id, provider, model, node, SUM(requests) AS requests,
+               SUM(input_tokens) AS input_tokens, SUM(output_tokens) AS output_tokens,
+               SUM(cost_usd) AS cost_usd
+        FROM usage_records
+        WHERE recorded_at >= ? AND (? IS NULL OR sequence_id = ?)
+        GROUP BY sequence_id, provider, model, node
+        ORDER BY cost_usd DESC
+        """,
+        (since_day or '', sequence_id, sequence_id)
+    )
+    rows = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return rows
+
+def record_sent_email(message_id: str, prospect_id: str, prospect_sequence_id: Optional[int],
+                      sequence_id: Optional[str], step: Optional[int]):
+    """
+    Remembers the Message-ID of an outreach email so replies can be matched to
+    it by their In-Reply-To/References headers. Goes through the write-behind queue.
+    """
+
+    write_behind.enqueue(
+        ('sent_email', message_id),
+        '''
+        INSERT OR IGNORE INTO sent_emails (message_id, prospect_id, prospect_sequence_id, sequence_id, step, sent_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''',
+        (message_id, prospect_id, prospect_sequence_id, sequence_id, step, datetime.now(timezone.utc))
+    )
+
+def get_prospect_by_message_ids(message_ids: List[str]) -> Optional[Prospect]:
+    """
+    Finds the prospect one of our sent emails was addressed to, given the
+    Message-IDs a reply refers to. Each id is a primary-key lookup.
+    """
+
+    if not message_ids:
+        return None
+    flush_pending_writes()
+    conn = sqlite3.connect(DATABASE_FILE)
+    cursor = conn.cursor()
+    placeholders = ", ".join("?" for _ in message_ids)
+    columns = ", ".join(f"p.{column.strip()}" for column in PROSPECT_COLUMNS.split(","))
+    cursor.execute(
+        f"""
+        SELECT {columns} FROM sent_emails s JOIN prospects p ON p.prospect_id = s.prospect_id
+        WHERE s.message_id IN ({placeholders})
+        ORDER BY s.sent_at DESC LIMIT 1
+        """,
+        list(message_ids)
+    )
+    row = cursor.fetchone()
+    conn.close()
+    return Prospect(*row) if row else None
+
+def get_sent_message_ids(prospect_sequence_id: int) -> List[str]:
+    """
+    The Message-IDs of the emails already sent in an enrollment, oldest first,
+    for threading a follow-up onto them.
+    """
+
+    flush_pending_writes()
+    conn = sqlite3.connect(DATABASE_FILE)
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT message_id FROM sent_emails WHERE prospect_sequence_id = ? ORDER BY sent_at",
+        (prospect_sequence_id,)
+    )
+    message_ids = [row[0] for row in cursor.fetchall()]
+    conn.close()
+    return message_ids
+
+DEFAULT_SEQUENCE_STEPS = [
+    ('seq_standard_01', 1, 'research', 3, 'always', 'generate_email'),
+    ('seq_standard_01', 2, 'follow_up', 4, 'always', 'generate_follow_up'),
+    ('seq_standard_01', 3, 'follow_up', 0, 'always', 'generate_follow_up'),
+]
 
 def initialize_database():
     """
@@ -15,10 +335,20 @@ def initialize_database():
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS prospects (
             prospect_id TEXT PRIMARY KEY, full_name TEXT, email TEXT UNIQUE,
-            linkedin_url TEXT, title TEXT, company_name TEXT, company_domain TEXT
+            linkedin_url TEXT, title TEXT, company_name TEXT, company_domain TEXT,
+            timezone TEXT
         )
     ''')
 
+    # Databases created before send windows existed lack the timezone column.
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(prospects)")}
+    if 'timezone' not in columns:
+        cursor.execute("ALTER TABLE prospects ADD COLUMN timezone TEXT")
+    # Rows imported before emails were normalized kept their raw case, which
+    # lookups by normalized email would miss. OR IGNORE leaves any row whose
+    # lowercased email already exists alone rather than failing startup.
+    cursor.execute("UPDATE OR IGNORE prospects SET email = lower(trim(email)) WHERE email != lower(trim(email))")
+
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS prospect_sequences (
             prospect_sequence_id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -30,60 +360,237 @@ def initialize_database():
         )
     ''')
 
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_prospect_sequences_due
+        ON prospect_sequences (status, next_action_timestamp)
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sourcing_cursors (
+            cursor_name TEXT PRIMARY KEY, next_page INTEGER NOT NULL,
+            total_pages INTEGER, updated_at TIMESTAMP
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sequence_steps (
+            sequence_id TEXT NOT NULL, step_number INTEGER NOT NULL,
+            kind TEXT NOT NULL, wait_days REAL NOT NULL DEFAULT 0,
+            condition TEXT NOT NULL DEFAULT 'always', template TEXT NOT NULL,
+            PRIMARY KEY (sequence_id, step_number)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS prospect_research (
+            prospect_id TEXT PRIMARY KEY, hook TEXT, source_url TEXT,
+            research_summary TEXT, email_subject TEXT, email_body TEXT,
+            created_at TIMESTAMP,
+            FOREIGN KEY (prospect_id) REFERENCES prospects (prospect_id)
+        )
+    ''')
+
+    # The default sequence: researched first touch, then two follow-ups drafted
+    # from the stored research. Existing (possibly edited) rows are left alone.
+    cursor.executemany('''
+        INSERT OR IGNORE INTO sequence_steps (sequence_id, step_number, kind, wait_days, condition, template)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', DEFAULT_SEQUENCE_STEPS)
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS campaign_events (
+            event_id INTEGER PRIMARY KEY AUTOINCREMENT, occurred_at TIMESTAMP NOT NULL,
+            sequence_id TEXT NOT NULL, prospect_id TEXT, event_type TEXT NOT NULL,
+            step INTEGER, detail TEXT
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_campaign_events_prospect
+        ON campaign_events (prospect_id, occurred_at)
+    ''')
+
+    # One row per campaign, UTC day and metric, bumped in the same transaction
+    # as the event so funnel queries never have to scan campaign_events.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS campaign_counters (
+            sequence_id TEXT NOT NULL, day TEXT NOT NULL, metric TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (sequence_id, day, metric)
+        )
+    ''')
+
+    # One row per external call (LLM, search or scrape) with its estimated cost.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS usage_records (
+            usage_id INTEGER PRIMARY KEY AUTOINCREMENT, recorded_at TIMESTAMP NOT NULL,
+            sequence_id TEXT NOT NULL, prospect_id TEXT, node TEXT NOT NULL,
+            provider TEXT NOT NULL, model TEXT NOT NULL, requests INTEGER NOT NULL,
+            input_tokens INTEGER NOT NULL, output_tokens INTEGER NOT NULL, cost_usd REAL NOT NULL
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_usage_records_sequence
+        ON usage_records (sequence_id, recorded_at)
+    ''')
+
+    # Running spend per campaign, bumped in the same transaction as each usage
+    # record so budget checks read one row instead of summing usage_records.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS campaign_spend (
+            sequence_id TEXT PRIMARY KEY, cost_usd REAL NOT NULL DEFAULT 0
+        )
+    ''')
+    # Seeds campaigns whose usage was recorded before the table existed.
+    cursor.execute('''
+        INSERT OR IGNORE INTO campaign_spend (sequence_id, cost_usd)
+        SELECT sequence_id, SUM(cost_usd) FROM usage_records GROUP BY sequence_id
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS campaign_budgets (
+            sequence_id TEXT PRIMARY KEY, budget_usd REAL NOT NULL
+        )
+    ''')
+
+    # Message-IDs of the emails we sent; the primary key is the reply-matching index.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sent_emails (
+            message_id TEXT PRIMARY KEY, prospect_id TEXT NOT NULL,
+            prospect_sequence_id INTEGER, sequence_id TEXT, step INTEGER,
+            sent_at TIMESTAMP NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_sent_emails_sequence
+        ON sent_emails (prospect_sequence_id, sent_at)
+    ''')
+
     print("-> `initialize_database`: Tables created or verified.")
 
     conn.commit()
     conn.close()
 
-def add_prospect(prospect: Dict):
+INSERT_PROSPECT_SQL = ''' INSERT OR IGNORE INTO prospects (prospect_id, full_name, email, linkedin_url, title, company_name, company_domain, timezone)
+              VALUES (?, ?, ?, ?, ?, ?, ?, ?) '''
+
+def _prospect_row(prospect) -> tuple:
+    if isinstance(prospect, Prospect):
+        return (
+            prospect.prospect_id, prospect.full_name, normalize_email(prospect.email) if prospect.email else prospect.email,
+            prospect.linkedin_url, prospect.title, prospect.company_name,
+            normalize_domain(prospect.company_domain) if prospect.company_domain else prospect.company_domain,
+            prospect.timezone or infer_timezone(domain=prospect.company_domain)
+        )
+    organization = prospect.get('organization') or {}
+    email = prospect.get('email', '')
+    domain = organization.get('primary_domain', '')
+    return (
+        prospect.get('id', ''), prospect.get('name', ''), normalize_email(email) if email else email,
+        prospect.get('linkedin_url', ''), prospect.get('title', ''),
+        organization.get('name', ''), normalize_domain(domain) if domain else domain,
+        infer_timezone(prospect.get('time_zone'), prospect.get('country'), prospect.get('state'),
+                       organization.get('primary_domain'))
+    )
+
+def _prospect_timezones(cursor, prospect_ids: List[str]) -> Dict[str, str]:
+    """
+    Returns prospect_id -> timezone, inferring it from the company domain for
+    rows stored before the timezone column existed.
+    """
+
+    zones = {}
+    for start in range(0, len(prospect_ids), 500):
+        chunk = prospect_ids[start:start + 500]
+        placeholders = ", ".join("?" * len(chunk))
+        cursor.execute(
+            f"SELECT prospect_id, timezone, company_domain FROM prospects WHERE prospect_id IN ({placeholders})", chunk
+        )
+        for prospect_id, zone, company_domain in cursor.fetchall():
+            zones[prospect_id] = zone or infer_timezone(domain=company_domain)
+    return zones
+
+def add_prospect(prospect):
     """
     Adds a new prospect to the database, ignoring if email already exists.
+    Accepts a Prospect or the agent/Apollo dict format.
     """
 
     conn = sqlite3.connect(DATABASE_FILE)
     cursor = conn.cursor()
 
-    sql = ''' INSERT OR IGNORE INTO prospects (prospect_id, full_name, email, linkedin_url, title, company_name, company_domain)
-              VALUES (?, ?, ?, ?, ?, ?, ?) '''
-    
-    cursor.execute(sql, (
-        prospect.get('id', ''), prospect.get('name', ''), prospect.get('email', ''),
-        prospect.get('linkedin_url', ''), prospect.get('title', ''),
-        prospect.get('organization', {}).get('name', ''),
-        prospect.get('organization', {}).get('primary_domain', '')
-    ))
+    cursor.execute(INSERT_PROSPECT_SQL, _prospect_row(prospect))
 
     conn.commit()
     conn.close()
 
-def get_prospect_by_email(email: str) -> Optional[Dict]:
+def add_prospects(prospects: List) -> int:
     """
-    Reads a prospect's data from the database using their email.
+    Adds a batch of prospects in a single transaction, ignoring existing emails.
+    Returns the number of rows actually inserted.
     """
 
     conn = sqlite3.connect(DATABASE_FILE)
+    cursor = conn.cursor()
 
-    conn.row_factory = sqlite3.Row
+    before = conn.total_changes
+    cursor.executemany(INSERT_PROSPECT_SQL, [_prospect_row(prospect) for prospect in prospects])
+    inserted = conn.total_changes - before
+
+    conn.commit()
+    conn.close()
+    return inserted
+
+def iter_prospect_keys():
+    """
+    Yields (prospect_id, email, company_domain) for every prospect without
+    materializing the whole table.
+    """
+
+    conn = sqlite3.connect(DATABASE_FILE)
+    try:
+        yield from conn.execute("SELECT prospect_id, email, company_domain FROM prospects")
+    finally:
+        conn.close()
+
+def get_prospect_by_email(email: str) -> Optional[Prospect]:
+    """
+    Reads a prospect's data from the database using their email.
+    """
+
+    conn = sqlite3.connect(DATABASE_FILE)
     cursor = conn.cursor()
 
-    sql_command = "SELECT * FROM prospects WHERE email = ?"
+    sql_command = f"SELECT {PROSPECT_COLUMNS} FROM prospects WHERE email = ?"
 
-    cursor.execute(sql_command, (email,))
+    cursor.execute(sql_command, (normalize_email(email),))
 
     prospect_row = cursor.fetchone()
 
     conn.close()
 
-    if prospect_row:
-        return dict(prospect_row)
-    return None
+    return Prospect(*prospect_row) if prospect_row else None
 
 def enroll_prospect_in_sequence(prospect_id: str, sequence_id: str):
     """
     Enrolls a prospect into a sequence, setting them up for Step 1.
-    Sets the next action to the current time to be sent immediately.
+    The first action is scheduled for the next slot in the prospect's local send window.
     """
 
+    enroll_prospects_in_sequence([prospect_id], sequence_id)
+
+def enroll_prospects_in_sequence(prospect_ids: List[str], sequence_id: str) -> int:
+    """
+    Enrolls many prospects at once, in one transaction with their 'enrolled'
+    events. Send times are computed for the whole set together so they're
+    spread evenly across each timezone's send windows.
+    Returns the number of new enrollments.
+    """
+
+    if not prospect_ids:
+        return 0
+
     conn = sqlite3.connect(DATABASE_FILE)
     cursor = conn.cursor()
 
@@ -93,59 +600,133 @@ def enroll_prospect_in_sequence(prospect_id: str, sequence_id: str):
         ) VALUES (?, ?, ?, ?, ?)
     '''
 
+    # Only prospects not already in the sequence get a send slot and an 'enrolled' event.
+    new_ids = list(dict.fromkeys(prospect_ids))
+    for start in range(0, len(new_ids), 500):
+        chunk = new_ids[start:start + 500]
+        cursor.execute(
+            f"SELECT prospect_id FROM prospect_sequences WHERE sequence_id = ? "
+            f"AND prospect_id IN ({', '.join('?' * len(chunk))})", [sequence_id, *chunk]
+        )
+        enrolled_already = {row[0] for row in cursor.fetchall()}
+        new_ids[start:start + 500] = [prospect_id for prospect_id in chunk if prospect_id not in enrolled_already]
+
     now_utc = datetime.now(timezone.utc)
+    zones = _prospect_timezones(cursor, new_ids)
+    default_zone = infer_timezone()
+    send_times = schedule_send_times([(zones.get(prospect_id, default_zone), now_utc) for prospect_id in new_ids])
 
     initial_status = 'active'
     initial_step = 1
 
-    cursor.execute(sql_command, (
-        prospect_id,
-        sequence_id,
-        initial_status,
-        initial_step,
-        now_utc
-    ))
+    cursor.executemany(sql_command, [
+        (prospect_id, sequence_id, initial_status, initial_step, send_time)
+        for prospect_id, send_time in zip(new_ids, send_times)
+    ])
+    enrolled = len(new_ids)
+    events: Dict[str, List[tuple]] = {}
+    for prospect_id in new_ids:
+        for sql, params in _event_statements('enrolled', prospect_id, sequence_id, initial_step, None):
+            events.setdefault(sql, []).append(params)
+    for sql, params_list in events.items():
+        cursor.executemany(sql, params_list)
 
     conn.commit()
     conn.close()
+    notify_scheduler()
 
-    print(f" - Enrolled propsect {prospect_id} in sequence {sequence_id}.")
+    print(f" - Enrolled {enrolled} prospect(s) in sequence {sequence_id}.")
+    return enrolled
 
-def get_due_actions() -> list:
+def get_due_actions() -> List[SequenceAction]:
     """
     Reads the database to find all prospects who are due for their next sequence step.
+
+    Windows are applied when an action is scheduled, but an overdue backlog or a
+    deferral can come due at night. Due actions whose prospect is outside their
+    local send window right now are moved to the next window slot instead of
+    being returned.
     """
 
+    flush_pending_writes()
     conn = sqlite3.connect(DATABASE_FILE)
-    conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
 
     now_utc = datetime.now(timezone.utc)
 
-    sql_command = """
-        SELECT * FROM prospect_sequences
+    sql_command = f"""
+        SELECT {SEQUENCE_ACTION_COLUMNS} FROM prospect_sequences
         WHERE status = 'active' AND next_action_timestamp <= ?
     """
 
     cursor.execute(sql_command, (now_utc,))
 
-    due_actions = [dict(row) for row in cursor.fetchall()]
+    due_actions = [SequenceAction(*row) for row in cursor.fetchall()]
+
+    zones = _prospect_timezones(cursor, list({action.prospect_id for action in due_actions}))
+    default_zone = infer_timezone()
+    outside = [action for action in due_actions if not in_send_window(now_utc, zones.get(action.prospect_id, default_zone))]
+    if outside:
+        send_times = schedule_send_times([(zones.get(action.prospect_id, default_zone), now_utc) for action in outside])
+        cursor.executemany(
+            "UPDATE prospect_sequences SET next_action_timestamp = ? WHERE prospect_sequence_id = ?",
+            [(send_time, action.prospect_sequence_id) for action, send_time in zip(outside, send_times)]
+        )
+        conn.commit()
+        print(f"  - Moved {len(outside)} due action(s) outside their prospect's send window to the next window.")
+        outside_ids = {action.prospect_sequence_id for action in outside}
+        due_actions = [action for action in due_actions if action.prospect_sequence_id not in outside_ids]
 
     conn.close()
     return due_actions
 
-def update_sequence_after_send(prospect_sequence_id: int, current_step: int, wait_days_for_next_step: int):
+def get_next_action_time(exclude_ids: Iterable[int] = ()) -> Optional[datetime]:
     """
-    Updates a prospect's sequence state after an email is sent.
-    Increments the step and schedules the next action.
+    Returns the earliest next_action_timestamp among active sequences, or None.
+    Sequences in `exclude_ids` (e.g. actions already being worked on) are ignored.
     """
 
+    exclude_ids = list(exclude_ids)
+    flush_pending_writes()
     conn = sqlite3.connect(DATABASE_FILE)
     cursor = conn.cursor()
+    sql = "SELECT MIN(next_action_timestamp) FROM prospect_sequences WHERE status = 'active'"
+    if exclude_ids:
+        sql += f" AND prospect_sequence_id NOT IN ({', '.join('?' * len(exclude_ids))})"
+    cursor.execute(sql, exclude_ids)
+    earliest = cursor.fetchone()[0]
+    conn.close()
 
-    next_step = current_step + 1
+    if earliest is None:
+        return None
+    return datetime.fromisoformat(earliest)
+
+def _sequence_timezone(prospect_sequence_id: int) -> str:
+    """
+    The timezone of the prospect enrolled in a sequence.
+    """
 
-    next_action_time = datetime.now(timezone.utc) + timedelta(days=wait_days_for_next_step)
+    conn = sqlite3.connect(DATABASE_FILE)
+    cursor = conn.cursor()
+    cursor.execute("SELECT prospect_id FROM prospect_sequences WHERE prospect_sequence_id = ?", (prospect_sequence_id,))
+    row = cursor.fetchone()
+    zone = _prospect_timezones(cursor, [row[0]]).get(row[0]) if row else None
+    conn.close()
+    return zone or infer_timezone()
+
+def update_sequence_after_send(prospect_sequence_id: int, next_step: int, wait_days_for_next_step: float):
+    """
+    Updates a prospect's sequence state after an email is sent.
+    Moves it to `next_step` and schedules that step for the prospect's
+    first send-window slot after the wait.
+
+    Unlike the other state updates this is written synchronously (together with
+    anything buffered): once it returns, the send is on disk and a crash can't
+    cause the step to be sent twice.
+    """
+
+    earliest = datetime.now(timezone.utc) + timedelta(days=wait_days_for_next_step)
+    next_action_time = schedule_send_times([(_sequence_timezone(prospect_sequence_id), earliest)])[0]
 
     sql_command = """
         UPDATE prospect_sequences
@@ -153,36 +734,50 @@ def update_sequence_after_send(prospect_sequence_id: int, current_step: int, wai
         WHERE prospect_sequence_id = ?
     """
 
-    cursor.execute(sql_command, (
-        next_step,
-        next_action_time,
-        prospect_sequence_id
-    ))
+    write_behind.flush([(sql_command, (next_step, next_action_time, prospect_sequence_id))])
+    print(f"- Updated prospect_sequence_id {prospect_sequence_id} to Step {next_step}. Next action at {next_action_time:%Y-%m-%d %H:%M} UTC.")
 
-    conn.commit()
-    conn.close()
-    print(f"- Updated prospect_sequence_id {prospect_sequence_id} to Step {next_step}. Next action in {wait_days_for_next_step} days.")
+def defer_sequence_action(prospect_sequence_id: int, delay_seconds: float):
+    """
+    Pushes a sequence's next action back without changing its step or status,
+    to the prospect's first send-window slot after the delay.
+    Used when a provider is temporarily unavailable or a send didn't go out.
+    """
+
+    earliest = datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)
+    next_action_time = schedule_send_times([(_sequence_timezone(prospect_sequence_id), earliest)])[0]
+
+    sql_command = """
+        UPDATE prospect_sequences
+        SET next_action_timestamp = ?
+        WHERE prospect_sequence_id = ?
+    """
+
+    write_behind.enqueue(('sequence_time', prospect_sequence_id), sql_command, (next_action_time, prospect_sequence_id))
+    print(f"- Deferred prospect_sequence_id {prospect_sequence_id} to {next_action_time:%Y-%m-%d %H:%M} UTC.")
 
-def get_sequence_state_by_id(prospect_sequence_id: int) -> Optional[Dict]:
+def get_sequence_state_by_id(prospect_sequence_id: int) -> Optional[SequenceAction]:
+    flush_pending_writes()
     conn = sqlite3.connect(DATABASE_FILE)
-    conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
-    cursor.execute("SELECT * FROM prospect_sequences WHERE prospect_sequence_id = ?", (prospect_sequence_id,))
+    cursor.execute(
+        f"SELECT {SEQUENCE_ACTION_COLUMNS} FROM prospect_sequences WHERE prospect_sequence_id = ?",
+        (prospect_sequence_id,)
+    )
     record = cursor.fetchone()
     conn.close()
-    return dict(record) if record else None
+    return SequenceAction(*record) if record else None
 
-def get_prospect_by_id(prospect_id: str) -> Optional[Dict]:
+def get_prospect_by_id(prospect_id: str) -> Optional[Prospect]:
     """
-    Reads a prospect's data from the database using their unique prospect_id
-    and reconstructs the nested dictionary format the agent expects.
+    Reads a prospect's data from the database using their unique prospect_id.
+    Use `to_agent_dict()` for the nested format the research agent expects.
     """
 
     conn = sqlite3.connect(DATABASE_FILE)
-    conn.row_factory = sqlite3.Row 
     cursor = conn.cursor()
 
-    sql_command = "SELECT * FROM prospects WHERE prospect_id = ?"
+    sql_command = f"SELECT {PROSPECT_COLUMNS} FROM prospects WHERE prospect_id = ?"
     
     cursor.execute(sql_command, (prospect_id,))
     
@@ -190,19 +785,7 @@ def get_prospect_by_id(prospect_id: str) -> Optional[Dict]:
     
     conn.close()
     
-    if prospect_row:
-        return {
-            "id": prospect_row["prospect_id"],
-            "name": prospect_row["full_name"],
-            "email": prospect_row["email"],
-            "linkedin_url": prospect_row["linkedin_url"],
-            "title": prospect_row["title"],
-            "organization": {
-                "name": prospect_row["company_name"],
-                "primary_domain": prospect_row["company_domain"]
-            }
-        }
-    return None
+    return Prospect(*prospect_row) if prospect_row else None
 
 def clear_all_sequence_actions():
     """
@@ -210,6 +793,7 @@ def clear_all_sequence_actions():
     This is useful for resetting the scheduler's queue during testing.
     """
 
+    flush_pending_writes()
     conn = sqlite3.connect(DATABASE_FILE)
     cursor = conn.cursor()
 
@@ -229,13 +813,102 @@ def update_prospect_status(prospect_id: str, status: str):
     Updates the status of a prospect in all their sequences.
     """
 
+    sql = "UPDATE prospect_sequences SET status = ? WHERE prospect_id = ?"
+    write_behind.enqueue(('prospect_status', prospect_id), sql, (status, prospect_id))
+    notify_scheduler()
+    
+    print(f"  - Status for prospect {prospect_id} updated to '{status}'.")
+
+def get_sourcing_cursor(cursor_name: str) -> Optional[Dict]:
+    """
+    Returns the saved pagination cursor for a sourcing search, if any.
+    """
+
     conn = sqlite3.connect(DATABASE_FILE)
+    conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
+    cursor.execute("SELECT * FROM sourcing_cursors WHERE cursor_name = ?", (cursor_name,))
+    record = cursor.fetchone()
+    conn.close()
+    return dict(record) if record else None
 
-    sql = "UPDATE prospect_sequences SET status = ? WHERE prospect_id = ?"
-    cursor.execute(sql, (status, prospect_id))
+def save_sourcing_cursor(cursor_name: str, next_page: int, total_pages: Optional[int]):
+    """
+    Records the next page to fetch for a sourcing search so it can be resumed.
+    """
+
+    conn = sqlite3.connect(DATABASE_FILE)
+    cursor = conn.cursor()
+
+    sql_command = """
+        INSERT INTO sourcing_cursors (cursor_name, next_page, total_pages, updated_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (cursor_name) DO UPDATE SET
+            next_page = excluded.next_page,
+            total_pages = excluded.total_pages,
+            updated_at = excluded.updated_at
+    """
+
+    cursor.execute(sql_command, (cursor_name, next_page, total_pages, datetime.now(timezone.utc)))
 
     conn.commit()
     conn.close()
-    
-    print(f"  - Status for prospect {prospect_id} updated to '{status}'.")
\ No newline at end of file
+
+def update_sequence_status(prospect_sequence_id: int, status: str):
+    """
+    Updates the status of a single sequence enrollment (e.g. 'finished' after its last step).
+    """
+
+    write_behind.enqueue(
+        ('sequence_status', prospect_sequence_id),
+        "UPDATE prospect_sequences SET status = ? WHERE prospect_sequence_id = ?",
+        (status, prospect_sequence_id)
+    )
+    notify_scheduler()
+
+    print(f"  - Status for prospect_sequence_id {prospect_sequence_id} updated to '{status}'.")
+
+def get_sequence_steps() -> List[Dict]:
+    """
+    Returns every sequence step definition, ordered by sequence and step number.
+    """
+
+    conn = sqlite3.connect(DATABASE_FILE)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM sequence_steps ORDER BY sequence_id, step_number")
+    steps = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return steps
+
+def save_prospect_research(prospect_id: str, research: Dict):
+    """
+    Stores the step-1 research and email so follow-ups can be drafted without re-running the agent.
+    """
+
+    conn = sqlite3.connect(DATABASE_FILE)
+    cursor = conn.cursor()
+
+    sql_command = """
+        INSERT OR REPLACE INTO prospect_research (
+            prospect_id, hook, source_url, research_summary, email_subject, email_body, created_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+    """
+
+    cursor.execute(sql_command, (
+        prospect_id, research.get('hook'), research.get('source_url'),
+        research.get('research_summary'), research.get('email_subject'),
+        research.get('email_body'), datetime.now(timezone.utc)
+    ))
+
+    conn.commit()
+    conn.close()
+
+def get_prospect_research(prospect_id: str) -> Optional[Dict]:
+    conn = sqlite3.connect(DATABASE_FILE)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM prospect_research WHERE prospect_id = ?", (prospect_id,))
+    record = cursor.fetchone()
+    conn.close()
+    return dict(record) if record else None
@@ -1,22 +1,25 @@
 import smtplib
 import ssl
+from typing import List, Optional
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import os
-from dotenv import load_dotenv
+from email.utils import make_msgid, formatdate
+from src.hyperion.config import get_settings
 
-def send_email(to_email: str, subject: str, body: str) -> bool:
+def send_email(to_email: str, subject: str, body: str, references: Optional[List[str]] = None) -> Optional[str]:
     """
-    Sends an email using Gmail's SMTP server.
+    Sends an email using Gmail's SMTP server. `references` are the Message-IDs
+    of earlier emails in the thread, oldest first; the email is sent as a reply
+    to the last of them.
 
     Returns:
-        True if the email was sent successfully, False otherwise.
+        The Message-ID we stamped on the email if it was sent successfully
+        (so replies can be matched to it), None otherwise.
     """
 
-    load_dotenv()
-
-    sender_email = os.getenv("SENDER_EMAIL")
-    app_password = os.getenv("SENDER_APP_PASSWORD")
+    settings = get_settings()
+    sender_email = settings.sender_email
+    app_password = settings.sender_app_password
 
     if not sender_email or not app_password:
         print("Error: SENDER_EMAIL or SENDER_APP_PASSWORD not found in the environment variables.")
@@ -26,6 +29,11 @@ def send_email(to_email: str, subject: str, body: str) -> bool:
     message["Subject"] = subject
     message["From"] = sender_email
     message["To"] = to_email
+    message["Date"] = formatdate(localtime=False)
+    message["Message-ID"] = make_msgid(domain=sender_email.rpartition('@')[2] or None)
+    if references:
+        message["In-Reply-To"] = references[-1]
+        message["References"] = " ".join(references)
 
     part1 = MIMEText(body, "plain")
     message.attach(part1)
@@ -37,8 +45,8 @@ def send_email(to_email: str, subject: str, body: str) -> bool:
         with smtplib.SMTP_SSL("smtp.gmail.com", 465, context=context) as server:
             server.login(sender_email, app_password)
             server.sendmail(sender_email, to_email, message.as_string())
-            return True
+            return message["Message-ID"]
     
     except Exception as e:
         print(f"Error sending email: {e}")
-        return False
\ No newline at end of file
+        return None
\ No newline at end of file
@@ -0,0 +1,98 @@
+import os
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from src.hyperion.config import DATABASE_FILE
+from src.hyperion.database.operations import flush_pending_writes
+
+EXPORT_CHUNK_ROWS = 50000
+
+# Tables analysts need, in export order. Outcomes are the campaign event log.
+EXPORT_TABLES = ["prospects", "prospect_sequences", "prospect_research", "campaign_events", "campaign_counters"]
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError("Parquet export needs pyarrow. Install it with `pip install pyarrow`.") from e
+    return pyarrow, pyarrow.parquet
+
+
+def _arrow_type(pa, declared: str):
+    declared = (declared or '').upper()
+    if 'INT' in declared:
+        return pa.int64()
+    if 'REAL' in declared or 'FLOA' in declared or 'DOUB' in declared:
+        return pa.float64()
+    if 'TIMESTAMP' in declared:
+        return pa.timestamp('us', tz='UTC')
+    return pa.string()
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    if value is None:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _column_array(pa, values: List, arrow_type):
+    if pa.types.is_timestamp(arrow_type):
+        try:
+            return pa.array(values, type=pa.string()).cast(arrow_type)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            # Rows written by hand may lack an offset or use odd formats; parse those one by one.
+            return pa.array([_parse_timestamp(value) for value in values], type=arrow_type)
+    return pa.array(values, type=arrow_type)
+
+
+def export_table(table: str, output_dir: str, chunk_rows: int = EXPORT_CHUNK_ROWS, database_file: str = None) -> int:
+    """
+    Streams one table into `<output_dir>/<table>.parquet`, `chunk_rows` rows at a
+    time, so memory stays flat however large the table is. Rows are read as
+    plain tuples and written column by column. Returns the number of rows written.
+    """
+
+    pa, pq = _require_pyarrow()
+    conn = sqlite3.connect(database_file or DATABASE_FILE)
+    try:
+        columns = conn.execute(f"PRAGMA table_info({table})").fetchall()
+        if not columns:
+            print(f"  - Table {table} not found; skipping.")
+            return 0
+        names = [column[1] for column in columns]
+        types = [_arrow_type(pa, column[2]) for column in columns]
+        schema = pa.schema(list(zip(names, types)))
+
+        path = os.path.join(output_dir, f"{table}.parquet")
+        cursor = conn.execute(f"SELECT * FROM {table}")
+        written = 0
+        with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+            while True:
+                rows = cursor.fetchmany(chunk_rows)
+                if not rows:
+                    break
+                arrays = [_column_array(pa, list(values), arrow_type) for values, arrow_type in zip(zip(*rows), types)]
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                written += len(rows)
+        print(f"  - Exported {written} row(s) from {table} to {path}.")
+        return written
+    finally:
+        conn.close()
+
+
+def export_database(output_dir: str, tables: List[str] = None, chunk_rows: int = EXPORT_CHUNK_ROWS) -> Dict[str, int]:
+    """
+    Exports the prospect, sequence and outcome tables as Parquet files that
+    load with `pandas.read_parquet` or `pyarrow.parquet.read_table`.
+    """
+
+    _require_pyarrow()
+    flush_pending_writes()
+    os.makedirs(output_dir, exist_ok=True)
+    return {table: export_table(table, output_dir, chunk_rows) for table in (tables or EXPORT_TABLES)}
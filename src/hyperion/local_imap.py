@@ -0,0 +1,176 @@
+import re
+import threading
+import socketserver
+from typing import Dict, List, Optional, Set
+
+# Enough of IMAP4rev1 + IDLE for ReplyIngestionService: LOGIN, SELECT, UID SEARCH,
+# UID FETCH, UID STORE, IDLE and LOGOUT. Sequence numbers equal UIDs since
+# nothing is ever expunged.
+CAPABILITIES = "IMAP4rev1 IDLE"
+
+
+class LocalImapServer:
+    """
+    An in-memory, plain-text IMAP server on localhost for exercising the reply
+    ingestor without a real mailbox. `deliver` adds a message and notifies
+    clients that are idling; `flags` shows what the client did to a message.
+
+        with LocalImapServer() as server:
+            server.deliver(raw_bytes)
+            ReplyIngestionService(host="127.0.0.1", port=server.port, use_ssl=False, user="u", password="p")
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.messages: Dict[int, bytes] = {}
+        self.message_flags: Dict[int, Set[str]] = {}
+        self.idlers: List[socketserver.StreamRequestHandler] = []
+        self.lock = threading.Lock()
+        self.server = socketserver.ThreadingTCPServer((host, port), _ImapHandler)
+        self.server.daemon_threads = True
+        self.server.imap = self
+        self.host, self.port = self.server.server_address
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self) -> "LocalImapServer":
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "LocalImapServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def deliver(self, raw: bytes) -> int:
+        """
+        Adds an unread message and pushes EXISTS to idling clients. Returns its UID.
+        """
+
+        with self.lock:
+            uid = len(self.messages) + 1
+            self.messages[uid] = raw
+            self.message_flags[uid] = set()
+            for handler in self.idlers:
+                handler.send_line(f"* {uid} EXISTS")
+        return uid
+
+    def flags(self, uid: int) -> Set[str]:
+        with self.lock:
+            return set(self.message_flags[uid])
+
+
+def _parse_uid_set(uid_set: str, highest: int) -> List[int]:
+    uids = []
+    for part in uid_set.split(","):
+        if ":" in part:
+            low, high = part.split(":")
+            uids.extend(range(int(low), (highest if high == "*" else int(high)) + 1))
+        else:
+            uids.append(int(part))
+    return uids
+
+
+def _header_fields(raw: bytes, names: List[str]) -> bytes:
+    header = raw.split(b"\r\n\r\n", 1)[0].split(b"\n\n", 1)[0]
+    wanted = {name.upper() for name in names}
+    lines, keep = [], False
+    for line in header.splitlines():
+        if line[:1] in (b" ", b"\t"):
+            if keep:
+                lines.append(line)
+            continue
+        keep = line.split(b":", 1)[0].decode(errors="replace").strip().upper() in wanted
+        if keep:
+            lines.append(line)
+    return b"\r\n".join(lines) + b"\r\n\r\n"
+
+
+class _ImapHandler(socketserver.StreamRequestHandler):
+    def send_line(self, line: str):
+        self.wfile.write(line.encode() + b"\r\n")
+        self.wfile.flush()
+
+    def handle(self):
+        imap: LocalImapServer = self.server.imap
+        self.send_line(f"* OK [CAPABILITY {CAPABILITIES}] Local IMAP ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            tag, _, rest = line.decode().rstrip("\r\n").partition(" ")
+            command, _, args = rest.partition(" ")
+            command = command.upper()
+            if command == "UID":
+                command, _, args = args.partition(" ")
+                command = f"UID {command.upper()}"
+
+            if command == "CAPABILITY":
+                self.send_line(f"* CAPABILITY {CAPABILITIES}")
+            elif command == "SELECT":
+                with imap.lock:
+                    self.send_line(f"* {len(imap.messages)} EXISTS")
+                self.send_line(f"{tag} OK [READ-WRITE] SELECT completed")
+                continue
+            elif command == "UID SEARCH":
+                with imap.lock:
+                    unseen = [str(uid) for uid, flags in imap.message_flags.items() if "\\Seen" not in flags]
+                self.send_line("* SEARCH" + "".join(f" {uid}" for uid in unseen))
+            elif command == "UID FETCH":
+                self._fetch(imap, *args.split(" ", 1))
+            elif command == "UID STORE":
+                uid_set, action, flag_list = args.split(" ", 2)
+                flags = set(flag_list.strip("()").split())
+                with imap.lock:
+                    for uid in _parse_uid_set(uid_set, len(imap.messages)):
+                        if action.upper().startswith("+"):
+                            imap.message_flags[uid] |= flags
+                        else:
+                            imap.message_flags[uid] -= flags
+                        self.send_line(f"* {uid} FETCH (UID {uid} FLAGS ({' '.join(sorted(imap.message_flags[uid]))}))")
+            elif command == "IDLE":
+                self._idle(imap, tag)
+                continue
+            elif command == "LOGOUT":
+                self.send_line("* BYE Logging out")
+                self.send_line(f"{tag} OK LOGOUT completed")
+                return
+            elif command not in ("LOGIN", "NOOP", "CHECK"):
+                self.send_line(f"{tag} BAD Unsupported command {command}")
+                continue
+            self.send_line(f"{tag} OK {command} completed")
+
+    def _fetch(self, imap: LocalImapServer, uid_set: str, items: str):
+        fields = re.search(r"HEADER\.FIELDS \(([^)]*)\)", items, re.IGNORECASE)
+        marks_seen = "PEEK" not in items.upper()
+        with imap.lock:
+            for uid in _parse_uid_set(uid_set, len(imap.messages)):
+                if uid not in imap.messages:
+                    continue
+                raw = imap.messages[uid]
+                if fields:
+                    item, data = f"BODY[HEADER.FIELDS ({fields.group(1)})]", _header_fields(raw, fields.group(1).split())
+                else:
+                    item, data = "BODY[]", raw
+                    if marks_seen:
+                        imap.message_flags[uid].add("\\Seen")
+                self.wfile.write(f"* {uid} FETCH (UID {uid} {item} {{{len(data)}}}\r\n".encode() + data + b")\r\n")
+            self.wfile.flush()
+
+    def _idle(self, imap: LocalImapServer, tag: str):
+        self.send_line("+ idling")
+        with imap.lock:
+            imap.idlers.append(self)
+        try:
+            line = self.rfile.readline()
+        finally:
+            with imap.lock:
+                imap.idlers.remove(self)
+        if line.strip().upper() == b"DONE":
+            self.send_line(f"{tag} OK IDLE terminated")
+        else:
+            self.send_line(f"{tag} BAD Expected DONE")
@@ -0,0 +1,124 @@
+import atexit
+import email
+import email.utils
+from email.header import decode_header
+from concurrent.futures import ProcessPoolExecutor, Future, FIRST_COMPLETED, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from src.hyperion.config import get_settings
+from src.hyperion.reply_body import extract_reply_text
+
+# Deliberately free of database and model imports so worker processes start light.
+
+# Messages per pool task; large enough to amortize pickling, small enough to stream.
+PARSE_CHUNK_SIZE = 100
+# Below this many messages the pool costs more than it saves.
+MIN_MESSAGES_FOR_POOL = 200
+# Chunks in flight before the producer waits for one to finish.
+MAX_PENDING_CHUNKS_PER_WORKER = 2
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def decode_header_value(header) -> str:
+    """
+    Decodes an RFC 2047 header to a readable string.
+    """
+
+    header_str = ""
+    for part, encoding in decode_header(header or ""):
+        if isinstance(part, bytes):
+            try:
+                header_str += part.decode(encoding or "utf-8", errors="replace")
+            except LookupError:
+                header_str += part.decode("utf-8", errors="replace")
+        else:
+            header_str += part
+    return header_str
+
+
+def message_fields(msg) -> Dict[str, str]:
+    """
+    The parts of a message reply handling needs: sender address, subject and
+    the extracted reply text.
+    """
+
+    return {
+        "from": email.utils.parseaddr(decode_header_value(msg["from"]))[1],
+        "subject": decode_header_value(msg["subject"]),
+        "body": extract_reply_text(msg),
+    }
+
+
+def parse_message(raw: bytes) -> Dict[str, str]:
+    return message_fields(email.message_from_bytes(raw))
+
+
+def _parse_chunk(chunk: List[Tuple[object, bytes]]) -> List[Tuple[object, Dict[str, str]]]:
+    results = []
+    for key, raw in chunk:
+        try:
+            results.append((key, parse_message(raw)))
+        except Exception as e:
+            # One malformed message mustn't sink the rest of its chunk.
+            results.append((key, {"from": "", "subject": "", "body": "", "error": str(e)}))
+    return results
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Returns the shared parsing pool, or None when MIME_PARSING_WORKERS is 0.
+    """
+
+    global _pool
+    workers = get_settings().mime_parsing_workers
+    if workers <= 0:
+        return None
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+    return _pool
+
+
+def parse_messages(
+    raw_messages: Iterable[Tuple[object, bytes]],
+    expected: Optional[int] = None,
+    pool: Optional[ProcessPoolExecutor] = None
+) -> Iterator[Tuple[object, Dict[str, str]]]:
+    """
+    Parses (key, raw RFC 822 bytes) pairs and yields (key, fields) as each
+    chunk finishes, not in input order.
+
+    With MIME_PARSING_WORKERS set and at least MIN_MESSAGES_FOR_POOL `expected`
+    messages, chunks are parsed in worker processes while `raw_messages` (e.g.
+    an IMAP fetch loop) keeps producing, so network I/O and parsing overlap.
+    Otherwise messages are parsed inline as they arrive.
+    """
+
+    if pool is None and (expected is None or expected >= MIN_MESSAGES_FOR_POOL):
+        pool = _get_pool()
+    if pool is None:
+        for item in raw_messages:
+            yield from _parse_chunk([item])
+        return
+
+    max_pending = max(1, pool._max_workers * MAX_PENDING_CHUNKS_PER_WORKER)
+    pending: Set[Future] = set()
+
+    def drain(block: bool) -> Iterator[Tuple[object, Dict[str, str]]]:
+        done, _ = wait(pending, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.discard(future)
+            yield from future.result()
+
+    chunk: List[Tuple[object, bytes]] = []
+    for item in raw_messages:
+        chunk.append(item)
+        if len(chunk) >= PARSE_CHUNK_SIZE:
+            pending.add(pool.submit(_parse_chunk, chunk))
+            chunk = []
+            # Hand back whatever is already parsed; wait only if too much is queued.
+            yield from drain(block=len(pending) >= max_pending)
+    if chunk:
+        pending.add(pool.submit(_parse_chunk, chunk))
+    while pending:
+        yield from drain(block=True)
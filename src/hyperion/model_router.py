@@ -0,0 +1,183 @@
+import re
+import json
+import time
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+NO_HOOK_FOUND = "No compelling hook found."
+
+INTENT_LABELS = {"POSITIVE_INTEREST", "OBJECTION", "QUESTION", "NEGATIVE", "OUT_OF_OFFICE", "UNCATEGORIZED"}
+
+# Cheapest model first. A task only moves up a tier when the cheaper model
+# fails or its output doesn't pass the task's quality check.
+MODEL_TIERS: Dict[str, List[str]] = {
+    "research_question": ["gemini-2.5-flash-lite", "gemini-3-flash-preview"],
+    "hook": ["gemini-3-flash-preview", "gemini-2.5-pro"],
+    "email": ["gemini-3-flash-preview", "gemini-2.5-pro"],
+    "classify_intent": ["gemini-2.5-flash-lite", "gemini-2.5-flash"],
+    "hook_and_email": ["gemini-3-flash-preview", "gemini-2.5-pro"],
+    "follow_up": ["gemini-2.5-flash-lite", "gemini-3-flash-preview"],
+}
+DEFAULT_TIERS = ["gemini-3-flash-preview"]
+
+GenerateFn = Callable[[str], Tuple[bool, str, str]]
+
+
+def _check_research_question(text: str) -> Optional[str]:
+    if len(text) > 400:
+        return "question longer than 400 characters"
+    return None
+
+
+def _check_hook(text: str) -> Optional[str]:
+    if NO_HOOK_FOUND.lower() in text.lower():
+        return "model returned the no-hook fail-safe"
+    if len(text) > 500 or text.count('\n') > 1:
+        return "hook is not a single sentence"
+    return None
+
+
+def _check_email(text: str) -> Optional[str]:
+    match = re.search(r'^\s*Subject:\s*(.+)$', text, re.MULTILINE)
+    if not match or not match.group(1).strip():
+        return "missing 'Subject:' line"
+    if '\n\n' not in text or not text[match.end():].strip():
+        return "missing email body"
+    return None
+
+
+def _check_follow_up(text: str) -> Optional[str]:
+    if not text.strip():
+        return "empty follow-up"
+    if re.search(r'^\s*Subject:', text, re.MULTILINE):
+        return "follow-up should be a body only"
+    if len(text.split()) > 120:
+        return "follow-up longer than 120 words"
+    return None
+
+
+def parse_hook_and_email(text: str) -> Optional[Dict[str, str]]:
+    """
+    Parses the fused generation's JSON into {'hook', 'subject', 'body'}, or None.
+    """
+
+    cleaned = text.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
+    try:
+        data = json.loads(cleaned)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    return {key: str(data.get(key) or '').strip() for key in ('hook', 'subject', 'body')}
+
+
+def _check_hook_and_email(text: str) -> Optional[str]:
+    parsed = parse_hook_and_email(text)
+    if parsed is None:
+        return "response is not a JSON object"
+    problem = _check_hook(parsed['hook']) if parsed['hook'] else "missing hook"
+    if problem:
+        return problem
+    if not parsed['subject'] or not parsed['body']:
+        return "missing subject or body"
+    return None
+
+
+def normalize_intent(text: str) -> str:
+    """
+    The intent label a model answered with, or UNCATEGORIZED if it isn't one.
+    """
+
+    label = text.strip().upper()
+    return label if label in INTENT_LABELS else "UNCATEGORIZED"
+
+
+def _check_intent(text: str) -> Optional[str]:
+    if text.strip().upper() not in INTENT_LABELS:
+        return f"'{text[:40]}' is not a known intent label"
+    return None
+
+
+QUALITY_CHECKS: Dict[str, Callable[[str], Optional[str]]] = {
+    "research_question": _check_research_question,
+    "hook": _check_hook,
+    "email": _check_email,
+    "classify_intent": _check_intent,
+    "hook_and_email": _check_hook_and_email,
+    "follow_up": _check_follow_up,
+}
+
+
+class RoutingStats:
+    """
+    Per-task counters for calls, escalations and latency by model.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tasks: Dict[str, Dict] = {}
+
+    def _task(self, task: str) -> Dict:
+        return self.tasks.setdefault(task, {"calls": 0, "escalated": 0, "failures": 0, "models": {}})
+
+    def record_attempt(self, task: str, model_name: str, seconds: float):
+        with self.lock:
+            model = self._task(task)["models"].setdefault(model_name, {"calls": 0, "seconds": 0.0})
+            model["calls"] += 1
+            model["seconds"] += seconds
+
+    def record_result(self, task: str, escalations: int, success: bool):
+        with self.lock:
+            stats = self._task(task)
+            stats["calls"] += 1
+            if escalations:
+                stats["escalated"] += 1
+            if not success:
+                stats["failures"] += 1
+
+    def report(self) -> str:
+        with self.lock:
+            lines = ["--- Model Routing Stats ---"]
+            for task, stats in sorted(self.tasks.items()):
+                rate = stats["escalated"] / stats["calls"] if stats["calls"] else 0.0
+                lines.append(f"  {task}: {stats['calls']} call(s), {rate:.0%} escalated, {stats['failures']} failed")
+                for model_name, model in stats["models"].items():
+                    average = model["seconds"] / model["calls"] if model["calls"] else 0.0
+                    lines.append(f"    - {model_name}: {model['calls']} call(s), avg {average:.2f}s")
+            return "\n".join(lines)
+
+
+routing_stats = RoutingStats()
+
+
+def route_generation(task: str, generate: GenerateFn) -> Tuple[bool, str, str]:
+    """
+    Runs `generate(model_name)` on the task's cheapest model and escalates up
+    MODEL_TIERS while the call fails or the output fails the quality check.
+
+    If the strongest model's output still fails the check it is returned as-is
+    (e.g. a genuine "No compelling hook found.") so the caller keeps its usual
+    handling. Returns: (success: bool, text: str, error_msg: str)
+    """
+
+    tiers = MODEL_TIERS.get(task, DEFAULT_TIERS)
+    check = QUALITY_CHECKS.get(task)
+    success, text, error = False, "", f"{task}: no model tiers configured"
+
+    for escalations, model_name in enumerate(tiers):
+        started = time.monotonic()
+        success, text, error = generate(model_name)
+        routing_stats.record_attempt(task, model_name, time.monotonic() - started)
+
+        if success:
+            problem = check(text) if check else None
+            if problem is None:
+                routing_stats.record_result(task, escalations, True)
+                return True, text, ""
+            error = f"{task}: {problem}"
+
+        if escalations < len(tiers) - 1:
+            print(f"  - {model_name} output rejected ({error}). Escalating to {tiers[escalations + 1]}...")
+
+    routing_stats.record_result(task, len(tiers) - 1, success)
+    return success, text, error
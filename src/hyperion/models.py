@@ -0,0 +1,68 @@
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+# Column order of the SELECTs that build these models, so rows map positionally
+# onto the constructor without an intermediate dict.
+PROSPECT_COLUMNS = "prospect_id, full_name, email, linkedin_url, title, company_name, company_domain, timezone"
+SEQUENCE_ACTION_COLUMNS = "prospect_sequence_id, prospect_id, sequence_id, status, current_step, next_action_timestamp"
+
+
+@dataclass(frozen=True, slots=True)
+class Prospect:
+    prospect_id: str
+    full_name: Optional[str]
+    email: Optional[str]
+    linkedin_url: Optional[str]
+    title: Optional[str]
+    company_name: Optional[str]
+    company_domain: Optional[str]
+    timezone: Optional[str] = None
+
+    @property
+    def first_name(self) -> str:
+        return (self.full_name or '').split(' ')[0]
+
+    @classmethod
+    def from_contact(cls, contact: Dict, timezone: Optional[str] = None) -> 'Prospect':
+        """
+        Builds a Prospect from the agent/Apollo dict format.
+        """
+
+        organization = contact.get('organization') or {}
+        return cls(
+            prospect_id=contact.get('id', ''),
+            full_name=contact.get('name', ''),
+            email=contact.get('email', ''),
+            linkedin_url=contact.get('linkedin_url', ''),
+            title=contact.get('title', ''),
+            company_name=organization.get('name', ''),
+            company_domain=organization.get('primary_domain', ''),
+            timezone=timezone
+        )
+
+    def to_agent_dict(self) -> Dict:
+        """
+        The nested dict format the research agent's AgentState['prospect'] expects.
+        """
+
+        return {
+            "id": self.prospect_id,
+            "name": self.full_name,
+            "email": self.email,
+            "linkedin_url": self.linkedin_url,
+            "title": self.title,
+            "organization": {
+                "name": self.company_name,
+                "primary_domain": self.company_domain
+            }
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class SequenceAction:
+    prospect_sequence_id: int
+    prospect_id: str
+    sequence_id: str
+    status: str
+    current_step: int
+    next_action_timestamp: Optional[str]
@@ -0,0 +1,64 @@
+from typing import Dict, Optional
+
+# Providers that ignore dots and "+tag" suffixes in the local part, so
+# j.doe+x@gmail.com and jdoe@gmail.com are the same inbox.
+DOT_INSENSITIVE_DOMAINS = {"gmail.com", "googlemail.com"}
+
+
+def normalize_email(email: Optional[str]) -> str:
+    """
+    The form we store and send to: trimmed, lowercased, without a mailto: prefix.
+    """
+
+    email = (email or '').strip().lower()
+    if email.startswith('mailto:'):
+        email = email[len('mailto:'):]
+    return email
+
+
+def email_key(email: Optional[str]) -> str:
+    """
+    The identity used for deduplication. Beyond normalize_email, folds provider
+    aliases (dots and +tags on Gmail) so every alias of an inbox shares one key.
+    """
+
+    email = normalize_email(email)
+    local, at, domain = email.rpartition('@')
+    if not at:
+        return email
+    if domain == "googlemail.com":
+        domain = "gmail.com"
+    if domain in DOT_INSENSITIVE_DOMAINS:
+        local = local.split('+', 1)[0].replace('.', '')
+    return f"{local}@{domain}"
+
+
+def normalize_domain(domain: Optional[str]) -> str:
+    """
+    Reduces a website or domain ('https://www.Acme.com/about') to its bare host ('acme.com').
+    """
+
+    domain = (domain or '').strip().lower()
+    for prefix in ('https://', 'http://', '//'):
+        if domain.startswith(prefix):
+            domain = domain[len(prefix):]
+            break
+    domain = domain.split('/')[0].split('?')[0].split('#')[0]
+    domain = domain.rsplit('@', 1)[-1].split(':')[0].rstrip('.')
+    if domain.startswith('www.'):
+        domain = domain[len('www.'):]
+    return domain
+
+
+def normalize_prospect(prospect: Dict) -> Dict:
+    """
+    Returns a copy of an agent/Apollo-format prospect with its email and
+    company domain in canonical form.
+    """
+
+    organization = dict(prospect.get('organization') or {})
+    organization['primary_domain'] = normalize_domain(organization.get('primary_domain'))
+    normalized = dict(prospect)
+    normalized['organization'] = organization
+    normalized['email'] = normalize_email(prospect.get('email'))
+    return normalized
@@ -0,0 +1,68 @@
+import select
+import asyncio
+import socket
+from src.hyperion.config import get_settings
+
+NOTIFY_HOST = "127.0.0.1"
+WAKE_MESSAGE = b"wake"
+
+
+def notify_scheduler():
+    """
+    Tells a running scheduler that the queue changed. Best effort: if no
+    scheduler is listening the datagram is simply dropped.
+    """
+
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(WAKE_MESSAGE, (NOTIFY_HOST, get_settings().scheduler_notify_port))
+    except OSError:
+        pass
+
+
+class SchedulerWakeup:
+    """
+    A local UDP listener the scheduler sleeps on, so enrollments and status
+    changes can wake it before its computed wake time.
+    """
+
+    def __init__(self, port: int = None):
+        self.port = port or get_settings().scheduler_notify_port
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((NOTIFY_HOST, self.port))
+        self.sock.setblocking(False)
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Blocks for up to `timeout` seconds. Returns True if woken by a notification.
+        """
+
+        readable, _, _ = select.select([self.sock], [], [], max(timeout, 0))
+        if not readable:
+            return False
+        self._drain()
+        return True
+
+    async def wait_async(self, timeout: float) -> bool:
+        """
+        The asyncio form of wait(), for use inside the supervisor's event loop.
+        """
+
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(loop.sock_recv(self.sock, 64), max(timeout, 0))
+        except asyncio.TimeoutError:
+            return False
+        self._drain()
+        return True
+
+    def _drain(self):
+        # Collapse a burst of notifications (e.g. a bulk enrollment) into one wakeup.
+        while True:
+            try:
+                self.sock.recv(64)
+            except BlockingIOError:
+                return
+
+    def close(self):
+        self.sock.close()
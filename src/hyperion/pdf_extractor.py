@@ -0,0 +1,81 @@
+import io
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from pypdf import PdfReader
+from src.hyperion.config import get_settings
+
+# Stop downloading after this many bytes; most useful text sits in the first pages.
+MAX_PDF_BYTES = 8 * 1024 * 1024
+DEFAULT_CHAR_BUDGET = 15000
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+EXTRACTION_TIMEOUT_SECONDS = 30
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def download_pdf(url: str, session, max_bytes: int = MAX_PDF_BYTES) -> bytes:
+    """
+    Streams a PDF download, stopping once max_bytes have been received.
+    """
+
+    buffer = bytearray()
+    with session.get(url, stream=True) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            buffer.extend(chunk)
+            if len(buffer) >= max_bytes:
+                print(f"  - PDF exceeds {max_bytes // 1024} KB. Truncating download.")
+                del buffer[max_bytes:]
+                break
+    return bytes(buffer)
+
+
+def extract_pdf_text(data: bytes, max_chars: int = DEFAULT_CHAR_BUDGET) -> str:
+    """
+    Extracts text page by page, stopping as soon as max_chars have been collected.
+    Truncated downloads are parsed leniently so the leading pages still yield text.
+    """
+
+    reader = PdfReader(io.BytesIO(data), strict=False)
+    parts = []
+    collected = 0
+    for page in reader.pages:
+        try:
+            text = page.extract_text() or ""
+        except Exception:
+            # Pages cut off by the byte cap can't be decoded; keep what we have.
+            break
+        parts.append(text)
+        collected += len(text) + 1
+        if collected >= max_chars:
+            break
+    return " ".join(parts)[:max_chars]
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Returns the shared extraction pool, or None when PDF_EXTRACTION_WORKERS is 0.
+    """
+
+    global _pool
+    workers = get_settings().pdf_extraction_workers
+    if workers <= 0:
+        return None
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+    return _pool
+
+
+def fetch_pdf_text(url: str, session, max_chars: int = DEFAULT_CHAR_BUDGET, max_bytes: int = MAX_PDF_BYTES) -> str:
+    """
+    Downloads a PDF with a byte cap and returns at most max_chars of its text.
+    Parsing runs in a worker process when PDF_EXTRACTION_WORKERS is set.
+    """
+
+    data = download_pdf(url, session, max_bytes=max_bytes)
+    pool = _get_pool()
+    if pool is None:
+        return extract_pdf_text(data, max_chars)
+    return pool.submit(extract_pdf_text, data, max_chars).result(timeout=EXTRACTION_TIMEOUT_SECONDS)
@@ -0,0 +1,210 @@
+from typing import Dict, Optional, Tuple
+from src.hyperion.agents.research_agent import (
+    generate_email, parse_email_content, prospect_deadline, load_prompt, safe_gemini_generate,
+    EMAIL_TIME_BUDGET_SECONDS
+)
+from src.hyperion.clients.registry import get_clients
+from src.hyperion.config import get_settings
+from src.hyperion.database.operations import (
+    get_prospect_research, save_prospect_research, record_event, update_prospect_status,
+    record_sent_email, flush_pending_writes, defer_sequence_action, get_sent_message_ids
+)
+from src.hyperion.email_sender import send_email
+from src.hyperion.model_router import NO_HOOK_FOUND, route_generation
+from src.hyperion.models import Prospect, SequenceAction
+from src.hyperion.resilience import ProviderUnavailableError
+from src.hyperion.sequences import SequenceStep, get_step, advance_sequence
+from src.hyperion.usage import usage_scope, check_campaign_budget
+
+# Outcomes of compose_step_email.
+SEND = "send"
+SKIP = "skip"
+FAILED = "failed"
+
+RESEARCH_SUMMARY_CHARS = 4000
+
+# A send that returns no Message-ID (missing credentials, SMTP error) is retried
+# with exponential backoff from this delay, and failed after MAX_SEND_ATTEMPTS.
+SEND_RETRY_BASE_SECONDS = 300
+MAX_SEND_ATTEMPTS = 4
+
+# Failed send attempts per prospect_sequence_id in this process.
+_send_failures: Dict[int, int] = {}
+
+
+def compose_first_email(research_agent, prospect: Prospect) -> Tuple[Optional[str], Optional[Tuple[str, str]]]:
+    """
+    Researches a prospect and writes the step-1 email, storing the research
+    and email for later follow-ups.
+
+    Returns (hook, (subject, body)). The hook is None when research found nothing
+    worth writing about; the email is None when it couldn't be generated or parsed.
+    ProviderUnavailableError propagates so the caller can defer the prospect.
+    """
+
+    agent_prospect = prospect.to_agent_dict()
+    final_state = research_agent.invoke({"prospect": agent_prospect, "deadline": prospect_deadline()})
+    hook = final_state.get('hook')
+    if not hook or NO_HOOK_FOUND in hook:
+        return None, None
+
+    if final_state.get('email_subject') and final_state.get('email_body'):
+        # Fused mode: the agent already wrote the email.
+        email_parts = (final_state['email_subject'], final_state['email_body'])
+    else:
+        email_state = {**final_state, "deadline": prospect_deadline(EMAIL_TIME_BUDGET_SECONDS)}
+        with usage_scope(node="generate_email"):
+            email_content = generate_email(agent_prospect, hook, email_state)
+        email_parts = parse_email_content(email_content) if email_content else None
+
+    if email_parts:
+        summary = final_state.get('research_summary') or final_state.get('company_research') or ''
+        save_prospect_research(prospect.prospect_id, {
+            'hook': hook,
+            'source_url': final_state.get('source_url'),
+            'research_summary': summary[:RESEARCH_SUMMARY_CHARS],
+            'email_subject': email_parts[0],
+            'email_body': email_parts[1],
+        })
+    return hook, email_parts
+
+
+def generate_follow_up_email(step: SequenceStep, prospect: Prospect, research: Dict) -> Optional[Tuple[str, str]]:
+    """
+    Drafts a follow-up from the stored step-1 research with one routed model call.
+    Sent as a reply to the original subject line (send_step_email threads it).
+    """
+
+    print(f"\n--- Generating Follow-up (Step {step.number}) ---")
+    settings = get_settings()
+    closing_rule = (
+        "This is the last email in the sequence: say you won't follow up again and leave the door open."
+        if step.is_last else
+        "Keep it light; more follow-ups may come later."
+    )
+    prompt = load_prompt(f"{step.template}.md").format(
+        follow_up_number=step.number - 1,
+        prospect_first_name=prospect.first_name,
+        prospect_title=prospect.title or 'a key leader',
+        company_name=prospect.company_name or '',
+        hook=research.get('hook') or '',
+        research_summary=research.get('research_summary') or 'None.',
+        your_agency_name=settings.agency_name,
+        your_agency_value_prop=settings.agency_value_prop,
+        original_email=research.get('email_body') or '',
+        closing_rule=closing_rule
+    )
+
+    with usage_scope(node="follow_up"):
+        success, body, error = route_generation(
+            "follow_up", lambda model_name: safe_gemini_generate(get_clients().gemini(model_name), prompt, "generate_follow_up")
+        )
+    if not success:
+        print(f"  - ❌ Follow-up generation failed: {error}")
+        return None
+
+    subject = research.get('email_subject') or ''
+    if not subject.lower().startswith('re:'):
+        subject = f"Re: {subject}"
+    return subject, body.strip()
+
+
+def compose_step_email(research_agent, action: SequenceAction, prospect: Prospect) -> Tuple[str, Optional[Tuple[str, str]], str]:
+    """
+    Drafts the email for an action's current sequence step.
+
+    Returns (outcome, (subject, body), reason): SEND with the email, SKIP when
+    the step doesn't exist or its condition isn't met (the caller should advance
+    the sequence), or FAILED with a short reason. Only 'research' steps run the
+    agent graph. ProviderUnavailableError, and BudgetExhaustedError once the
+    campaign has spent its budget, propagate so the caller can defer.
+    External calls made here are recorded against the prospect and campaign.
+    """
+
+    with usage_scope(prospect_id=action.prospect_id, sequence_id=action.sequence_id):
+        return _compose_step_email(research_agent, action, prospect)
+
+
+def _compose_step_email(research_agent, action: SequenceAction, prospect: Prospect) -> Tuple[str, Optional[Tuple[str, str]], str]:
+    step = get_step(action.sequence_id, action.current_step)
+    if step is None:
+        print(f"    -> Sequence {action.sequence_id} has no step {action.current_step}.")
+        return SKIP, None, ""
+
+    check_campaign_budget(action.sequence_id)
+    if step.kind == "research":
+        print(f"    -> Running AI Research for Step {step.number}...")
+        hook, email_parts = compose_first_email(research_agent, prospect)
+        if not hook:
+            print("    -> AI could not find a compelling hook.")
+            return FAILED, None, "no compelling hook"
+        print(f"    -> AI Research successful. Hook: '{hook}'")
+        record_event('researched', prospect.prospect_id, action.sequence_id, step.number)
+        if not email_parts:
+            print("    - Could not extract a subject and body from the generated email.")
+            return FAILED, None, "unparseable email"
+        return SEND, email_parts, ""
+
+    research = get_prospect_research(prospect.prospect_id)
+    if not step.applies_to(research):
+        print(f"    -> Step {step.number} condition '{step.condition}' not met. Skipping.")
+        return SKIP, None, ""
+    if not research:
+        print(f"    - No stored research for {prospect.full_name}; can't draft a follow-up.")
+        return FAILED, None, "no stored research"
+
+    try:
+        email_parts = generate_follow_up_email(step, prospect, research)
+    except ProviderUnavailableError:
+        raise
+    except Exception as e:
+        print(f"    - Error drafting follow-up: {e}")
+        email_parts = None
+    return (SEND, email_parts, "") if email_parts else (FAILED, None, "follow-up generation failed")
+
+
+def send_step_email(action: SequenceAction, prospect: Prospect, subject: str, body: str) -> Optional[str]:
+    """
+    Sends a step's email. Follow-ups carry In-Reply-To/References built from the
+    enrollment's stored Message-IDs, so mail clients show them in the original
+    thread. Returns the new Message-ID, or None if the email wasn't sent.
+    """
+
+    return send_email(prospect.email, subject, body, references=get_sent_message_ids(action.prospect_sequence_id))
+
+
+def complete_send(action: SequenceAction, message_id: Optional[str] = None):
+    """
+    Records a sent email (and its Message-ID, for reply matching) and moves the
+    sequence on. Both are committed before this returns, including when the
+    sequence finishes on its last step.
+    """
+
+    if message_id:
+        record_sent_email(message_id, action.prospect_id, action.prospect_sequence_id,
+                          action.sequence_id, action.current_step)
+    record_event('sent', action.prospect_id, action.sequence_id, action.current_step)
+    advance_sequence(action)
+    flush_pending_writes()
+    _send_failures.pop(action.prospect_sequence_id, None)
+
+
+def defer_failed_send(action: SequenceAction):
+    """
+    Handles a send_email that returned None. The action would otherwise stay due
+    and be researched again straight away, so it is deferred with exponential
+    backoff and failed once MAX_SEND_ATTEMPTS sends have not gone out.
+    """
+
+    failures = _send_failures.get(action.prospect_sequence_id, 0) + 1
+    if failures >= MAX_SEND_ATTEMPTS:
+        _send_failures.pop(action.prospect_sequence_id, None)
+        fail_action(action, f"send failed {failures} times")
+        return
+    _send_failures[action.prospect_sequence_id] = failures
+    defer_sequence_action(action.prospect_sequence_id, SEND_RETRY_BASE_SECONDS * 2 ** (failures - 1))
+
+
+def fail_action(action: SequenceAction, reason: str):
+    record_event('failed', action.prospect_id, action.sequence_id, action.current_step, reason)
+    update_prospect_status(action.prospect_id, 'failed')
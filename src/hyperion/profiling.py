@@ -0,0 +1,136 @@
+import io
+import os
+import re
+import cProfile
+import pstats
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from src.hyperion.config import get_settings
+
+TOP_N = 25
+TRACEMALLOC_FRAMES = 5
+
+_forced = False
+
+# tracemalloc is process-wide: it starts with the first profiled block and stops
+# only when the last concurrent one ends (and never if someone else started it).
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_owned = False
+
+
+def enable_profiling():
+    """
+    Turns profiling on for this process (the `--profile` CLI flag), regardless of HYPERION_PROFILE.
+    """
+
+    global _forced
+    _forced = True
+
+
+def profiling_enabled() -> bool:
+    return _forced or get_settings().profile
+
+
+def _artifact_base(label: str) -> str:
+    directory = get_settings().profile_dir
+    os.makedirs(directory, exist_ok=True)
+    safe_label = re.sub(r'[^A-Za-z0-9_.-]+', '_', label)[:80]
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+    return os.path.join(directory, f"{stamp}_{safe_label}")
+
+
+def _write_summary(path: str, label: str, profiler: cProfile.Profile, allocations) -> None:
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stream.write(f"=== Profile: {label} ===\n\n--- Top {TOP_N} functions by cumulative time ---\n")
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_N)
+    stream.write(f"\n--- Top {TOP_N} functions by own time ---\n")
+    stats.sort_stats(pstats.SortKey.TIME).print_stats(TOP_N)
+    if allocations is not None:
+        stream.write(f"\n--- Top {TOP_N} allocation sites (net growth) ---\n")
+        for stat in allocations[:TOP_N]:
+            stream.write(f"{stat}\n")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(stream.getvalue())
+
+
+@contextmanager
+def profile_block(label: str):
+    """
+    Profiles the enclosed block with cProfile and tracemalloc when profiling is
+    enabled, writing `<stamp>_<label>.prof` (load with pstats or snakeviz) and a
+    `.txt` summary of the hottest functions and allocation sites to
+    HYPERION_PROFILE_DIR. When disabled this is a single flag check.
+
+    tracemalloc is process-wide, so blocks profiled concurrently from several
+    threads will see each other's allocations.
+    """
+
+    if not profiling_enabled():
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already active (e.g. a concurrent worker on Python 3.12+).
+        print(f"  - Profiler busy; not profiling {label}.")
+        yield
+        return
+
+    _acquire_tracing()
+    before = _snapshot()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        after = _snapshot()
+        _release_tracing()
+        allocations = after.compare_to(before, 'lineno') if before and after else None
+        try:
+            base = _artifact_base(label)
+            profiler.dump_stats(f"{base}.prof")
+            _write_summary(f"{base}.txt", label, profiler, allocations)
+            print(f"  - Profile written to {base}.prof / .txt")
+        except Exception as e:
+            # Profiling must never change the outcome of the block it wraps.
+            print(f"  - Could not write profile for {label}: {e}")
+
+
+def _snapshot():
+    try:
+        return tracemalloc.take_snapshot()
+    except RuntimeError as e:
+        print(f"  - tracemalloc snapshot failed: {e}")
+        return None
+
+
+def _acquire_tracing():
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            _tracing_owned = True
+        _tracing_users += 1
+
+
+def _release_tracing():
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+
+def run_profiled(label: str, func, *args, **kwargs):
+    """
+    Calls func inside profile_block(label); handy for work handed to a thread.
+    """
+
+    with profile_block(label):
+        return func(*args, **kwargs)
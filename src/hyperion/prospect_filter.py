@@ -0,0 +1,81 @@
+import hashlib
+from typing import Dict, Optional
+from src.hyperion.database.operations import iter_prospect_keys
+from src.hyperion.normalization import email_key, normalize_domain
+
+
+def _digest(value: str) -> int:
+    """
+    Hashes a key to a 64-bit integer, which is far smaller to hold in a set than the string.
+    """
+
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class KnownProspectFilter:
+    """
+    An in-memory membership filter over the prospect ids, emails and company
+    domains already in the database. Built once per run and updated as new
+    prospects are added, so sourcing can skip contacts before paying for them.
+    """
+
+    def __init__(self):
+        self._ids = set()
+        self._emails = set()
+        self._domains = set()
+        self.stats = {"checked": 0, "known_id": 0, "known_email": 0, "known_domain": 0, "enrichments_avoided": 0}
+
+    @classmethod
+    def from_database(cls) -> 'KnownProspectFilter':
+        known = cls()
+        count = 0
+        for prospect_id, email, company_domain in iter_prospect_keys():
+            known._add_keys(prospect_id, email, company_domain)
+            count += 1
+        print(f"-> Known-prospect filter loaded {count} prospect(s).")
+        return known
+
+    def _add_keys(self, prospect_id: Optional[str], email: Optional[str], company_domain: Optional[str]):
+        if prospect_id:
+            self._ids.add(_digest(prospect_id))
+        if email:
+            self._emails.add(_digest(email_key(email)))
+        domain = normalize_domain(company_domain)
+        if domain:
+            self._domains.add(_digest(domain))
+
+    def add(self, prospect: Dict):
+        """
+        Records a prospect (agent/Apollo dict format) as known.
+        """
+
+        organization = prospect.get('organization') or {}
+        self._add_keys(prospect.get('id'), prospect.get('email'), organization.get('primary_domain'))
+
+    def match(self, contact: Dict, match_domain: bool = False) -> Optional[str]:
+        """
+        Returns why a contact is already known ('id', 'email' or 'domain'), or None.
+        """
+
+        self.stats["checked"] += 1
+        if contact.get('id') and _digest(contact['id']) in self._ids:
+            reason = 'id'
+        elif contact.get('email') and _digest(email_key(contact['email'])) in self._emails:
+            reason = 'email'
+        elif match_domain and _digest(normalize_domain((contact.get('organization') or {}).get('primary_domain'))) in self._domains:
+            reason = 'domain'
+        else:
+            return None
+
+        self.stats[f"known_{reason}"] += 1
+        if not contact.get('email'):
+            self.stats["enrichments_avoided"] += 1
+        return reason
+
+    def report(self) -> str:
+        skipped = self.stats["known_id"] + self.stats["known_email"] + self.stats["known_domain"]
+        return (
+            f"Known-prospect filter: {skipped} of {self.stats['checked']} contact(s) skipped "
+            f"(id: {self.stats['known_id']}, email: {self.stats['known_email']}, domain: {self.stats['known_domain']}); "
+            f"{self.stats['enrichments_avoided']} enrichment call(s) avoided."
+        )
@@ -0,0 +1,95 @@
+from typing import Dict, List, Optional, Tuple
+from src.hyperion.normalization import email_key, normalize_prospect
+from src.hyperion.prospect_filter import KnownProspectFilter
+
+# Fields a later duplicate row may fill in when the first row left them empty.
+MERGEABLE_FIELDS = ('name', 'linkedin_url', 'title')
+MAX_REPORTED_MERGES = 20
+
+
+def _fill_missing(kept: Dict, duplicate: Dict):
+    for field in MERGEABLE_FIELDS:
+        if not kept.get(field) and duplicate.get(field):
+            kept[field] = duplicate[field]
+    if not kept['organization'].get('name') and duplicate['organization'].get('name'):
+        kept['organization']['name'] = duplicate['organization']['name']
+
+
+def dedupe_prospects(
+    prospects: List[Dict],
+    known_filter: Optional[KnownProspectFilter] = None,
+    one_per_company: bool = False
+) -> Tuple[List[Dict], Dict]:
+    """
+    Normalizes emails and company domains, then drops duplicates in a single pass:
+    rows repeating an earlier row's person (or company, with `one_per_company`)
+    are merged into it, and rows already in the database are skipped.
+
+    Prospect ids are derived from the canonical email so re-imports are stable.
+    Returns (unique prospects, stats); stats['merges'] lists the first few
+    merges as (row number, email, reason).
+    """
+
+    if known_filter is None:
+        known_filter = KnownProspectFilter.from_database()
+
+    by_email: Dict[str, Dict] = {}
+    by_domain: Dict[str, Dict] = {}
+    unique: List[Dict] = []
+    stats = {"rows": 0, "unique": 0, "missing_email": 0, "merged_email": 0, "merged_company": 0,
+             "known_in_db": 0, "merges": []}
+
+    def note(row_number: int, email: str, reason: str):
+        if len(stats["merges"]) < MAX_REPORTED_MERGES:
+            stats["merges"].append((row_number, email, reason))
+
+    for row_number, raw in enumerate(prospects, 1):
+        stats["rows"] += 1
+        prospect = normalize_prospect(raw)
+        if not prospect['email']:
+            stats["missing_email"] += 1
+            continue
+        key = email_key(prospect['email'])
+        domain = prospect['organization']['primary_domain']
+        prospect['id'] = f"prospect_{key}"
+
+        if key in by_email:
+            _fill_missing(by_email[key], prospect)
+            stats["merged_email"] += 1
+            note(row_number, prospect['email'], f"same person as {by_email[key]['email']}")
+            continue
+        if one_per_company and domain and domain in by_domain:
+            stats["merged_company"] += 1
+            note(row_number, prospect['email'], f"same company ({domain}) as {by_domain[domain]['email']}")
+            continue
+
+        reason = known_filter.match(prospect, match_domain=one_per_company)
+        if reason:
+            stats["known_in_db"] += 1
+            note(row_number, prospect['email'], f"already in database (by {reason})")
+            continue
+
+        known_filter.add(prospect)
+        by_email[key] = prospect
+        if domain:
+            by_domain[domain] = prospect
+        unique.append(prospect)
+
+    stats["unique"] = len(unique)
+    return unique, stats
+
+
+def format_import_report(stats: Dict) -> str:
+    lines = []
+    if stats['merged_company']:
+        # Easy to miss in the summary, and each of these is a contact nobody will email.
+        lines.append(f"NOTE: {stats['merged_company']} row(s) dropped because another contact "
+                     f"at the same company was kept (one per company).")
+    lines += [
+        f"Import: {stats['rows']} row(s) -> {stats['unique']} new prospect(s). "
+        f"Merged {stats['merged_email']} duplicate person(s) and {stats['merged_company']} duplicate company row(s); "
+        f"skipped {stats['known_in_db']} already in the database and {stats['missing_email']} without an email."
+    ]
+    for row_number, email, reason in stats["merges"]:
+        lines.append(f"  - row {row_number}: {email} -> {reason}")
+    return "\n".join(lines)
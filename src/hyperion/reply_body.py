@@ -0,0 +1,163 @@
+import re
+from html import unescape
+from html.parser import HTMLParser
+from typing import List, Optional
+
+# Replies are classified on their first lines; anything longer is almost always
+# leftover history or boilerplate the patterns below didn't catch.
+REPLY_BODY_MAX_CHARS = 1500
+
+# A line that starts quoted history. Everything from it down is dropped.
+QUOTE_HEADER_PATTERNS = [
+    re.compile(r'^\s*On\b.{0,300}\bwrote:\s*$', re.IGNORECASE | re.DOTALL),
+    re.compile(r'^\s*Le\b.{0,300}\ba écrit\s*:\s*$', re.IGNORECASE | re.DOTALL),
+    re.compile(r'^\s*Am\b.{0,300}\bschrieb\b.{0,100}:\s*$', re.IGNORECASE | re.DOTALL),
+    re.compile(r'^\s*-{2,}\s*(Original|Forwarded) Message\s*-{2,}\s*$', re.IGNORECASE),
+    re.compile(r'^\s*_{20,}\s*$'),
+    re.compile(r'^\s*From:\s.+', re.IGNORECASE),
+]
+
+# How the second line of a wrapped quote header ends.
+WRAPPED_HEADER_END = re.compile(r'(\bwrote|écrit|\bschrieb\b.{0,100})\s*:\s*$', re.IGNORECASE)
+
+# A line that starts a signature or disclaimer. Everything from it down is dropped.
+SIGNATURE_PATTERNS = [
+    re.compile(r'^--\s*$'),
+    re.compile(r'^\s*Sent from my \w+', re.IGNORECASE),
+    re.compile(r'^\s*Get Outlook for \w+', re.IGNORECASE),
+    re.compile(r'^\s*(CONFIDENTIALITY|DISCLAIMER|PRIVILEGED)\b', re.IGNORECASE),
+    re.compile(r'^\s*This (e-?mail|message)( and any (files|attachments))?.{0,40}\b(confidential|intended (solely )?for)', re.IGNORECASE),
+]
+
+# Tags whose contents are never part of the reply text.
+SKIPPED_TAGS = {"style", "script", "head", "title", "blockquote"}
+# Class names mail clients put on the quoted-history container.
+QUOTE_CLASSES = {"gmail_quote", "gmail_extra", "yahoo_quoted", "moz-cite-prefix"}
+BLOCK_TAGS = {"p", "div", "br", "tr", "li", "h1", "h2", "h3", "h4", "table", "hr"}
+
+
+class _HTMLTextExtractor(HTMLParser):
+    """
+    Renders an HTML body as plain text with a line break per block element,
+    leaving out quoted history containers, scripts and styles.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.skip_stack: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        classes = set((dict(attrs).get('class') or '').split())
+        if self.skip_stack or tag in SKIPPED_TAGS or classes & QUOTE_CLASSES:
+            if tag not in ("br", "hr", "img", "meta", "link", "input"):
+                self.skip_stack.append(tag)
+            return
+        if tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if self.skip_stack:
+            if self.skip_stack[-1] == tag:
+                self.skip_stack.pop()
+            return
+        if tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self.skip_stack:
+            self.parts.append(data)
+
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+def html_to_text(html: str) -> str:
+    parser = _HTMLTextExtractor()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        # Badly broken markup: fall back to dropping the tags.
+        return unescape(re.sub(r'<[^>]+>', ' ', html))
+    return parser.text()
+
+
+def _decode_part(part) -> str:
+    payload = part.get_payload(decode=True)
+    if payload is None:
+        return ""
+    charset = part.get_content_charset() or "utf-8"
+    try:
+        return payload.decode(charset, errors="replace")
+    except LookupError:
+        return payload.decode("utf-8", errors="replace")
+
+
+def _message_text(msg) -> str:
+    """
+    The message's text/plain part, or its text/html part rendered to text
+    when there is no plain-text alternative. Attachments are ignored.
+    """
+
+    plain: Optional[str] = None
+    html: Optional[str] = None
+    for part in msg.walk():
+        if part.is_multipart() or part.get_content_disposition() == "attachment":
+            continue
+        content_type = part.get_content_type()
+        if content_type == "text/plain" and plain is None:
+            plain = _decode_part(part)
+        elif content_type == "text/html" and html is None:
+            html = _decode_part(part)
+    if plain and plain.strip():
+        return plain
+    return html_to_text(html) if html else ""
+
+
+def strip_quoted_text(text: str) -> str:
+    """
+    Keeps only what the sender wrote: drops '>' quoted lines and everything from
+    the first quote header ('On ... wrote:', 'From:', Outlook separators),
+    signature delimiter or disclaimer onwards.
+    """
+
+    lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    kept: List[str] = []
+    for i, line in enumerate(lines):
+        # Clients wrap long "On <date>, <name> wrote:" headers onto a second line.
+        # Only join when that next line ends the header but isn't one by itself;
+        # a line ending a sentence is the sender's own text either way.
+        next_line = lines[i + 1] if i + 1 < len(lines) else ""
+        wrapped = (WRAPPED_HEADER_END.search(next_line)
+                   and not any(pattern.match(next_line) for pattern in QUOTE_HEADER_PATTERNS)
+                   and not re.search(r'[.!?]\s*$', line))
+        candidates = (line, f"{line} {next_line}") if wrapped else (line,)
+        if any(pattern.match(candidate) for pattern in QUOTE_HEADER_PATTERNS for candidate in candidates):
+            if kept or not line.lstrip().lower().startswith('from:'):
+                break
+        if any(pattern.match(line) for pattern in SIGNATURE_PATTERNS):
+            break
+        if line.lstrip().startswith('>'):
+            continue
+        kept.append(line.rstrip())
+    return "\n".join(kept)
+
+
+def _collapse_whitespace(text: str) -> str:
+    text = text.replace('\xa0', ' ')
+    text = re.sub(r'[ \t]+', ' ', text)
+    text = re.sub(r' *\n *', '\n', text)
+    return re.sub(r'\n{3,}', '\n\n', text).strip()
+
+
+def extract_reply_text(msg, max_chars: int = REPLY_BODY_MAX_CHARS) -> str:
+    """
+    The new text of a reply, ready for classification: plain or HTML body,
+    without quoted history, signatures or disclaimers, capped at `max_chars`.
+    """
+
+    text = _collapse_whitespace(strip_quoted_text(_message_text(msg)))
+    if len(text) > max_chars:
+        text = text[:max_chars].rsplit(' ', 1)[0] + " …"
+    return text
@@ -0,0 +1,265 @@
+import re
+import time
+import email
+import imaplib
+import itertools
+import select
+import ssl
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+from src.hyperion.config import get_settings
+from src.hyperion.reply_parser import match_reply, process_reply, reply_record, REPLY_HEADER_FETCH
+from src.hyperion.mime_parsing import parse_messages
+from src.hyperion.resilience import ProviderUnavailableError
+
+# RFC 2177 asks clients to re-issue IDLE at least every 29 minutes; we renew
+# much sooner so a missed notification delays processing by minutes at most.
+IDLE_RENEW_SECONDS = 5 * 60
+SOCKET_TIMEOUT_SECONDS = 60
+RECONNECT_BASE_DELAY = 2
+RECONNECT_MAX_DELAY = 300
+# Full messages downloaded per UID FETCH command.
+FETCH_BATCH_SIZE = 50
+# BODY.PEEK leaves the message unread; it is only marked \Seen once handled.
+MESSAGE_FETCH = "(UID BODY.PEEK[])"
+
+
+class ReplyIngestionService:
+    """
+    A long-running reply ingestor. Keeps one authenticated IMAP connection,
+    waits for new-mail pushes with IDLE, and hands every reply from a known
+    prospect to `handler` (classification + dispatch by default). Drops and
+    server timeouts trigger a reconnect with exponential backoff.
+
+    Host, port and SSL are configurable so the service can be pointed at a
+    local plain-text IMAP server for testing.
+    """
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        use_ssl: Optional[bool] = None,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        mailbox: str = "inbox",
+        handler: Callable[[Dict], None] = process_reply
+    ):
+        settings = get_settings()
+        self.host = host or settings.imap_host
+        self.port = port or settings.imap_port
+        self.use_ssl = settings.imap_ssl if use_ssl is None else use_ssl
+        self.user = user or settings.sender_email
+        self.password = password or settings.sender_app_password
+        self.mailbox = mailbox
+        self.handler = handler
+        self.mail: Optional[imaplib.IMAP4] = None
+        self.running = False
+        self.examined_uids: Set[bytes] = set()
+        # When to look at the mailbox again for replies put back while Gemini was unavailable.
+        self.retry_at: Optional[float] = None
+        # imaplib has no public IDLE before Python 3.14, so IDLE commands carry
+        # our own tags. The prefix can't collide with imaplib's, and imaplib
+        # never sees their tagged completion since _read_until_tagged consumes it.
+        self.idle_tags = itertools.count(1)
+
+    def connect(self):
+        imap_class = imaplib.IMAP4_SSL if self.use_ssl else imaplib.IMAP4
+        self.mail = imap_class(self.host, self.port, timeout=SOCKET_TIMEOUT_SECONDS)
+        self.mail.login(self.user, self.password)
+        self.mail.select(self.mailbox)
+        # UIDs are only stable within one UIDVALIDITY; start fresh on every connection.
+        self.examined_uids.clear()
+        print(f"-> Connected to {self.host}:{self.port} ({self.mailbox}).")
+
+    def disconnect(self):
+        if self.mail is None:
+            return
+        try:
+            self.mail.logout()
+        except Exception:
+            pass
+        self.mail = None
+
+    def process_unseen(self) -> int:
+        """
+        Fetches the headers of every unseen message in one command, then
+        downloads and hands to the handler only those that reply to our emails.
+        Messages are downloaded without marking them read, and marked read once
+        handled. Unmatched messages and replies the handler failed on stay unread
+        and aren't re-examined this session; replies the handler couldn't
+        classify yet because Gemini was unavailable are retried.
+        Returns the number of replies handled.
+        """
+
+        self.retry_at = None
+        status, data = self.mail.uid("search", None, "UNSEEN")
+        if status != "OK" or not data[0]:
+            return 0
+        uids = [uid for uid in data[0].split() if uid not in self.examined_uids]
+        if not uids:
+            return 0
+
+        status, header_data = self.mail.uid("fetch", b",".join(uids), REPLY_HEADER_FETCH)
+        if status != "OK":
+            return 0
+        matches = []
+        for response_part in header_data:
+            if not isinstance(response_part, tuple):
+                continue
+            uid_match = re.search(rb"UID (\d+)", response_part[0])
+            if not uid_match:
+                continue
+            self.examined_uids.add(uid_match.group(1))
+            prospect = match_reply(email.message_from_bytes(response_part[1]))
+            if prospect:
+                matches.append((uid_match.group(1), prospect))
+
+        prospects = dict(matches)
+        handled = 0
+        # Bodies are parsed in worker processes (MIME_PARSING_WORKERS) while the next
+        # batch downloads; replies are handled in whatever order parsing finishes.
+        for uid, fields in parse_messages(self._fetch_messages(list(prospects)), expected=len(prospects)):
+            if fields.get("error"):
+                print(f"  - Could not parse message {uid.decode()}: {fields['error']}")
+                continue
+            reply = reply_record(prospects[uid], fields)
+            try:
+                self.handler(reply)
+            except ProviderUnavailableError as e:
+                print(f"  - Leaving reply from {reply['from']} unread, retrying in {e.retry_after:.0f}s: {e}")
+                self._retry_later(uid, e.retry_after)
+                continue
+            except Exception as e:
+                print(f"  - Error handling reply from {reply['from']}, leaving it unread: {e}")
+                continue
+            self.mail.uid("store", uid, "+FLAGS", "(\\Seen)")
+            handled += 1
+        return handled
+
+    def _retry_later(self, uid: bytes, retry_after: float):
+        self.examined_uids.discard(uid)
+        retry_at = time.monotonic() + retry_after
+        self.retry_at = retry_at if self.retry_at is None else min(self.retry_at, retry_at)
+
+    def _idle_timeout(self) -> float:
+        if self.retry_at is None:
+            return IDLE_RENEW_SECONDS
+        return max(min(IDLE_RENEW_SECONDS, self.retry_at - time.monotonic()), 0)
+
+    def _fetch_messages(self, uids: List[bytes]) -> Iterator[Tuple[bytes, bytes]]:
+        """
+        Downloads full messages FETCH_BATCH_SIZE at a time, yielding (uid, raw bytes).
+        """
+
+        for start in range(0, len(uids), FETCH_BATCH_SIZE):
+            status, msg_data = self.mail.uid("fetch", b",".join(uids[start:start + FETCH_BATCH_SIZE]), MESSAGE_FETCH)
+            if status != "OK":
+                continue
+            for response_part in msg_data:
+                if not isinstance(response_part, tuple):
+                    continue
+                uid_match = re.search(rb"UID (\d+)", response_part[0])
+                if uid_match:
+                    yield uid_match.group(1), response_part[1]
+
+    def idle(self, timeout: float) -> bool:
+        """
+        Issues IMAP IDLE and blocks until the server reports new mail or `timeout`
+        passes. Returns True if new mail arrived.
+        """
+
+        tag = f"IDLE{next(self.idle_tags)}"
+        self.mail.send(f"{tag} IDLE\r\n".encode())
+        continuation = self.mail.readline()
+        if not continuation.startswith(b"+"):
+            raise imaplib.IMAP4.error(f"Server refused IDLE: {continuation!r}")
+
+        new_mail = False
+        deadline = time.monotonic() + timeout
+        try:
+            while not new_mail:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                if not self._wait_readable(remaining):
+                    break
+                line = self.mail.readline()
+                if not line:
+                    raise imaplib.IMAP4.abort("Connection closed during IDLE")
+                if line.rstrip().upper().endswith((b"EXISTS", b"RECENT")):
+                    new_mail = True
+        finally:
+            self.mail.send(b"DONE\r\n")
+            self._read_until_tagged(tag)
+        return new_mail
+
+    def _wait_readable(self, timeout: float) -> bool:
+        if self._has_buffered_data():
+            return True
+        readable, _, _ = select.select([self.mail.sock], [], [], timeout)
+        return bool(readable)
+
+    def _has_buffered_data(self) -> bool:
+        """
+        True if bytes were already read off the socket but not consumed: lines
+        left in imaplib's file buffer after a readline, or decrypted SSL bytes.
+        select() sees neither, so waiting on it alone would sit on a delivered
+        EXISTS until the next packet or the IDLE renewal.
+        """
+
+        sock = self.mail.sock
+        if getattr(sock, "pending", None) and sock.pending():
+            return True
+        # peek() returns the buffer without a read when it has data; otherwise
+        # it tries one read, which must not block.
+        previous_timeout = sock.gettimeout()
+        sock.settimeout(0)
+        try:
+            return bool(self.mail.file.peek(1))
+        except (BlockingIOError, ssl.SSLWantReadError):
+            return False
+        finally:
+            sock.settimeout(previous_timeout)
+
+    def _read_until_tagged(self, tag: str):
+        while True:
+            line = self.mail.readline()
+            if not line:
+                raise imaplib.IMAP4.abort("Connection closed while ending IDLE")
+            if line.startswith(tag.encode()):
+                return
+
+    def run_forever(self):
+        """
+        Processes the current backlog, then idles and processes new mail as it arrives.
+        """
+
+        if not self.user or not self.password:
+            print("Error: SENDER_EMAIL or SENDER_APP_PASSWORD not found in the environment variables.")
+            return
+
+        self.running = True
+        failures = 0
+        while self.running:
+            try:
+                self.connect()
+                failures = 0
+                handled = self.process_unseen()
+                print(f"  - Processed {handled} backlog repl(ies). Waiting for new mail...")
+                while self.running:
+                    retry_due = self.retry_at is not None and time.monotonic() >= self.retry_at
+                    if retry_due or self.idle(self._idle_timeout()):
+                        handled = self.process_unseen()
+                        print(f"  - Processed {handled} new repl(ies).")
+            except (imaplib.IMAP4.abort, imaplib.IMAP4.error, OSError) as e:
+                failures += 1
+                delay = min(RECONNECT_BASE_DELAY * 2 ** failures, RECONNECT_MAX_DELAY)
+                print(f"!! IMAP connection lost ({e}). Reconnecting in {delay}s... !!")
+                self.disconnect()
+                time.sleep(delay)
+            except KeyboardInterrupt:
+                self.running = False
+        self.disconnect()
+
+    def stop(self):
+        self.running = False
@@ -1,43 +1,70 @@
+import re
 import imaplib
 import email
-from email.header import decode_header
-import os
-from dotenv import load_dotenv
 from typing import List, Dict, Optional
-import google.generativeai as genai
-from src.hyperion.database.operations import get_prospect_by_email
-from src.hyperion.database.operations import update_prospect_status
+from src.hyperion.config import get_settings
+from src.hyperion.database.operations import get_prospect_by_email, get_prospect_by_message_ids
+from src.hyperion.database.operations import update_prospect_status, record_event
+from src.hyperion.models import Prospect
 from src.hyperion.email_sender import send_email
+from src.hyperion.resilience import provider_timeout, ProviderUnavailableError
+from src.hyperion.clients.gemini import generate_text
+from src.hyperion.clients.registry import get_clients
+from src.hyperion.model_router import route_generation, normalize_intent
+from src.hyperion.usage import usage_scope
+from src.hyperion.mime_parsing import decode_header_value, message_fields
+
+# Just enough of a message to decide whether it is a reply to us. BODY.PEEK
+# leaves unmatched mail unread.
+REPLY_HEADER_FETCH = "(UID BODY.PEEK[HEADER.FIELDS (FROM SUBJECT MESSAGE-ID IN-REPLY-TO REFERENCES)])"
+
+def thread_message_ids(msg) -> List[str]:
+    """
+    The Message-IDs a message replies to, nearest first: In-Reply-To, then
+    References from newest to oldest.
+    """
+
+    ids = re.findall(r'<[^<>\s]+>', msg.get("in-reply-to") or "")
+    ids += reversed(re.findall(r'<[^<>\s]+>', msg.get("references") or ""))
+    return list(dict.fromkeys(ids))
 
-def _decode_header(header):
+def match_reply(msg) -> Optional[Prospect]:
     """
-    Decodes email headers to a readable string.
+    Decides from the headers alone whether a message replies to one of our
+    emails: by the Message-IDs it references (which also catches colleagues and
+    aliases), falling back to the sender's address.
     """
 
-    decoded_parts = decode_header(header)
-    header_str = ""
+    prospect = get_prospect_by_message_ids(thread_message_ids(msg))
+    if prospect:
+        return prospect
+    sender_email = email.utils.parseaddr(decode_header_value(msg["from"]))[1]
+    return get_prospect_by_email(sender_email) if sender_email else None
 
-    for part, encoding in decoded_parts:
-        if isinstance(part, bytes):
-            header_str += part.decode(encoding or "utf-8")
-        else:
-            header_str += part
-    return header_str
+def build_reply(msg, prospect: Optional[Prospect] = None) -> Optional[Dict]:
+    """
+    Turns a parsed message into a reply record if it is a reply to one of our
+    emails. Pass `prospect` when match_reply has already run on its headers.
+    """
+
+    prospect = prospect or match_reply(msg)
+    if not prospect:
+        return None
+    return reply_record(prospect, message_fields(msg))
+
+def reply_record(prospect: Prospect, fields: Dict[str, str]) -> Dict:
+    """
+    Combines a matched prospect with a message's parsed fields (see mime_parsing).
+    """
 
-def _get_email_body(msg):
-    """Extracts the plain text body from an email message."""
-    if msg.is_multipart():
-        for part in msg.walk():
-            if part.get_content_type() == "text/plain":
-                try:
-                    return part.get_payload(decode=True).decode()
-                except:
-                    continue
-    else:
-        try:
-            return msg.get_payload(decode=True).decode()
-        except:
-            return ""
+    print(f"  - ✅ Found reply from {fields['from']} for prospect {prospect.email}")
+    return {
+        "prospect_id": prospect.prospect_id,
+        "prospect": prospect,
+        "from": fields['from'],
+        "subject": fields['subject'],
+        "body": fields['body']
+    }
 
 def ingest_and_filter_replies() -> List[Dict]:
     """
@@ -45,10 +72,9 @@ def ingest_and_filter_replies() -> List[Dict]:
     from known prospects in our database.
     """
 
-    load_dotenv()
-
-    user = os.getenv("SENDER_EMAIL")
-    password = os.getenv("SENDER_APP_PASSWORD")
+    settings = get_settings()
+    user = settings.sender_email
+    password = settings.sender_app_password
 
     if not user or not password: return []
 
@@ -69,25 +95,17 @@ def ingest_and_filter_replies() -> List[Dict]:
         print(f"  - Found {len(unread_email_ids)} total unread. Checking the 10 most recent...")
 
         for email_id in latest_ids:
+            status, header_data = mail.fetch(email_id, REPLY_HEADER_FETCH)
+            headers = next((part[1] for part in header_data if isinstance(part, tuple)), None)
+            prospect = match_reply(email.message_from_bytes(headers)) if headers else None
+            if not prospect:
+                continue
             status, msg_data = mail.fetch(email_id, "(RFC822)")
             for response_part in msg_data:
                 if isinstance(response_part, tuple):
-                    msg = email.message_from_bytes(response_part[1])
-                    
-                    from_header = _decode_header(msg["from"])
-                    sender_email = email.utils.parseaddr(from_header)[1]
-                    
-                    prospect = get_prospect_by_email(sender_email)
-                    if prospect:
-                        print(f"  - ✅ Found reply from known prospect: {sender_email}")
-                        subject = _decode_header(msg["subject"])
-                        body = _get_email_body(msg)
-                        qualified_replies.append({
-                            "prospect_id": prospect["prospect_id"],
-                            "from": sender_email,
-                            "subject": subject,
-                            "body": body.strip()
-                        })
+                    reply = build_reply(email.message_from_bytes(response_part[1]), prospect)
+                    if reply:
+                        qualified_replies.append(reply)
         
         mail.logout()
 
@@ -98,18 +116,16 @@ def ingest_and_filter_replies() -> List[Dict]:
 
 def classify_intent(email_body: str) -> Optional[str]:
     """
-    Uses Gemini 2.5 Pro to classify the intent of an email reply.
+    Classifies the intent of an email reply, starting on the cheapest model
+    and escalating only if it doesn't answer with a known label.
+    Raises ProviderUnavailableError so the caller can retry the reply later.
     """
 
     print("\n --- Node: Classifying Intent ---")
 
     try:
-        load_dotenv()
-        google_api_key = os.getenv("GOOGLE_API_KEY")
-        if not google_api_key:
+        if not get_settings().google_api_key:
             raise ValueError("ERROR: GOOGLE_API_KEY not found.")
-        genai.configure(api_key=google_api_key)
-        model = genai.GenerativeModel("gemini-2.5-pro")
 
         prompt = (
             "You are an expert at classifying sales email replies. Analyze the email body and classify its intent into ONE of the following categories:\n"
@@ -130,31 +146,53 @@ def classify_intent(email_body: str) -> Optional[str]:
             f"'{email_body}'"
         )
 
-        response = model.generate_content(prompt)
-        intent = response.text.strip()
+        success, intent, error = route_generation(
+            "classify_intent",
+            lambda model_name: generate_text(
+                get_clients().gemini(model_name), prompt, "classify_intent",
+                request_options={"timeout": provider_timeout("gemini")}
+            )
+        )
+        if not success:
+            raise RuntimeError(error)
+        # The strongest tier's answer comes back even when it isn't a known label.
+        intent = normalize_intent(intent)
         print(f" - Classified Intent: {intent}")
         return intent
-    
+
+    except ProviderUnavailableError:
+        raise
     except Exception as e:
         print(f" - An error occurred during intent classification: {e}")
         return None
     
-def dispatch_action(prospect: Dict, intent: str):
+def dispatch_action(prospect: Prospect, intent: str):
     """
     Takes action based on the classified intent.
+    `prospect` is the Prospect returned by get_prospect_by_email.
     """
 
     print(f"\n--- Node: Dispatching Action for Intent: {intent} ---")
     
-    update_prospect_status(prospect['id'], 'replied')
+    record_event('replied', prospect.prospect_id, detail=intent)
+    update_prospect_status(prospect.prospect_id, 'replied')
 
     if intent == "POSITIVE_INTEREST":
-        notification_subject = f"✅ Positive Reply from {prospect['full_name']}"
+        notification_subject = f"✅ Positive Reply from {prospect.full_name}"
         notification_body = (
-            f"Hyperion detected a positive reply from {prospect['full_name']} ({prospect['email']}).\n\n"
+            f"Hyperion detected a positive reply from {prospect.full_name} ({prospect.email}).\n\n"
             "Take over the conversation and book the meeting.\n\n"
-            f"Company: {prospect['company_name']}"
+            f"Company: {prospect.company_name}"
         )
-        our_email = os.getenv("SENDER_EMAIL")
+        our_email = get_settings().sender_email
         send_email(our_email, notification_subject, notification_body)
-        print("  - Positive lead notification sent.")
\ No newline at end of file
+        print("  - Positive lead notification sent.")
+
+def process_reply(reply: Dict):
+    """
+    Classifies a qualified reply and dispatches the matching action.
+    """
+
+    with usage_scope(prospect_id=reply['prospect'].prospect_id, node="classify_intent"):
+        intent = classify_intent(reply['body']) or "UNCATEGORIZED"
+    dispatch_action(reply['prospect'], intent)
@@ -0,0 +1,200 @@
+import time
+import random
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+import requests
+from src.hyperion.usage import track_provider_call
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+TIMEOUT_STATUS_CODES = {408, 504}
+# A timeout this close to the caller's deadline was caused by the timeout we
+# shrank to fit that deadline, not by the provider being slow for everyone.
+DEADLINE_SLACK_SECONDS = 1.0
+
+
+class ProviderUnavailableError(Exception):
+    """
+    Raised when a provider's circuit is open or it kept failing with transient
+    errors. Callers should defer the work rather than treat it as a failure.
+    """
+
+    def __init__(self, provider: str, retry_after: float, reason: str = ""):
+        self.provider = provider
+        self.retry_after = retry_after
+        super().__init__(f"{provider} unavailable ({reason or 'circuit open'}); retry in {retry_after:.0f}s")
+
+
+class DeadlineExceededError(Exception):
+    """
+    Raised when a call ran out of the caller's own time budget (`deadline`).
+    The provider isn't at fault: this doesn't count against its circuit, and
+    callers should fall back or give up on the step rather than defer.
+    """
+
+    def __init__(self, provider: str, reason: str = ""):
+        self.provider = provider
+        super().__init__(f"{provider} call ran out of time budget ({reason or 'deadline passed'})")
+
+
+@dataclass(frozen=True)
+class ProviderPolicy:
+    max_attempts: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 20.0
+    timeout: float = 60.0
+    failure_threshold: int = 5
+    reset_timeout: float = 120.0
+
+
+PROVIDER_POLICIES: Dict[str, ProviderPolicy] = {
+    "gemini": ProviderPolicy(max_attempts=3, base_delay=2.0, timeout=90.0),
+    "tavily": ProviderPolicy(max_attempts=3, base_delay=1.0, timeout=30.0),
+    "firecrawl": ProviderPolicy(max_attempts=2, base_delay=1.0, timeout=45.0),
+}
+
+
+def _status_code(exc: Exception) -> Optional[int]:
+    """
+    Pulls an HTTP status code out of the exception types our SDKs raise.
+    """
+
+    response = getattr(exc, 'response', None)
+    if response is not None and isinstance(getattr(response, 'status_code', None), int):
+        return response.status_code
+    for attribute in ('status_code', 'code'):
+        value = getattr(exc, attribute, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_transient_error(exc: Exception) -> bool:
+    """
+    True for rate limits, server errors, timeouts and dropped connections.
+    """
+
+    if isinstance(exc, (requests.exceptions.Timeout, requests.exceptions.ConnectionError, TimeoutError, ConnectionError)):
+        return True
+    return _status_code(exc) in RETRYABLE_STATUS_CODES
+
+
+def is_timeout_error(exc: Exception) -> bool:
+    if isinstance(exc, (requests.exceptions.Timeout, TimeoutError)):
+        return True
+    return _status_code(exc) in TIMEOUT_STATUS_CODES
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive transient failures and rejects
+    calls until `reset_timeout` has passed, then lets a single trial call
+    through (half-open) to decide whether to close again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+
+    def before_call(self):
+        with self.lock:
+            if self.opened_at is None:
+                return
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0 or self.trial_in_flight:
+                raise ProviderUnavailableError(self.name, max(remaining, 1.0))
+            self.trial_in_flight = True
+
+    def record_success(self):
+        with self.lock:
+            if self.opened_at is not None:
+                print(f"  - Circuit for {self.name} closed again.")
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    print(f"  - ⚠️ Circuit for {self.name} opened after {self.failures} consecutive failures.")
+                self.opened_at = time.monotonic()
+
+    def release_trial(self):
+        """
+        Ends a call that says nothing about the provider's health, freeing the
+        half-open trial slot without closing or re-opening the circuit.
+        """
+
+        with self.lock:
+            self.trial_in_flight = False
+
+    def retry_after(self) -> float:
+        with self.lock:
+            if self.opened_at is None:
+                return self.reset_timeout
+            return max(self.opened_at + self.reset_timeout - time.monotonic(), 1.0)
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if provider not in _breakers:
+            policy = PROVIDER_POLICIES.get(provider, ProviderPolicy())
+            _breakers[provider] = CircuitBreaker(provider, policy.failure_threshold, policy.reset_timeout)
+        return _breakers[provider]
+
+
+def provider_timeout(provider: str) -> float:
+    return PROVIDER_POLICIES.get(provider, ProviderPolicy()).timeout
+
+
+def call_provider(provider: str, func: Callable, *args, deadline: Optional[float] = None, **kwargs):
+    """
+    Calls func through the provider's circuit breaker, retrying transient
+    errors with full-jitter exponential backoff. Non-transient errors are
+    raised unchanged; exhausted retries raise ProviderUnavailableError.
+
+    `deadline` (epoch seconds) is the caller's own budget. A timeout that hits
+    it isn't counted against the circuit, and a retry that would run past it
+    isn't started; both raise DeadlineExceededError.
+    Successful calls are recorded in the usage table.
+    """
+
+    policy = PROVIDER_POLICIES.get(provider, ProviderPolicy())
+    breaker = get_breaker(provider)
+
+    for attempt in range(policy.max_attempts):
+        breaker.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if not is_transient_error(e):
+                # The provider answered; the request itself was bad.
+                breaker.record_success()
+                raise
+            if deadline is not None and is_timeout_error(e) and time.time() >= deadline - DEADLINE_SLACK_SECONDS:
+                breaker.release_trial()
+                raise DeadlineExceededError(provider, str(e)) from e
+            breaker.record_failure()
+            delay = random.uniform(0, min(policy.max_delay, policy.base_delay * 2 ** attempt))
+            if deadline is not None and time.time() + delay >= deadline:
+                raise DeadlineExceededError(provider, str(e)) from e
+            if attempt == policy.max_attempts - 1:
+                raise ProviderUnavailableError(provider, breaker.retry_after(), str(e)) from e
+            print(f"  - {provider} transient error ({e}). Retrying in {delay:.1f}s...")
+            time.sleep(delay)
+        else:
+            breaker.record_success()
+            track_provider_call(provider, func, kwargs, result)
+            return result
@@ -0,0 +1,194 @@
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from src.hyperion.config import get_settings
+
+# One sender pacing sends 5 minutes apart; a window can't usefully hold more than
+# this, and windows in different zones that overlap share the same slots.
+SEND_SPACING_SECONDS = 300
+
+COUNTRY_TIMEZONES = {
+    "united states": "America/New_York", "canada": "America/Toronto", "mexico": "America/Mexico_City",
+    "brazil": "America/Sao_Paulo", "united kingdom": "Europe/London", "ireland": "Europe/Dublin",
+    "germany": "Europe/Berlin", "france": "Europe/Paris", "netherlands": "Europe/Amsterdam",
+    "belgium": "Europe/Brussels", "spain": "Europe/Madrid", "italy": "Europe/Rome",
+    "switzerland": "Europe/Zurich", "austria": "Europe/Vienna", "sweden": "Europe/Stockholm",
+    "norway": "Europe/Oslo", "denmark": "Europe/Copenhagen", "finland": "Europe/Helsinki",
+    "poland": "Europe/Warsaw", "portugal": "Europe/Lisbon", "georgia": "Asia/Tbilisi",
+    "israel": "Asia/Jerusalem", "united arab emirates": "Asia/Dubai", "india": "Asia/Kolkata",
+    "singapore": "Asia/Singapore", "japan": "Asia/Tokyo", "australia": "Australia/Sydney",
+    "new zealand": "Pacific/Auckland", "south africa": "Africa/Johannesburg",
+}
+
+US_STATE_TIMEZONES = {
+    "california": "America/Los_Angeles", "washington": "America/Los_Angeles", "oregon": "America/Los_Angeles",
+    "nevada": "America/Los_Angeles", "arizona": "America/Phoenix", "colorado": "America/Denver",
+    "utah": "America/Denver", "idaho": "America/Denver", "montana": "America/Denver",
+    "new mexico": "America/Denver", "texas": "America/Chicago", "illinois": "America/Chicago",
+    "minnesota": "America/Chicago", "wisconsin": "America/Chicago", "missouri": "America/Chicago",
+    "tennessee": "America/Chicago", "louisiana": "America/Chicago", "oklahoma": "America/Chicago",
+    "alaska": "America/Anchorage", "hawaii": "Pacific/Honolulu",
+}
+
+TLD_TIMEZONES = {
+    "uk": "Europe/London", "ie": "Europe/Dublin", "de": "Europe/Berlin", "fr": "Europe/Paris",
+    "nl": "Europe/Amsterdam", "be": "Europe/Brussels", "es": "Europe/Madrid", "it": "Europe/Rome",
+    "ch": "Europe/Zurich", "at": "Europe/Vienna", "se": "Europe/Stockholm", "no": "Europe/Oslo",
+    "dk": "Europe/Copenhagen", "fi": "Europe/Helsinki", "pl": "Europe/Warsaw", "pt": "Europe/Lisbon",
+    "ge": "Asia/Tbilisi", "il": "Asia/Jerusalem", "ae": "Asia/Dubai", "in": "Asia/Kolkata",
+    "sg": "Asia/Singapore", "jp": "Asia/Tokyo", "au": "Australia/Sydney", "nz": "Pacific/Auckland",
+    "za": "Africa/Johannesburg", "ca": "America/Toronto", "mx": "America/Mexico_City", "br": "America/Sao_Paulo",
+}
+
+
+@lru_cache(maxsize=None)
+def _zone(name: str) -> Optional[ZoneInfo]:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def infer_timezone(time_zone: Optional[str] = None, country: Optional[str] = None,
+                   state: Optional[str] = None, domain: Optional[str] = None) -> str:
+    """
+    Best guess at a prospect's IANA timezone: an explicit zone, then US state,
+    then country, then the company domain's country TLD, then DEFAULT_TIMEZONE.
+    """
+
+    if time_zone and _zone(time_zone):
+        return time_zone
+    country = (country or '').strip().lower()
+    state = (state or '').strip().lower()
+    if country in ("united states", "usa", "us") and state in US_STATE_TIMEZONES:
+        return US_STATE_TIMEZONES[state]
+    if country in COUNTRY_TIMEZONES:
+        return COUNTRY_TIMEZONES[country]
+    tld = (domain or '').strip().lower().rstrip('/').rsplit('.', 1)[-1]
+    if tld in TLD_TIMEZONES:
+        return TLD_TIMEZONES[tld]
+    return get_settings().default_timezone
+
+
+def window_capacity() -> int:
+    settings = get_settings()
+    return max((settings.send_window_end_hour - settings.send_window_start_hour) * 3600 // SEND_SPACING_SECONDS, 1)
+
+
+def _next_business_day(day: date) -> date:
+    day += timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+def snap_to_window(moment: datetime, zone: ZoneInfo) -> datetime:
+    """
+    Returns the first local time at or after `moment` that falls inside a
+    weekday send window.
+    """
+
+    settings = get_settings()
+    start, end = time(settings.send_window_start_hour), time(settings.send_window_end_hour)
+    local = moment.astimezone(zone)
+    day = local.date()
+    if day.weekday() >= 5 or local.time() >= end:
+        return datetime.combine(_next_business_day(day), start, tzinfo=zone)
+    if local.time() < start:
+        return datetime.combine(day, start, tzinfo=zone)
+    return local
+
+
+def in_send_window(moment: datetime, zone_name: Optional[str]) -> bool:
+    """
+    True if `moment` falls inside a weekday send window in `zone_name`
+    (DEFAULT_TIMEZONE when it is missing or unknown).
+    """
+
+    zone = (_zone(zone_name) if zone_name else None) or _zone(get_settings().default_timezone)
+    return snap_to_window(moment, zone) == moment
+
+
+def schedule_send_times(requests: List[Tuple[str, datetime]]) -> List[datetime]:
+    """
+    Computes send times for many (timezone, earliest_utc) requests at once.
+
+    Requests are grouped by timezone and then by local send window (one per
+    weekday). Each window takes at most window_capacity() sends, spread evenly
+    from the earliest request to the window's close; the overflow rolls into
+    the next business day. Because one sender serves every zone, overlapping
+    windows then share SEND_SPACING_SECONDS slots in UTC (see _claim_slots).
+    Returns UTC datetimes in request order.
+    """
+
+    settings = get_settings()
+    end = time(settings.send_window_end_hour)
+    capacity = window_capacity()
+    planned: List[Tuple[datetime, int, ZoneInfo]] = []
+
+    by_zone: Dict[str, List[int]] = {}
+    for index, (zone_name, _) in enumerate(requests):
+        by_zone.setdefault(zone_name if _zone(zone_name) else settings.default_timezone, []).append(index)
+
+    for zone_name, indices in by_zone.items():
+        zone = _zone(zone_name)
+        windows: Dict[date, List[Tuple[datetime, int]]] = {}
+        for index in indices:
+            local = snap_to_window(requests[index][1], zone)
+            windows.setdefault(local.date(), []).append((local, index))
+
+        while windows:
+            day = min(windows)
+            items = sorted(windows.pop(day))
+            if len(items) > capacity:
+                rollover = _next_business_day(day)
+                opening = datetime.combine(rollover, time(settings.send_window_start_hour), tzinfo=zone)
+                windows.setdefault(rollover, []).extend((opening, index) for _, index in items[capacity:])
+                items = items[:capacity]
+
+            first = items[0][0]
+            span = datetime.combine(day, end, tzinfo=zone) - first
+            step = span / len(items)
+            for position, (earliest, index) in enumerate(items):
+                slot = max(earliest, first + step * position)
+                planned.append((slot.astimezone(timezone.utc), index, zone))
+
+    return _claim_slots(planned, len(requests))
+
+
+def _claim_slots(planned: List[Tuple[datetime, int, ZoneInfo]], count: int) -> List[datetime]:
+    """
+    Gives each planned (utc_time, index, zone) send its own SEND_SPACING_SECONDS
+    slot across all zones, earliest first. A send whose slot is taken moves to
+    the next free one, and back into its zone's send window if that falls outside it.
+    """
+
+    results: List[Optional[datetime]] = [None] * count
+    next_free: Dict[int, int] = {}  # taken slot -> a later slot to try
+
+    def free_slot(slot: int) -> int:
+        path = []
+        while slot in next_free:
+            path.append(slot)
+            slot = next_free[slot]
+        for taken in path:
+            next_free[taken] = slot
+        return slot
+
+    for moment, index, zone in sorted(planned, key=lambda item: item[:2]):
+        while True:
+            slot = free_slot(int(moment.timestamp()) // SEND_SPACING_SECONDS)
+            if slot * SEND_SPACING_SECONDS > moment.timestamp():
+                moment = datetime.fromtimestamp(slot * SEND_SPACING_SECONDS, timezone.utc)
+            snapped = snap_to_window(moment, zone)
+            if snapped == moment:
+                break
+            moment = snapped
+        next_free[slot] = slot + 1
+        results[index] = moment.astimezone(timezone.utc)
+    return results
+
+
+def schedule_send_time(zone_name: str, earliest: datetime) -> datetime:
+    return schedule_send_times([(zone_name, earliest)])[0]
@@ -0,0 +1,118 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+from src.hyperion.models import SequenceAction
+from src.hyperion.database.operations import (
+    get_sequence_steps, update_sequence_after_send, update_sequence_status
+)
+
+STEP_KINDS = {"research", "follow_up"}
+
+# A step runs only if its condition holds for the prospect's stored step-1
+# research; otherwise the sequence moves straight on to the next step.
+STEP_CONDITIONS: Dict[str, Callable[[Optional[Dict]], bool]] = {
+    "always": lambda research: True,
+    "has_source_url": lambda research: bool(research and research.get('source_url')),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class SequenceStep:
+    number: int
+    kind: str
+    wait_days: float
+    condition: str
+    template: str
+    is_last: bool
+
+    def applies_to(self, research: Optional[Dict]) -> bool:
+        return STEP_CONDITIONS[self.condition](research)
+
+
+class CompiledSequence:
+    """
+    A sequence definition turned into a lookup table: step number -> step,
+    with each step knowing whether it is the last one.
+    """
+
+    def __init__(self, sequence_id: str, steps: Tuple[SequenceStep, ...]):
+        self.sequence_id = sequence_id
+        self.steps = {step.number: step for step in steps}
+
+    def step(self, number: int) -> Optional[SequenceStep]:
+        return self.steps.get(number)
+
+    def next_step_number(self, number: int) -> Optional[int]:
+        later = [n for n in self.steps if n > number]
+        return min(later) if later else None
+
+
+def compile_sequences(rows) -> Dict[str, CompiledSequence]:
+    """
+    Validates step rows and groups them into compiled sequences.
+    Raises ValueError for unknown step kinds or conditions so a bad definition
+    fails at startup rather than mid-campaign.
+    """
+
+    grouped: Dict[str, list] = {}
+    for row in rows:
+        if row['kind'] not in STEP_KINDS:
+            raise ValueError(f"Sequence {row['sequence_id']} step {row['step_number']}: unknown kind '{row['kind']}'")
+        if row['condition'] not in STEP_CONDITIONS:
+            raise ValueError(f"Sequence {row['sequence_id']} step {row['step_number']}: unknown condition '{row['condition']}'")
+        grouped.setdefault(row['sequence_id'], []).append(row)
+
+    sequences = {}
+    for sequence_id, step_rows in grouped.items():
+        step_rows.sort(key=lambda row: row['step_number'])
+        last_number = step_rows[-1]['step_number']
+        steps = tuple(
+            SequenceStep(
+                number=row['step_number'], kind=row['kind'], wait_days=row['wait_days'],
+                condition=row['condition'], template=row['template'],
+                is_last=row['step_number'] == last_number
+            )
+            for row in step_rows
+        )
+        sequences[sequence_id] = CompiledSequence(sequence_id, steps)
+    return sequences
+
+
+@lru_cache(maxsize=1)
+def load_sequences() -> Dict[str, CompiledSequence]:
+    """
+    Reads and compiles every sequence once per process. Call reload_sequences()
+    after editing the sequence_steps table.
+    """
+
+    sequences = compile_sequences(get_sequence_steps())
+    print(f"-> Compiled {len(sequences)} sequence(s).")
+    return sequences
+
+
+def reload_sequences() -> Dict[str, CompiledSequence]:
+    load_sequences.cache_clear()
+    return load_sequences()
+
+
+def get_step(sequence_id: str, step_number: int) -> Optional[SequenceStep]:
+    sequence = load_sequences().get(sequence_id)
+    return sequence.step(step_number) if sequence else None
+
+
+def advance_sequence(action: SequenceAction):
+    """
+    Moves an enrollment past its current step: schedules the next step after the
+    current step's wait, or finishes the sequence if that was the last step.
+    """
+
+    sequence = load_sequences().get(action.sequence_id)
+    step = sequence.step(action.current_step) if sequence else None
+    next_number = sequence.next_step_number(action.current_step) if sequence else None
+
+    if step is None or next_number is None:
+        update_sequence_status(action.prospect_sequence_id, 'finished')
+        return
+
+    # Steps may be numbered with gaps; jump straight to the next defined one.
+    update_sequence_after_send(action.prospect_sequence_id, next_number, step.wait_days)
@@ -0,0 +1,433 @@
+import heapq
+import math
+import random
+from bisect import bisect_right
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Deque, Dict, List, Optional, Tuple
+from src.hyperion.database.operations import DEFAULT_SEQUENCE_STEPS
+from src.hyperion.resilience import PROVIDER_POLICIES, ProviderPolicy
+from src.hyperion.send_windows import schedule_send_times, in_send_window
+from src.hyperion.sequences import CompiledSequence, compile_sequences
+
+# Provider calls behind each kind of sequence step, in the order the pipeline makes them:
+# research question, Tavily search, hook synthesis, email (the default non-fused graph).
+STEP_CALLS = {
+    "research": ("gemini", "tavily", "gemini", "gemini"),
+    "follow_up": ("gemini",),
+}
+# Mirrors the scheduler's pacing sleep and the supervisor's defaults.
+SCHEDULER_PACING_SECONDS = 300
+SEND_QUEUE_SIZE = 5
+# Mirror pipeline.defer_failed_send (not imported: pipeline pulls in the agent graph).
+SEND_RETRY_BASE_SECONDS = 300
+MAX_SEND_ATTEMPTS = 4
+BACKLOG_SAMPLE_SECONDS = 3600
+
+# Outcomes of one simulated research attempt.
+SEND, SKIP, FAILED, DEFERRED = "send", "skip", "failed", "deferred"
+
+
+@dataclass(frozen=True)
+class ProviderModel:
+    """
+    Lognormal call latency around `median_seconds`, and the chance a call ends
+    in ProviderUnavailableError (i.e. after call_provider's own retries).
+    """
+
+    median_seconds: float
+    spread: float = 0.5
+    failure_rate: float = 0.0
+
+    def latency(self, rng: random.Random) -> float:
+        return rng.lognormvariate(math.log(self.median_seconds), self.spread)
+
+
+DEFAULT_PROVIDERS: Dict[str, ProviderModel] = {
+    "gemini": ProviderModel(median_seconds=6.0, spread=0.6, failure_rate=0.01),
+    "tavily": ProviderModel(median_seconds=4.0, spread=0.5, failure_rate=0.01),
+    "smtp": ProviderModel(median_seconds=1.5, spread=0.3, failure_rate=0.002),
+}
+
+DEFAULT_TIMEZONE_MIX: Dict[str, float] = {
+    "America/New_York": 0.45,
+    "America/Chicago": 0.15,
+    "America/Los_Angeles": 0.2,
+    "Europe/London": 0.2,
+}
+
+
+@dataclass
+class SimulationConfig:
+    prospects: int = 1000
+    # 0 simulates scheduler.py (one action at a time); N > 0 simulates the supervisor with N research workers.
+    research_workers: int = 0
+    send_pacing_seconds: float = SCHEDULER_PACING_SECONDS
+    sequence_id: str = "seq_standard_01"
+    sequence_rows: List[Dict] = field(default_factory=lambda: [
+        dict(zip(("sequence_id", "step_number", "kind", "wait_days", "condition", "template"), row))
+        for row in DEFAULT_SEQUENCE_STEPS
+    ])
+    providers: Dict[str, ProviderModel] = field(default_factory=lambda: dict(DEFAULT_PROVIDERS))
+    timezone_mix: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_TIMEZONE_MIX))
+    no_hook_rate: float = 0.15
+    reply_rate: float = 0.04
+    # Median delay between a send and its reply (lognormal, like provider latency).
+    reply_delay_hours: float = 24.0
+    start: Optional[datetime] = None
+    max_days: int = 180
+    seed: int = 1
+
+
+@dataclass
+class _Enrollment:
+    enrollment_id: int
+    zone: str
+    step: int = 1
+    status: str = "active"
+    research: Optional[Dict] = None
+    next_at: Optional[datetime] = None
+    replies_at: Optional[datetime] = None
+    send_failures: int = 0
+
+
+@dataclass
+class SimulationResult:
+    start: datetime
+    end: datetime
+    completed_at: Optional[datetime]
+    sends_per_day: Dict[date, int]
+    backlog: List[Tuple[datetime, int]]
+    totals: Counter
+
+    @property
+    def days_to_complete(self) -> Optional[float]:
+        if self.completed_at is None:
+            return None
+        return (self.completed_at - self.start).total_seconds() / 86400
+
+
+class CampaignSimulator:
+    """
+    Replays a campaign against a virtual clock. Enrollment, send-window
+    scheduling (schedule_send_times) and step advancement (the compiled
+    sequence) are the production code; provider calls, SMTP and replies are
+    sampled from the configured models, and the scheduler loop or supervisor
+    pipeline is modelled as discrete events, so months of campaign run in seconds.
+    """
+
+    def __init__(self, config: SimulationConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.sequence: CompiledSequence = compile_sequences(config.sequence_rows)[config.sequence_id]
+        self.start = (config.start or datetime.now(timezone.utc)).astimezone(timezone.utc)
+        self.end = self.start + timedelta(days=config.max_days)
+        self.totals: Counter = Counter()
+        self.sends: Counter = Counter()
+        self.due_times: List[datetime] = []
+        self.start_times: List[datetime] = []
+        self.due_heap: List[Tuple[datetime, int]] = []
+        self.enrollments: List[_Enrollment] = []
+        self.open_enrollments = 0
+        self.completed_at: Optional[datetime] = None
+
+    # --- State changes, mirroring the pipeline and database operations ---
+
+    def _enroll(self):
+        zones, weights = zip(*self.config.timezone_mix.items())
+        for index in range(self.config.prospects):
+            self.enrollments.append(_Enrollment(index, self.rng.choices(zones, weights)[0]))
+        send_times = schedule_send_times([(e.zone, self.start) for e in self.enrollments])
+        for enrollment, send_time in zip(self.enrollments, send_times):
+            self._schedule(enrollment, send_time)
+        self.open_enrollments = len(self.enrollments)
+        self.totals["enrolled"] = len(self.enrollments)
+
+    def _schedule(self, enrollment: _Enrollment, when: datetime):
+        enrollment.next_at = when
+        self.due_times.append(when)
+        heapq.heappush(self.due_heap, (when, enrollment.enrollment_id))
+
+    def _close(self, enrollment: _Enrollment, status: str, now: datetime):
+        if enrollment.status != "active":
+            return
+        enrollment.status = status
+        self.open_enrollments -= 1
+        if self.open_enrollments == 0:
+            self.completed_at = now
+
+    def _advance(self, enrollment: _Enrollment, now: datetime):
+        """advance_sequence: next step after the wait, snapped into the send window."""
+        step = self.sequence.step(enrollment.step)
+        next_number = self.sequence.next_step_number(enrollment.step)
+        if step is None or next_number is None:
+            self._close(enrollment, "finished", now)
+            return
+        enrollment.step = next_number
+        self._schedule(enrollment, schedule_send_times([(enrollment.zone, now + timedelta(days=step.wait_days))])[0])
+
+    def _defer(self, enrollment: _Enrollment, now: datetime, provider: str):
+        self.totals["deferred"] += 1
+        retry_after = PROVIDER_POLICIES.get(provider, ProviderPolicy()).reset_timeout
+        self._reschedule(enrollment, now + timedelta(seconds=retry_after))
+
+    def _reschedule(self, enrollment: _Enrollment, earliest: datetime):
+        """defer_sequence_action: the prospect's first send-window slot after `earliest`."""
+        self._schedule(enrollment, schedule_send_times([(enrollment.zone, earliest)])[0])
+
+    def _in_window(self, enrollment: _Enrollment, now: datetime, sends_ahead: int = 0) -> bool:
+        """
+        The pipeline's check before research and before sending: if the send
+        (after `sends_ahead` paced sends) would fall outside the window, the
+        action is moved to the next one.
+        """
+        expected = now + timedelta(seconds=self.config.send_pacing_seconds * sends_ahead)
+        if in_send_window(now, enrollment.zone) and in_send_window(expected, enrollment.zone):
+            return True
+        self.start_times.append(now)
+        self._reschedule(enrollment, expected)
+        return False
+
+    def _compose(self, enrollment: _Enrollment) -> Tuple[str, float, Optional[str]]:
+        """
+        compose_step_email with sampled provider calls.
+        Returns (outcome, seconds taken, provider that failed).
+        """
+
+        step = self.sequence.step(enrollment.step)
+        if step is None:
+            return SKIP, 0.0, None
+        if step.kind != "research" and not step.applies_to(enrollment.research):
+            return SKIP, 0.0, None
+
+        elapsed = 0.0
+        for provider in STEP_CALLS.get(step.kind, ()):
+            model = self.config.providers[provider]
+            elapsed += model.latency(self.rng)
+            if self.rng.random() < model.failure_rate:
+                return DEFERRED, elapsed, provider
+        if step.kind == "research":
+            if self.rng.random() < self.config.no_hook_rate:
+                return FAILED, elapsed, None
+            enrollment.research = {"hook": "simulated", "source_url": "simulated"}
+        return SEND, elapsed, None
+
+    def _apply(self, enrollment: _Enrollment, outcome: str, now: datetime, provider: Optional[str]):
+        if outcome == SKIP:
+            self.totals["skipped"] += 1
+            self._advance(enrollment, now)
+        elif outcome == FAILED:
+            self.totals["failed"] += 1
+            self._close(enrollment, "failed", now)
+        elif outcome == DEFERRED:
+            self._defer(enrollment, now, provider)
+
+    def _send(self, enrollment: _Enrollment, now: datetime) -> Tuple[bool, float]:
+        smtp = self.config.providers["smtp"]
+        elapsed = smtp.latency(self.rng)
+        if self.rng.random() < smtp.failure_rate:
+            # send_email returned None: defer_failed_send backs off, then fails the action.
+            self.totals["send_errors"] += 1
+            enrollment.send_failures += 1
+            failed_at = now + timedelta(seconds=elapsed)
+            if enrollment.send_failures >= MAX_SEND_ATTEMPTS:
+                self.totals["failed"] += 1
+                self._close(enrollment, "failed", failed_at)
+            else:
+                retry_after = SEND_RETRY_BASE_SECONDS * 2 ** (enrollment.send_failures - 1)
+                self._reschedule(enrollment, failed_at + timedelta(seconds=retry_after))
+            return False, elapsed
+        sent_at = now + timedelta(seconds=elapsed)
+        enrollment.send_failures = 0
+        self.sends[sent_at.date()] += 1
+        self.totals["sent"] += 1
+        self._advance(enrollment, sent_at)
+        if enrollment.replies_at is None and self.rng.random() < self.config.reply_rate:
+            # The reply stops the sequence when it arrives (process_reply), whatever step is due next.
+            delay = self.rng.lognormvariate(math.log(self.config.reply_delay_hours), 1.0)
+            enrollment.replies_at = sent_at + timedelta(hours=delay)
+            heapq.heappush(self.due_heap, (enrollment.replies_at, enrollment.enrollment_id))
+        return True, elapsed
+
+    def _pop_due(self, now: datetime) -> List[_Enrollment]:
+        due = []
+        while self.due_heap and self.due_heap[0][0] <= now:
+            when, enrollment_id = heapq.heappop(self.due_heap)
+            enrollment = self.enrollments[enrollment_id]
+            if enrollment.status != "active":
+                continue
+            if enrollment.replies_at == when:
+                self.totals["replied"] += 1
+                self._close(enrollment, "replied", when)
+            elif enrollment.next_at == when:
+                due.append(enrollment)
+        # get_due_actions moves actions that came due outside their window to the next one.
+        outside = [enrollment for enrollment in due if not in_send_window(now, enrollment.zone)]
+        if outside:
+            self.start_times.extend([now] * len(outside))
+            for enrollment, send_time in zip(outside, schedule_send_times([(e.zone, now) for e in outside])):
+                self._schedule(enrollment, send_time)
+            due = [enrollment for enrollment in due if in_send_window(now, enrollment.zone)]
+        return due
+
+    # --- scheduler.py: fetch everything due, process it serially, sleep until the next action ---
+
+    def _run_scheduler(self):
+        now = self.start
+        while self.open_enrollments and self.due_heap and now < self.end:
+            due = self._pop_due(now)
+            if not due:
+                now = max(now, self.due_heap[0][0])
+                continue
+            for i, enrollment in enumerate(due):
+                if enrollment.status != "active" or not self._in_window(enrollment, now):
+                    continue
+                self.start_times.append(now)
+                outcome, elapsed, provider = self._compose(enrollment)
+                now += timedelta(seconds=elapsed)
+                if outcome != SEND:
+                    self._apply(enrollment, outcome, now, provider)
+                    continue
+                if not self._in_window(enrollment, now):
+                    self.totals["deferred"] += 1
+                    continue
+                sent, elapsed = self._send(enrollment, now)
+                now += timedelta(seconds=elapsed)
+                if sent and i < len(due) - 1:
+                    now += timedelta(seconds=self.config.send_pacing_seconds)
+
+    # --- supervisor.py: research workers feed a bounded send queue drained by one paced sender ---
+
+    def _run_supervisor(self):
+        events: List[Tuple[datetime, int, str, object]] = []
+        sequence_numbers = iter(range(1 << 62))
+
+        def at(when: datetime, kind: str, payload=None):
+            heapq.heappush(events, (when, next(sequence_numbers), kind, payload))
+
+        research_queue: Deque[_Enrollment] = deque()
+        send_queue: Deque[_Enrollment] = deque()
+        blocked: Deque[_Enrollment] = deque()  # researched, waiting for send-queue space
+        idle_workers = self.config.research_workers
+        sender_idle = True
+        wakes = set()  # times the dispatcher is already due to wake at
+
+        def dispatch(now: datetime):
+            nonlocal idle_workers, sender_idle
+            for enrollment in self._pop_due(now):
+                research_queue.append(enrollment)
+            if self.due_heap and self.due_heap[0][0] not in wakes:
+                wakes.add(self.due_heap[0][0])
+                at(self.due_heap[0][0], "wake")
+            while idle_workers and research_queue:
+                enrollment = research_queue.popleft()
+                if enrollment.status != "active" or not self._in_window(enrollment, now, len(send_queue) + 1):
+                    continue
+                idle_workers -= 1
+                self.start_times.append(now)
+                outcome, elapsed, provider = self._compose(enrollment)
+                at(now + timedelta(seconds=elapsed), "researched", (enrollment, outcome, provider))
+            while send_queue and send_queue[0].status != "active":
+                # Replied while queued: nothing left to send.
+                send_queue.popleft()
+            while sender_idle and send_queue:
+                enrollment = send_queue.popleft()
+                if blocked:
+                    send_queue.append(blocked.popleft())
+                    idle_workers += 1
+                if not self._in_window(enrollment, now):
+                    self.totals["deferred"] += 1
+                    continue
+                sender_idle = False
+                _, elapsed = self._send(enrollment, now)
+                finished = now + timedelta(seconds=elapsed)
+                at(finished + timedelta(seconds=self.config.send_pacing_seconds), "sender_free")
+
+        at(self.start, "wake")
+        while events and self.open_enrollments:
+            now, _, kind, payload = heapq.heappop(events)
+            if now >= self.end:
+                break
+            if kind == "researched":
+                enrollment, outcome, provider = payload
+                if enrollment.status != "active":
+                    idle_workers += 1
+                elif outcome == SEND and len(send_queue) >= SEND_QUEUE_SIZE:
+                    blocked.append(enrollment)
+                else:
+                    idle_workers += 1
+                    if outcome == SEND:
+                        send_queue.append(enrollment)
+                    else:
+                        self._apply(enrollment, outcome, now, provider)
+            elif kind == "sender_free":
+                sender_idle = True
+            else:
+                wakes.discard(now)
+            dispatch(now)
+
+    def run(self) -> SimulationResult:
+        self._enroll()
+        if self.config.research_workers > 0:
+            self._run_supervisor()
+        else:
+            self._run_scheduler()
+        self.totals["unfinished"] = self.open_enrollments
+
+        last = self.completed_at or min(self.end, max(self.due_times, default=self.start))
+        return SimulationResult(
+            start=self.start,
+            end=last,
+            completed_at=self.completed_at,
+            sends_per_day=dict(sorted(self.sends.items())),
+            backlog=self._backlog_series(last),
+            totals=self.totals
+        )
+
+    def _backlog_series(self, last: datetime) -> List[Tuple[datetime, int]]:
+        """
+        Due-but-not-yet-started actions, sampled hourly: every schedule makes an
+        action due once and every processing attempt starts one.
+        """
+
+        due_times, start_times = sorted(self.due_times), sorted(self.start_times)
+        series = []
+        moment = self.start
+        while moment <= last:
+            series.append((moment, bisect_right(due_times, moment) - bisect_right(start_times, moment)))
+            moment += timedelta(seconds=BACKLOG_SAMPLE_SECONDS)
+        return series
+
+
+def simulate_campaign(config: Optional[SimulationConfig] = None) -> SimulationResult:
+    return CampaignSimulator(config or SimulationConfig()).run()
+
+
+def format_simulation_report(config: SimulationConfig, result: SimulationResult) -> str:
+    mode = f"supervisor, {config.research_workers} research worker(s)" if config.research_workers else "scheduler (serial)"
+    totals = result.totals
+    lines = [
+        f"--- Campaign simulation: {config.prospects} prospect(s), {mode}, pacing {config.send_pacing_seconds:.0f}s ---",
+        f"  Sent {totals['sent']}, replied {totals['replied']}, failed {totals['failed']}, "
+        f"skipped {totals['skipped']}, deferred {totals['deferred']}, send errors {totals['send_errors']}.",
+    ]
+    if result.completed_at:
+        lines.append(f"  Campaign complete after {result.days_to_complete:.1f} day(s) ({result.completed_at:%Y-%m-%d %H:%M} UTC).")
+    else:
+        lines.append(f"  Not complete after {config.max_days} day(s); {totals['unfinished']} enrollment(s) still open.")
+
+    sending_days = [count for count in result.sends_per_day.values() if count]
+    if sending_days:
+        lines.append(f"  Sends/day: avg {sum(sending_days) / len(sending_days):.0f} over {len(sending_days)} sending day(s), "
+                     f"peak {max(sending_days)}.")
+    peak_moment, peak = max(result.backlog, key=lambda sample: sample[1], default=(result.start, 0))
+    lines.append(f"  Peak backlog: {peak} due action(s) waiting at {peak_moment:%Y-%m-%d %H:%M} UTC.")
+
+    lines.append("  Day         Sends  Max backlog")
+    backlog_by_day: Dict[date, int] = {}
+    for moment, waiting in result.backlog:
+        backlog_by_day[moment.date()] = max(backlog_by_day.get(moment.date(), 0), waiting)
+    for day in sorted(set(result.sends_per_day) | set(backlog_by_day)):
+        lines.append(f"  {day}  {result.sends_per_day.get(day, 0):>5}  {backlog_by_day.get(day, 0):>11}")
+    return "\n".join(lines)
@@ -0,0 +1,89 @@
+import json
+import hashlib
+from typing import List, Dict, Optional
+from src.hyperion.clients.apollo_client import ApolloClient
+from src.hyperion.prospect_filter import KnownProspectFilter
+from src.hyperion.database.operations import add_prospects, get_sourcing_cursor, save_sourcing_cursor
+
+DEFAULT_BATCH_SIZE = 200
+
+
+def search_cursor_name(titles: List[str], locations: List[str], company_employee_counts: List[str]) -> str:
+    """
+    Derives a stable cursor name from the search criteria.
+    """
+
+    criteria = json.dumps([sorted(titles), sorted(locations), sorted(company_employee_counts)])
+    return "apollo_" + hashlib.sha1(criteria.encode('utf-8')).hexdigest()[:16]
+
+
+def source_prospects_from_apollo(
+    client: ApolloClient,
+    titles: List[str],
+    locations: List[str],
+    company_employee_counts: List[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    resume: bool = True,
+    enrich: bool = True,
+    skip_known_domains: bool = False,
+    known_filter: Optional[KnownProspectFilter] = None
+) -> Dict:
+    """
+    Streams every page of an Apollo search into the prospects table.
+
+    Contacts already in the database (by id or email, and optionally by company
+    domain) are dropped before any enrichment call. Contacts without an email
+    are enriched when `enrich` is set. New contacts are written in batches, and
+    the search cursor is saved after each flush so an interrupted run picks up
+    at the first unsaved page.
+    """
+
+    if known_filter is None:
+        known_filter = KnownProspectFilter.from_database()
+
+    cursor_name = search_cursor_name(titles, locations, company_employee_counts)
+    start_page = 1
+    if resume:
+        saved = get_sourcing_cursor(cursor_name)
+        if saved:
+            start_page = saved['next_page']
+            if saved['total_pages'] and start_page > saved['total_pages']:
+                print(f"-> Search {cursor_name} already fully sourced.")
+                return {"pages": 0, "contacts": 0, "enriched": 0, "inserted": 0}
+            print(f"-> Resuming search {cursor_name} from page {start_page}.")
+
+    stats = {"pages": 0, "contacts": 0, "enriched": 0, "inserted": 0}
+    batch = []
+    total_pages = None
+
+    for page, total_pages, contacts in client.iter_people_pages(
+        titles, locations, company_employee_counts, start_page=start_page
+    ):
+        for contact in contacts:
+            if known_filter.match(contact, match_domain=skip_known_domains):
+                continue
+            if not contact.get('email') and enrich:
+                contact = client.enrich_person(contact) or contact
+                stats["enriched"] += 1
+            if contact.get('email'):
+                known_filter.add(contact)
+                batch.append(contact)
+        stats["pages"] += 1
+        stats["contacts"] += len(contacts)
+
+        if len(batch) >= batch_size or page == total_pages:
+            stats["inserted"] += add_prospects(batch)
+            batch = []
+            save_sourcing_cursor(cursor_name, page + 1, total_pages)
+            print(f"  - Page {page}/{total_pages} saved. {stats['inserted']} new prospect(s) so far.")
+
+    if batch:
+        # Iteration stopped early on an error; keep what we fetched but leave the cursor
+        # on the last flushed page so the unsaved pages are fetched again.
+        stats["inserted"] += add_prospects(batch)
+
+    print(f"-> Sourcing finished: {stats['pages']} page(s), {stats['contacts']} contact(s), "
+          f"{stats['enriched']} enrichment(s), {stats['inserted']} new prospect(s).")
+    print(f"-> {known_filter.report()}")
+    stats["filter"] = dict(known_filter.stats)
+    return stats
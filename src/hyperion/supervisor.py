@@ -0,0 +1,226 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Set
+
+from src.hyperion.database.operations import (
+    get_due_actions, get_prospect_by_id,
+    defer_sequence_action, get_next_action_time, flush_pending_writes
+)
+from src.hyperion.models import Prospect, SequenceAction
+from src.hyperion.agents.research_agent import build_agent_graph
+from src.hyperion.pipeline import (
+    compose_step_email, send_step_email, complete_send, fail_action, defer_failed_send, SKIP, FAILED
+)
+from src.hyperion.sequences import advance_sequence, load_sequences
+from src.hyperion.resilience import ProviderUnavailableError
+from src.hyperion.usage import BudgetExhaustedError
+from src.hyperion.notifications import SchedulerWakeup
+from src.hyperion.send_windows import in_send_window, infer_timezone
+from src.hyperion.reply_ingestor import ReplyIngestionService
+from src.hyperion.reply_parser import process_reply
+from src.hyperion.profiling import run_profiled
+
+RESEARCH_WORKERS = 3
+RESEARCH_QUEUE_SIZE = 6
+SEND_QUEUE_SIZE = 5
+REPLY_QUEUE_SIZE = 20
+SEND_PACING_SECONDS = 300
+MAX_IDLE_SLEEP_SECONDS = 3600
+# Lower bound on the dispatcher's sleep, so nothing that stays due can make it spin.
+MIN_IDLE_SLEEP_SECONDS = 1
+
+
+class Supervisor:
+    """
+    Runs the whole pipeline in one process as concurrent asyncio tasks:
+
+        dispatcher -> research queue -> research workers -> send queue -> sender
+        reply ingestor (IMAP IDLE thread) -> reply queue -> triage
+
+    Every queue is bounded, so a slow stage pushes back on the one before it
+    instead of piling up work (e.g. research pauses while the sender is pacing
+    and its queue is full). Blocking calls (the agent, SMTP, SQLite, Gemini)
+    run in worker threads so no stage stalls the event loop.
+    """
+
+    def __init__(self, research_workers: int = RESEARCH_WORKERS, send_pacing: float = SEND_PACING_SECONDS,
+                 ingest_replies: bool = True):
+        self.research_workers = research_workers
+        self.send_pacing = send_pacing
+        self.ingest_replies = ingest_replies
+        self.research_queue: asyncio.Queue = asyncio.Queue(maxsize=RESEARCH_QUEUE_SIZE)
+        self.send_queue: asyncio.Queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.reply_queue: asyncio.Queue = asyncio.Queue(maxsize=REPLY_QUEUE_SIZE)
+        # Actions stay due in the database until they're sent, so the dispatcher
+        # tracks what it has already handed out.
+        self.in_flight: Set[int] = set()
+        self.action_finished = asyncio.Event()
+        self.research_agent = None
+        self.reply_service: Optional[ReplyIngestionService] = None
+        # Replies waiting out a Gemini outage before going back on the reply queue.
+        self.retrying_replies: Set[asyncio.Task] = set()
+
+    def _finish(self, action: SequenceAction):
+        self.in_flight.discard(action.prospect_sequence_id)
+        self.action_finished.set()
+
+    async def _seconds_until_next_action(self) -> float:
+        # Actions in flight are still due in the database; counting them would make
+        # the dispatcher spin (or give up and sleep past the next real one).
+        next_action_time = await asyncio.to_thread(get_next_action_time, tuple(self.in_flight))
+        if next_action_time is None:
+            return MAX_IDLE_SLEEP_SECONDS
+        delay = (next_action_time - datetime.now(timezone.utc)).total_seconds()
+        return min(max(delay, MIN_IDLE_SLEEP_SECONDS), MAX_IDLE_SLEEP_SECONDS)
+
+    async def dispatcher(self, wakeup: SchedulerWakeup):
+        while True:
+            self.action_finished.clear()
+            due_actions = await asyncio.to_thread(get_due_actions)
+            new_actions = [a for a in due_actions if a.prospect_sequence_id not in self.in_flight]
+            if new_actions:
+                print(f"[dispatcher] {len(new_actions)} new due action(s).")
+            for action in new_actions:
+                self.in_flight.add(action.prospect_sequence_id)
+                await self.research_queue.put(action)
+
+            delay = await self._seconds_until_next_action()
+            finished = asyncio.create_task(self.action_finished.wait())
+            notified = asyncio.create_task(wakeup.wait_async(delay))
+            await asyncio.wait({finished, notified}, return_when=asyncio.FIRST_COMPLETED)
+            finished.cancel()
+            notified.cancel()
+
+    async def research_worker(self, worker_id: int):
+        while True:
+            action = await self.research_queue.get()
+            try:
+                await self._research(action, worker_id)
+            except Exception as e:
+                print(f"[research-{worker_id}] Error on action {action.prospect_sequence_id}: {e}")
+                await asyncio.to_thread(fail_action, action, f"error: {e}")
+                self._finish(action)
+            finally:
+                self.research_queue.task_done()
+
+    async def _research(self, action: SequenceAction, worker_id: int):
+        prospect_id = action.prospect_id
+        prospect: Optional[Prospect] = await asyncio.to_thread(get_prospect_by_id, prospect_id)
+        if not prospect:
+            print(f"[research-{worker_id}] Prospect data not found for id {prospect_id}.")
+            await asyncio.to_thread(fail_action, action, "prospect not found")
+            self._finish(action)
+            return
+
+        # Don't research what the paced sender can't send before the window closes:
+        # the action may have waited in the research queue, and the send queue is ahead of it.
+        zone = prospect.timezone or infer_timezone(domain=prospect.company_domain)
+        now = datetime.now(timezone.utc)
+        expected_send = now + timedelta(seconds=self.send_pacing * (self.send_queue.qsize() + 1))
+        if not (in_send_window(now, zone) and in_send_window(expected_send, zone)):
+            print(f"[research-{worker_id}] {prospect.full_name}'s send window closes before the send. Rescheduling.")
+            delay = (expected_send - now).total_seconds()
+            await asyncio.to_thread(defer_sequence_action, action.prospect_sequence_id, delay)
+            self._finish(action)
+            return
+
+        print(f"[research-{worker_id}] Step {action.current_step} for {prospect.full_name}...")
+        try:
+            outcome, email_parts, reason = await asyncio.to_thread(
+                run_profiled, f"step{action.current_step}_{prospect_id}",
+                compose_step_email, self.research_agent, action, prospect
+            )
+        except (ProviderUnavailableError, BudgetExhaustedError) as e:
+            print(f"[research-{worker_id}] {e}. Deferring prospect.")
+            await asyncio.to_thread(defer_sequence_action, action.prospect_sequence_id, e.retry_after)
+            self._finish(action)
+            return
+
+        if outcome == SKIP:
+            await asyncio.to_thread(advance_sequence, action)
+            self._finish(action)
+            return
+        if outcome == FAILED:
+            print(f"[research-{worker_id}] Skipping {prospect.full_name}: {reason}.")
+            await asyncio.to_thread(fail_action, action, reason)
+            self._finish(action)
+            return
+
+        await self.send_queue.put((action, prospect, email_parts))
+
+    async def sender(self):
+        while True:
+            action, prospect, (subject, body) = await self.send_queue.get()
+            zone = prospect.timezone or infer_timezone(domain=prospect.company_domain)
+            if not in_send_window(datetime.now(timezone.utc), zone):
+                print(f"[sender] {prospect.full_name}'s send window closed while queued. Rescheduling.")
+                await asyncio.to_thread(defer_sequence_action, action.prospect_sequence_id, 0)
+                self._finish(action)
+                self.send_queue.task_done()
+                continue
+            try:
+                message_id = await asyncio.to_thread(send_step_email, action, prospect, subject, body)
+                if message_id:
+                    await asyncio.to_thread(complete_send, action, message_id)
+                    print(f"[sender] Email sent to {prospect.full_name}. Pacing for {self.send_pacing:.0f}s.")
+                else:
+                    # Defer before _finish releases it, or the dispatcher would research it again at once.
+                    print(f"[sender] Email to {prospect.full_name} was not sent. Deferring with backoff.")
+                    await asyncio.to_thread(defer_failed_send, action)
+            except Exception as e:
+                print(f"[sender] Error sending email: {e}")
+                await asyncio.to_thread(fail_action, action, f"send error: {e}")
+            finally:
+                self._finish(action)
+                self.send_queue.task_done()
+            await asyncio.sleep(self.send_pacing)
+
+    async def triage(self):
+        while True:
+            reply = await self.reply_queue.get()
+            try:
+                await asyncio.to_thread(process_reply, reply)
+            except ProviderUnavailableError as e:
+                print(f"[triage] Gemini unavailable; retrying reply from {reply['from']} in {e.retry_after:.0f}s.")
+                task = asyncio.create_task(self._requeue_reply(reply, e.retry_after))
+                self.retrying_replies.add(task)
+                task.add_done_callback(self.retrying_replies.discard)
+            except Exception as e:
+                print(f"[triage] Error processing reply from {reply['from']}: {e}")
+            finally:
+                self.reply_queue.task_done()
+
+    async def _requeue_reply(self, reply: Dict, delay: float):
+        await asyncio.sleep(delay)
+        await self.reply_queue.put(reply)
+
+    def _start_reply_ingestion(self, loop: asyncio.AbstractEventLoop):
+        def enqueue(reply: Dict):
+            # Blocks the IMAP thread while the queue is full, so triage sets the pace.
+            asyncio.run_coroutine_threadsafe(self.reply_queue.put(reply), loop).result()
+
+        self.reply_service = ReplyIngestionService(handler=enqueue)
+        threading.Thread(target=self.reply_service.run_forever, name="reply-ingestor", daemon=True).start()
+
+    async def run(self):
+        await asyncio.to_thread(load_sequences)
+        self.research_agent = await asyncio.to_thread(build_agent_graph)
+        wakeup = SchedulerWakeup()
+        if self.ingest_replies:
+            self._start_reply_ingestion(asyncio.get_running_loop())
+
+        tasks = [asyncio.create_task(self.dispatcher(wakeup)), asyncio.create_task(self.sender())]
+        tasks += [asyncio.create_task(self.research_worker(n + 1)) for n in range(self.research_workers)]
+        if self.ingest_replies:
+            tasks.append(asyncio.create_task(self.triage()))
+
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            if self.reply_service:
+                self.reply_service.stop()
+            wakeup.close()
+            flush_pending_writes()
@@ -0,0 +1,144 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+from functools import wraps
+from typing import Callable, Dict, Optional, Tuple
+from src.hyperion.config import get_settings
+from src.hyperion.database.operations import record_usage, get_campaign_spend, get_campaign_budget
+
+# Estimated USD per million (input, output) tokens. Unknown models are costed
+# at the most expensive rate so budgets err on the safe side.
+GEMINI_PRICING: Dict[str, Tuple[float, float]] = {
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-3-flash-preview": (0.50, 3.00),
+    "gemini-2.5-pro": (1.25, 10.00),
+}
+FALLBACK_GEMINI_PRICING = (1.25, 10.00)
+
+# Estimated USD per credit for request-priced providers.
+CREDIT_PRICING: Dict[str, float] = {
+    "tavily": 0.008,
+    "firecrawl": 0.001,
+    "serper": 0.001,
+}
+
+# How long research stays paused for a campaign over budget before checking again.
+BUDGET_RECHECK_SECONDS = 3600
+
+
+class BudgetExhaustedError(Exception):
+    """
+    Raised before research starts when a campaign has spent its budget.
+    Like ProviderUnavailableError, callers should defer the action.
+    """
+
+    def __init__(self, sequence_id: str, spent: float, budget: float, retry_after: float = BUDGET_RECHECK_SECONDS):
+        self.sequence_id = sequence_id
+        self.retry_after = retry_after
+        super().__init__(f"Campaign {sequence_id} has spent ${spent:.2f} of its ${budget:.2f} budget")
+
+
+@dataclass(frozen=True)
+class UsageScope:
+    prospect_id: Optional[str] = None
+    sequence_id: Optional[str] = None
+    node: str = "unattributed"
+
+
+_scope: ContextVar[UsageScope] = ContextVar("usage_scope", default=UsageScope())
+
+
+@contextmanager
+def usage_scope(prospect_id: Optional[str] = None, sequence_id: Optional[str] = None, node: Optional[str] = None):
+    """
+    Attributes external calls made inside the block to a prospect, campaign
+    and node. Unset arguments keep the enclosing scope's values.
+    """
+
+    current = _scope.get()
+    token = _scope.set(replace(
+        current,
+        prospect_id=prospect_id or current.prospect_id,
+        sequence_id=sequence_id or current.sequence_id,
+        node=node or current.node
+    ))
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def tracked_node(name: str, node: Callable) -> Callable:
+    """
+    Wraps a graph node so the calls it makes are recorded under its name and prospect.
+    """
+
+    @wraps(node)
+    def run(state):
+        with usage_scope(prospect_id=(state.get('prospect') or {}).get('id'), node=name):
+            return node(state)
+    return run
+
+
+def gemini_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    input_price, output_price = GEMINI_PRICING.get(model, FALLBACK_GEMINI_PRICING)
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+def _gemini_usage(func: Callable, response) -> Tuple[str, int, int]:
+    model = getattr(getattr(func, '__self__', None), 'model_name', '') or ''
+    metadata = getattr(response, 'usage_metadata', None)
+    input_tokens = getattr(metadata, 'prompt_token_count', 0) or 0
+    output_tokens = getattr(metadata, 'candidates_token_count', 0) or 0
+    return model.removeprefix('models/'), input_tokens, output_tokens
+
+
+def track_usage(provider: str, model: Optional[str] = None, input_tokens: int = 0, output_tokens: int = 0,
+                credits: int = 1):
+    """
+    Records one external call against the current usage scope with its estimated cost.
+    """
+
+    if provider == "gemini":
+        cost = gemini_cost(model or '', input_tokens, output_tokens)
+    else:
+        cost = credits * CREDIT_PRICING.get(provider, 0.0)
+    scope = _scope.get()
+    record_usage(provider, model, scope.node, scope.prospect_id, scope.sequence_id,
+                 1, input_tokens, output_tokens, cost)
+
+
+def track_provider_call(provider: str, func: Callable, kwargs: Dict, response):
+    """
+    Called by call_provider after every successful call; pulls token counts
+    out of Gemini responses and counts credits for the request-priced providers.
+    """
+
+    try:
+        if provider == "gemini":
+            model, input_tokens, output_tokens = _gemini_usage(func, response)
+            track_usage(provider, model, input_tokens, output_tokens)
+        elif provider == "tavily":
+            track_usage(provider, credits=2 if kwargs.get('search_depth') == 'advanced' else 1)
+        else:
+            track_usage(provider)
+    except Exception as e:
+        # Accounting must never break the call it is accounting for.
+        print(f"  - Could not record {provider} usage: {e}")
+
+
+def check_campaign_budget(sequence_id: str):
+    """
+    Raises BudgetExhaustedError if the campaign's spend has reached its budget
+    (from campaign_budgets, else CAMPAIGN_BUDGET_USD). No budget means unlimited.
+    """
+
+    budget = get_campaign_budget(sequence_id)
+    if budget is None:
+        budget = get_settings().campaign_budget_usd
+    if budget is None:
+        return
+    spent = get_campaign_spend(sequence_id)
+    if spent >= budget:
+        raise BudgetExhaustedError(sequence_id, spent, budget)
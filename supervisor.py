@@ -0,0 +1,11 @@
+import asyncio
+from src.hyperion.database.operations import initialize_database
+from src.hyperion.supervisor import Supervisor
+
+if __name__ == "__main__":
+    print("--- Hyperion Supervisor is starting up... ---")
+    initialize_database()
+    try:
+        asyncio.run(Supervisor().run())
+    except KeyboardInterrupt:
+        print("--- Hyperion Supervisor stopped. ---")